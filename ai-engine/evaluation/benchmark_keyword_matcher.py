@@ -0,0 +1,115 @@
+# evaluation/benchmark_keyword_matcher.py
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from inference.emotion_inference import EMOTION_KEYWORDS
+from inference.keyword_matcher import KeywordMatcher
+
+FILLER = (
+    "today i went to class and then walked home the weather was fine and i had coffee with a friend "
+    "we talked about exams work family plans for the weekend and what to cook for dinner"
+).split()
+SIGNAL = ["happy", "sad", "stressed", "overwhelmed", "worried", "panicking", "angry", "tired", "not", "never", "good"]
+
+LEGACY_RULES = [
+    ("happy", ["happy", "great", "good", "awesome"]),
+    ("sad", ["sad", "down", "depressed"]),
+    ("stressed", ["stress", "overwhelm", "tired"]),
+    ("anxious", ["anxious", "panic", "worried"]),
+    ("angry", ["angry", "mad", "furious"]),
+]
+
+
+def journal_entries(n: int, words: int, seed: int = 0) -> List[str]:
+    """Long, mostly neutral journal-style texts with a few emotion words sprinkled in."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        toks = list(rng.choice(FILLER, size=words))
+        for pos in rng.integers(0, words, size=max(1, words // 200)):
+            toks[pos] = str(rng.choice(SIGNAL))
+        out.append(" ".join(toks).capitalize() + ".")
+    return out
+
+
+def legacy_scan(text: str) -> List[str]:
+    # the old approach: lowercase copy + one substring scan per keyword
+    t = text.lower()
+    cats = [name for name, keys in LEGACY_RULES if any(k in t for k in keys)]
+    if "anx" in t or "overwhelm" in t or "stress" in t:
+        cats.append("reply:stress")
+    return cats
+
+
+def synthetic_vocab(n_words: int, n_categories: int = 8, seed: int = 1) -> dict:
+    """n_words made-up keywords (a quarter of them prefixes) spread over n_categories."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocab: dict = {f"cat{c}": [] for c in range(n_categories)}
+    for i in range(n_words):
+        word = "".join(rng.choice(letters, size=int(rng.integers(4, 9))))
+        vocab[f"cat{i % n_categories}"].append(word + ("*" if i % 4 == 0 else ""))
+    return vocab
+
+
+def legacy_vocab_scan(vocab: dict) -> Callable[[str], List[str]]:
+    rules = [(name, [w.rstrip("*") for w in words]) for name, words in vocab.items()]
+
+    def scan(text: str) -> List[str]:
+        t = text.lower()
+        return [name for name, keys in rules if any(k in t for k in keys)]
+
+    return scan
+
+
+def bench(name: str, fn: Callable[[str], object], texts: List[str], repeat: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    took = time.perf_counter() - started
+    n = len(texts) * repeat
+    mb = sum(len(t) for t in texts) * repeat / 1e6
+    return {"engine": name, "entries_per_s": round(n / took), "MB_per_s": round(mb / took, 1), "us_per_entry": round(1e6 * took / n, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Keyword matcher throughput on long journal entries")
+    ap.add_argument("--entries", type=int, default=500)
+    ap.add_argument("--words", type=int, default=1500, help="words per entry")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--vocab-sizes", default="25,100,400,1600", help="keyword counts for the scaling table; empty = skip")
+    args = ap.parse_args()
+
+    texts = journal_entries(args.entries, args.words)
+    # the matcher does everything the legacy chain does in one pass: emotion + chat tags, with negation
+    matcher = KeywordMatcher({**EMOTION_KEYWORDS, "reply:stress": ["anx*", "overwhelm*", "stress*"]})
+
+    rows = [
+        bench("legacy substring scans", legacy_scan, texts, args.repeat),
+        bench("compiled matcher", matcher.categories, texts, args.repeat),
+    ]
+    print(f"{args.entries} entries x {args.words} words, avg {np.mean([len(t) for t in texts]) / 1000:.1f} KB")
+    for r in rows:
+        print(f"  {r['engine']:<24} {r['entries_per_s']:>8} entries/s  {r['MB_per_s']:>7} MB/s  {r['us_per_entry']:>8} us/entry")
+
+    # substring scans cost one pass per keyword; the compiled matcher is one pass in total
+    sizes = [int(v) for v in args.vocab_sizes.split(",") if v.strip()]
+    if sizes:
+        sample = texts[: max(1, len(texts) // 5)]
+        print("vocabulary scaling (us/entry):")
+        print(f"  {'keywords':>8} {'legacy':>10} {'compiled':>10}")
+        for n in sizes:
+            vocab = synthetic_vocab(n)
+            legacy = bench("legacy", legacy_vocab_scan(vocab), sample, 1)
+            compiled = bench("compiled", KeywordMatcher(vocab).categories, sample, 1)
+            print(f"  {n:>8} {legacy['us_per_entry']:>10} {compiled['us_per_entry']:>10}")
+
+
+if __name__ == "__main__":
+    main()
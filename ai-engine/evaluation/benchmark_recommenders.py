@@ -0,0 +1,112 @@
+# evaluation/benchmark_recommenders.py
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from evaluation.evaluate_models import evaluate_topk, leave_one_out_split
+from inference.recommendation_logic import IBCFRecommender
+from training.dataset_loader import load_recommendation_dataset
+
+
+def synthetic_ratings(n_users: int, n_items: int, per_user: int, n_groups: int = 20, seed: int = 0) -> pd.DataFrame:
+    """
+    Random ratings with some structure, so HitRate means something:
+    users and items belong to taste groups, users mostly pick (and rate
+    higher) items from their own group. Each user rates `per_user` distinct
+    items with increasing timestamps.
+    """
+    rng = np.random.default_rng(seed)
+    item_group = rng.integers(0, n_groups, size=n_items)
+    user_group = rng.integers(0, n_groups, size=n_users)
+    base_pop = 1.0 / np.arange(1, n_items + 1) ** 0.5
+
+    per_user = min(per_user, n_items)
+    users, items, ratings = [], [], []
+    for u in range(n_users):
+        own = item_group == user_group[u]
+        p = base_pop * np.where(own, 8.0, 1.0)
+        picked = rng.choice(n_items, size=per_user, replace=False, p=p / p.sum())
+        r = np.where(own[picked], rng.integers(4, 6, size=per_user), rng.integers(1, 4, size=per_user))
+        users.append(np.full(per_user, u))
+        items.append(picked)
+        ratings.append(r)
+
+    users_a, items_a = np.concatenate(users), np.concatenate(items)
+    return pd.DataFrame({
+        "user_id": [f"u{u}" for u in users_a],
+        "item_id": [f"i{i}" for i in items_a],
+        "rating": np.concatenate(ratings),
+        "timestamp": np.tile(np.arange(per_user), n_users),
+    })
+
+
+def bench_one(name: str, n_neighbors: int | None, train_df: pd.DataFrame, test_rows, k: int) -> Dict[str, Any]:
+    model = IBCFRecommender(n_neighbors=n_neighbors)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    model.fit(train_df)
+    fit_s = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    hr = evaluate_topk(model, test_rows, k)["HitRate@k"]
+    score_s = time.perf_counter() - started
+
+    return {
+        "model": name,
+        "fit_s": round(fit_s, 3),
+        "fit_peak_mb": round(peak / 1e6, 1),
+        "model_mb": round(model.nbytes() / 1e6, 2),
+        "HitRate@k": round(float(hr), 4),
+        "score_ms_per_user": round(1000 * score_s / max(len(test_rows), 1), 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Dense vs sparse top-N IBCF: memory, fit time and HitRate@k")
+    ap.add_argument("--ratings", default="", help="ratings.csv; if empty a synthetic dataset is used")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--items", type=int, default=3000)
+    ap.add_argument("--per-user", type=int, default=30)
+    ap.add_argument("--neighbors", default="20,50,100", help="comma separated top-N values")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--max-test", type=int, default=500, help="cap on scored test users")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    args = ap.parse_args()
+
+    if args.ratings.strip():
+        ratings = load_recommendation_dataset(ratings_csv=args.ratings.strip()).ratings
+    else:
+        ratings = synthetic_ratings(args.users, args.items, args.per_user)
+
+    train_df, test_rows = leave_one_out_split(ratings)
+    test_rows = test_rows[: args.max_test]
+
+    rows: List[Dict[str, Any]] = [bench_one("dense", None, train_df, test_rows, args.k)]
+    for n in [int(x) for x in args.neighbors.split(",") if x.strip()]:
+        rows.append(bench_one(f"top{n}", n, train_df, test_rows, args.k))
+
+    cols = list(rows[0].keys())
+    print(" | ".join(f"{c:>17}" for c in cols))
+    for r in rows:
+        print(" | ".join(f"{str(r[c]):>17}" for c in cols))
+
+    if args.out:
+        outp = Path(args.out)
+        outp.parent.mkdir(parents=True, exist_ok=True)
+        outp.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"[OK] Wrote: {outp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from pathlib import Path
+from typing import Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -12,47 +14,59 @@ from inference.recommendation_logic import IBCFRecommender
 from training.dataset_loader import load_recommendation_dataset
 
 
-def hit_rate_at_k(model: IBCFRecommender, test_rows, k: int) -> float:
-    hits = 0
-    total = 0
-    for (u, true_item) in test_rows:
-        recs = model.recommend(u, k=k)
-        rec_items = [r.item_id for r in recs]
-        hits += int(true_item in rec_items)
-        total += 1
-    return hits / max(total, 1)
+def ranking_metrics(top: np.ndarray, truth: np.ndarray, n_items: int, k: int) -> Dict[str, float]:
+    """
+    Leave-one-out metrics from one top-k matrix.
+
+    top:   test users x k item positions, best first (-1 = padding)
+    truth: held-out item position per test user (-1 = not in the training catalog, never a hit)
+
+    With a single relevant item per user, recall@k equals HitRate@k and
+    NDCG@k is 1 / log2(rank + 1).
+    """
+    n = len(truth)
+    if n == 0:
+        return {"HitRate@k": 0.0, "MRR@k": 0.0, "NDCG@k": 0.0, "Precision@k": 0.0, "Recall@k": 0.0, "Coverage@k": 0.0}
+
+    match = (top == truth[:, None]) & (truth[:, None] >= 0)
+    hit = match.any(axis=1)
+    rank = match.argmax(axis=1) + 1                     # only meaningful where hit
+
+    recommended = np.unique(top[top >= 0])
+    return {
+        "HitRate@k": float(hit.mean()),
+        "MRR@k": float(np.where(hit, 1.0 / rank, 0.0).mean()),
+        "NDCG@k": float(np.where(hit, 1.0 / np.log2(rank + 1), 0.0).mean()),
+        "Precision@k": float(hit.sum() / (n * k)),
+        "Recall@k": float(hit.mean()),
+        "Coverage@k": float(len(recommended) / max(n_items, 1)),
+    }
 
 
-def mrr_at_k(model: IBCFRecommender, test_rows, k: int) -> float:
-    rr = []
-    for (u, true_item) in test_rows:
-        recs = model.recommend(u, k=k)
-        rec_items = [r.item_id for r in recs]
-        if true_item in rec_items:
-            rank = rec_items.index(true_item) + 1
-            rr.append(1.0 / rank)
-        else:
-            rr.append(0.0)
-    return float(np.mean(rr)) if rr else 0.0
+def evaluate_topk(model: IBCFRecommender, test_rows, k: int, batch_size: int = 256) -> Dict[str, float]:
+    """Scores every test user once (batched) and derives all metrics from that top-k."""
+    users = [str(u) for u, _ in test_rows]
+    truth = pd.Index([str(it) for it in model.item_ids]).get_indexer([str(it) for _, it in test_rows])
+    top, _ = model.topk_arrays(users, k=k, batch_size=batch_size)
+    return ranking_metrics(top, truth, len(model.item_ids), k)
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--ratings", default="")
-    ap.add_argument("--items", default="")
-    ap.add_argument("--sample", default="data/sample_inputs.json")
-    ap.add_argument("--k", type=int, default=10)
-    ap.add_argument("--out", default="evaluation/results.json")
-    args = ap.parse_args()
+def hit_rate_at_k(model: IBCFRecommender, test_rows, k: int) -> float:
+    """Single-metric convenience wrapper: scores every test user again, so use evaluate_topk for more than one metric."""
+    return evaluate_topk(model, test_rows, k)["HitRate@k"]
 
-    ds = load_recommendation_dataset(
-        ratings_csv=args.ratings.strip() or None,
-        items_csv=args.items.strip() or None,
-        sample_inputs_json=args.sample.strip() or None,
-    )
 
-    # leave-one-out: last rating per user as test
-    df = ds.ratings.copy()
+def mrr_at_k(model: IBCFRecommender, test_rows, k: int) -> float:
+    """Single-metric convenience wrapper, like hit_rate_at_k; evaluate_topk gives every metric from one scoring pass."""
+    return evaluate_topk(model, test_rows, k)["MRR@k"]
+
+
+def leave_one_out_split(ratings: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[str, str]]]:
+    """
+    Leave-one-out: last rating (by timestamp) per user is the test item.
+    Users with a single rating stay in train only.
+    """
+    df = ratings.copy()
 
     # ensure required columns exist
     for col in ["user_id", "item_id", "rating"]:
@@ -64,39 +78,55 @@ def main():
         df["timestamp"] = 0
 
     df["timestamp"] = df["timestamp"].astype(float)
-    df = df.sort_values(["user_id", "timestamp"], ascending=[True, True])
+    # stable sort: on equal timestamps the row that came last in the file is the test item
+    df = df.sort_values(["user_id", "timestamp"], ascending=[True, True], kind="stable")
 
-    test_rows = []
-    train_parts = []
+    by_user = df.groupby("user_id", sort=False)
+    is_last = by_user.cumcount(ascending=False).to_numpy() == 0
+    has_train = by_user["item_id"].transform("size").to_numpy() >= 2
+    test_mask = is_last & has_train
 
-    for u, g in df.groupby("user_id"):
-        if len(g) < 2:
-            train_parts.append(g)
-            continue
+    test = df.loc[test_mask, ["user_id", "item_id"]]
+    test_rows = list(zip(test["user_id"].astype(str), test["item_id"].astype(str)))
+    train_df = df.loc[~test_mask].reset_index(drop=True)
+    return train_df, test_rows
 
-        test = g.iloc[-1]
-        train = g.iloc[:-1]
 
-        test_rows.append((str(test["user_id"]), str(test["item_id"])))
-        train_parts.append(train)
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ratings", default="")
+    ap.add_argument("--items", default="")
+    ap.add_argument("--sample", default="data/sample_inputs.json")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--out", default="evaluation/results.json")
+    ap.add_argument("--neighbors", type=int, default=0, help="Keep top-N neighbors per item (sparse model); 0 = dense")
+    ap.add_argument("--batch-size", type=int, default=256, help="Test users scored per matrix product")
+    args = ap.parse_args()
+
+    ds = load_recommendation_dataset(
+        ratings_csv=args.ratings.strip() or None,
+        items_csv=args.items.strip() or None,
+        sample_inputs_json=args.sample.strip() or None,
+    )
 
-    # ✅ pandas 2.x compatible: concat instead of append
-    if train_parts:
-        train_df = pd.concat(train_parts, ignore_index=True)
-    else:
-        # preserve schema
-        train_df = df.iloc[:0].copy()
+    t0 = time.perf_counter()
+    train_df, test_rows = leave_one_out_split(ds.ratings)
+    t1 = time.perf_counter()
 
-    model = IBCFRecommender()
+    model = IBCFRecommender(n_neighbors=args.neighbors or None)
     model.fit(train_df, ds.items)
+    t2 = time.perf_counter()
+
+    metrics = evaluate_topk(model, test_rows, args.k, batch_size=args.batch_size)
+    t3 = time.perf_counter()
 
     results = {
         "k": args.k,
         "num_users": int(ds.ratings["user_id"].nunique()),
         "num_items": int(ds.ratings["item_id"].nunique()),
         "num_test": int(len(test_rows)),
-        "HitRate@k": float(hit_rate_at_k(model, test_rows, args.k)),
-        "MRR@k": float(mrr_at_k(model, test_rows, args.k)),
+        **metrics,
+        "timings": {"split_s": round(t1 - t0, 4), "fit_s": round(t2 - t1, 4), "score_s": round(t3 - t2, 4)},
     }
 
     outp = Path(args.out)
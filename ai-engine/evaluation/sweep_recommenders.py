@@ -0,0 +1,174 @@
+# evaluation/sweep_recommenders.py
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from evaluation.benchmark_recommenders import synthetic_ratings
+from evaluation.evaluate_models import evaluate_topk, leave_one_out_split
+from inference.recommendation_logic import IBCFRecommender
+from training.dataset_loader import load_recommendation_dataset
+
+# name -> how a grid value string is parsed (these are IBCFRecommender keyword arguments)
+PARAMS = {
+    "n_neighbors": lambda v: int(v) or None,    # 0 = dense model
+    "shrinkage": float,
+    "min_support": int,
+    "normalization": str,
+}
+
+DEFAULT_GRID = "n_neighbors=0,50;shrinkage=0,10;min_support=1,2;normalization=user_mean"
+
+
+def parse_grid(spec: str) -> List[Dict[str, Any]]:
+    """'a=1,2;b=x' -> [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'x'}] (cartesian product)."""
+    axes: Dict[str, List[Any]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        name, _, values = part.partition("=")
+        name = name.strip()
+        if name not in PARAMS:
+            raise ValueError(f"unknown sweep parameter {name!r} (known: {', '.join(PARAMS)})")
+        axes[name] = [PARAMS[name](v.strip()) for v in values.split(",") if v.strip()]
+    names = list(axes)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(axes[n] for n in names))]
+
+
+# -------- shared dataset --------
+# The parent parses and splits the ratings once and writes them as plain .npy
+# columns; every worker memory-maps the same files instead of getting its own
+# pickled DataFrame.
+_SHARED: Dict[str, Any] = {}
+
+
+def write_shared(train_df: pd.DataFrame, test_rows, out_dir: Path) -> None:
+    u_codes, u_ids = pd.factorize(train_df["user_id"].astype(str))
+    i_codes, i_ids = pd.factorize(train_df["item_id"].astype(str))
+    arrays = {
+        "user_code": u_codes.astype(np.int32),
+        "item_code": i_codes.astype(np.int32),
+        "rating": train_df["rating"].to_numpy(dtype=np.float32),
+        "timestamp": train_df["timestamp"].to_numpy(dtype=np.float64),
+        "user_ids": np.asarray(u_ids, dtype=np.str_),
+        "item_ids": np.asarray(i_ids, dtype=np.str_),
+        "test_users": np.asarray([u for u, _ in test_rows], dtype=np.str_),
+        "test_items": np.asarray([it for _, it in test_rows], dtype=np.str_),
+    }
+    for name, arr in arrays.items():
+        np.save(out_dir / f"{name}.npy", arr, allow_pickle=False)
+
+
+def _open_shared(data_dir: str) -> None:
+    d = Path(data_dir)
+    cols = {p.stem: np.load(p, mmap_mode="r") for p in d.glob("*.npy")}
+    _SHARED["train"] = pd.DataFrame({
+        "user_id": pd.Categorical.from_codes(cols["user_code"], categories=cols["user_ids"]),
+        "item_id": pd.Categorical.from_codes(cols["item_code"], categories=cols["item_ids"]),
+        "rating": cols["rating"],
+        "timestamp": cols["timestamp"],
+    })
+    _SHARED["test_rows"] = list(zip(cols["test_users"].tolist(), cols["test_items"].tolist()))
+
+
+def run_config(params: Dict[str, Any], k: int) -> Dict[str, Any]:
+    """Trains and evaluates one configuration on the shared split (runs inside a worker)."""
+    train_df, test_rows = _SHARED["train"], _SHARED["test_rows"]
+    model = IBCFRecommender(**params)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    model.fit(train_df)
+    fit_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    metrics = evaluate_topk(model, test_rows, k)
+    score_s = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "n_neighbors": params.get("n_neighbors") or 0,
+        "shrinkage": params.get("shrinkage", 0.0),
+        "min_support": params.get("min_support", 1),
+        "normalization": params.get("normalization", "user_mean"),
+        **{name: round(value, 4) for name, value in metrics.items()},
+        "fit_s": round(fit_s, 3),
+        "score_ms_per_user": round(1000 * score_s / max(len(test_rows), 1), 3),
+        "peak_mb": round(peak / 1e6, 1),
+        "model_mb": round(model.nbytes() / 1e6, 2),
+    }
+
+
+def sweep(
+    train_df: pd.DataFrame,
+    test_rows,
+    grid: List[Dict[str, Any]],
+    k: int = 10,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Runs every grid point; rows come back in grid order."""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(grid)))
+    with tempfile.TemporaryDirectory(prefix="sweep-") as tmp:
+        write_shared(train_df, test_rows, Path(tmp))
+        if workers == 1:
+            _open_shared(tmp)
+            return [run_config(p, k) for p in grid]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_shared, initargs=(tmp,)) as pool:
+            return list(pool.map(run_config, grid, itertools.repeat(k)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train + evaluate IBCF variants in parallel (leave-one-out)")
+    ap.add_argument("--ratings", default="", help="ratings.csv; if empty a synthetic dataset is used")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--items", type=int, default=3000)
+    ap.add_argument("--per-user", type=int, default=30)
+    ap.add_argument("--grid", default=DEFAULT_GRID, help=f"e.g. '{DEFAULT_GRID}'")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--workers", type=int, default=0, help="processes; 0 = one per CPU")
+    ap.add_argument("--max-test", type=int, default=0, help="cap on scored test users; 0 = all")
+    ap.add_argument("--sort-by", default="NDCG@k", help="metric column to sort the table by (descending)")
+    ap.add_argument("--out", default="", help="optional .json or .csv output path")
+    args = ap.parse_args()
+
+    if args.ratings.strip():
+        ratings = load_recommendation_dataset(ratings_csv=args.ratings.strip()).ratings
+    else:
+        ratings = synthetic_ratings(args.users, args.items, args.per_user)
+
+    train_df, test_rows = leave_one_out_split(ratings)
+    if args.max_test:
+        test_rows = test_rows[: args.max_test]
+
+    grid = parse_grid(args.grid)
+    started = time.perf_counter()
+    rows = sweep(train_df, test_rows, grid, k=args.k, workers=args.workers or None)
+    print(f"[OK] {len(grid)} configs in {time.perf_counter() - started:.1f}s")
+
+    table = pd.DataFrame(rows)
+    if args.sort_by in table.columns:
+        table = table.sort_values(args.sort_by, ascending=False, kind="stable")
+    print(table.to_string(index=False))
+
+    if args.out:
+        outp = Path(args.out)
+        outp.parent.mkdir(parents=True, exist_ok=True)
+        if outp.suffix == ".csv":
+            table.to_csv(outp, index=False)
+        else:
+            outp.write_text(json.dumps(table.to_dict(orient="records"), indent=2), encoding="utf-8")
+        print(f"[OK] Wrote: {outp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# inference/artifacts.py
+"""
+Versioned on-disk layout for model artifacts:
+
+    <model_dir>/
+      manifest.json        <- small, written LAST; describes everything else
+      <name>.npy           <- one plain .npy per array (openable with mmap_mode="r")
+
+manifest.json:
+    {
+      "format": "nuvio-model",
+      "format_version": 2,
+      "version": "<hash of all array checksums>",
+      "created_at": 1769023247,
+      "arrays": {
+        "sim": {"file": "sim.npy", "dtype": "<f4", "shape": [n, n], "bytes": ...,
+                "sha256": "<full file>", "quick_sha256": "<size + head + tail>"},
+        ...
+      },
+      "extra": {...}       <- small JSON-able things (titles, meta)
+    }
+
+Files are written to a temp name and renamed into place, so processes that
+have the previous version memory-mapped keep reading the old inode.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_NAME = "nuvio-model"
+FORMAT_VERSION = 2
+
+# how much of each end of a file goes into the quick checksum
+_QUICK_BYTES = 64 * 1024
+
+
+class ArtifactError(RuntimeError):
+    pass
+
+
+def _atomic_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp-{os.getpid()}")
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _quick_sha256(path: Path) -> str:
+    """Checksum of size + first/last 64 KiB: catches truncated or half-written files cheaply."""
+    size = path.stat().st_size
+    h = hashlib.sha256(str(size).encode("ascii"))
+    with path.open("rb") as f:
+        h.update(f.read(_QUICK_BYTES))
+        if size > _QUICK_BYTES:
+            f.seek(max(size - _QUICK_BYTES, _QUICK_BYTES))
+            h.update(f.read(_QUICK_BYTES))
+    return h.hexdigest()
+
+
+def write_array(model_dir: Path, name: str, arr: np.ndarray) -> Dict[str, Any]:
+    """Writes one array as <name>.npy and returns its manifest entry."""
+    arr = np.ascontiguousarray(arr)
+    final = model_dir / f"{name}.npy"
+    tmp = _atomic_path(final)
+    with tmp.open("wb") as f:
+        np.save(f, arr, allow_pickle=False)
+    entry = {
+        "file": final.name,
+        "dtype": arr.dtype.str,
+        "shape": list(arr.shape),
+        "bytes": tmp.stat().st_size,
+        "sha256": _sha256_file(tmp),
+        "quick_sha256": _quick_sha256(tmp),
+    }
+    os.replace(tmp, final)
+    return entry
+
+
+def write_manifest(
+    model_dir: Path,
+    arrays: Mapping[str, Dict[str, Any]],
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    h = hashlib.sha256()
+    for name in sorted(arrays):
+        h.update(f"{name}:{arrays[name]['sha256']};".encode("utf-8"))
+    extra = extra or {}
+    h.update(json.dumps(extra, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "version": h.hexdigest()[:16],
+        "created_at": int(time.time()),
+        "arrays": dict(arrays),
+        "extra": extra,
+    }
+    final = model_dir / MANIFEST_NAME
+    tmp = _atomic_path(final)
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, final)
+    return manifest
+
+
+def add_arrays(model_dir: Path, arrays: Mapping[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Adds (or replaces) array entries in an existing manifest; gives a new version."""
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        raise ArtifactError(f"{model_dir}: no {MANIFEST_NAME} to extend")
+    merged = dict(manifest["arrays"])
+    merged.update(arrays)
+    return write_manifest(model_dir, merged, extra=manifest.get("extra"))
+
+
+def read_manifest(model_dir: Path) -> Optional[Dict[str, Any]]:
+    """Returns the manifest, or None if the dir uses the legacy layout."""
+    p = model_dir / MANIFEST_NAME
+    if not p.exists():
+        return None
+    manifest = json.loads(p.read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_NAME:
+        raise ArtifactError(f"{p}: unknown format {manifest.get('format')!r}")
+    if int(manifest.get("format_version", 0)) > FORMAT_VERSION:
+        raise ArtifactError(f"{p}: format_version {manifest['format_version']} is newer than supported {FORMAT_VERSION}")
+    return manifest
+
+
+def open_array(model_dir: Path, manifest: Dict[str, Any], name: str, *, mmap: bool = True, verify: str = "quick") -> np.ndarray:
+    """
+    Opens one array listed in the manifest.
+
+    verify:
+      - "none":  trust the files
+      - "quick": size, .npy header (dtype/shape) and head/tail checksum; no full read
+      - "full":  also sha256 of the whole file
+    """
+    try:
+        entry = manifest["arrays"][name]
+    except KeyError:
+        raise ArtifactError(f"manifest has no array {name!r}")
+
+    path = model_dir / entry["file"]
+    if not path.exists():
+        raise ArtifactError(f"missing artifact: {path}")
+
+    if verify != "none":
+        size = path.stat().st_size
+        if size != int(entry["bytes"]):
+            raise ArtifactError(f"{path}: size {size} != manifest {entry['bytes']}")
+        if _quick_sha256(path) != entry["quick_sha256"]:
+            raise ArtifactError(f"{path}: quick checksum mismatch")
+        if verify == "full" and _sha256_file(path) != entry["sha256"]:
+            raise ArtifactError(f"{path}: sha256 mismatch")
+
+    # numpy can't memory-map an empty array
+    use_mmap = mmap and int(np.prod(entry["shape"])) > 0
+    arr = np.load(path, mmap_mode="r" if use_mmap else None, allow_pickle=False)
+    if arr.dtype.str != entry["dtype"] or list(arr.shape) != list(entry["shape"]):
+        raise ArtifactError(f"{path}: header {arr.dtype.str}{list(arr.shape)} != manifest {entry['dtype']}{entry['shape']}")
+    return arr
+
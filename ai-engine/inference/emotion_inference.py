@@ -1,19 +1,53 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from inference.keyword_matcher import KeywordMatcher
+
+AI_ENGINE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_EMOTION_MODEL_DIR = AI_ENGINE_DIR / "models" / "emotion" / "latest"
+
+# rule fallback: first matching group wins (order matters); "word*" = prefix
+EMOTION_KEYWORDS = {
+    "happy": ["happy", "great", "good", "awesome"],
+    "sad": ["sad", "down", "depressed"],
+    "stressed": ["stress*", "overwhelm*", "tired"],
+    "anxious": ["anxious", "panic*", "worried"],
+    "angry": ["angry", "mad", "furious"],
+}
+RULE_CONFIDENCE = 0.75
+_rule_matcher = KeywordMatcher(EMOTION_KEYWORDS)
 
 
 class EmotionInference:
     """
-    Lightweight emotion inference.
-    Rule-based fallback (demo-safe).
+    Emotion inference.
+    Uses the TF-IDF + LogisticRegression pipeline from training/train_emotion.py
+    (models/emotion/latest/model.joblib), loaded once when the engine is built.
+    Rule-based fallback (demo-safe) only when no trained model exists.
     """
 
-    def __init__(self):
-        data_dir = Path(__file__).resolve().parents[1] / "data"
-        mapping_path = data_dir / "label_mapping.json"
+    def __init__(self, model_dir: str | Path | None = None):
+        model_dir = Path(model_dir or os.getenv("EMOTION_MODEL_DIR") or DEFAULT_EMOTION_MODEL_DIR)
+        model_path = model_dir / "model.joblib"
+
+        self.pipeline = None
+        self.classes: List[str] = []
+        if model_path.exists():
+            import joblib
+
+            self.pipeline = joblib.load(model_path)
+            self.classes = [str(c) for c in self.pipeline.classes_]
+
+        # the trained model ships its own mapping; otherwise the repo default
+        mapping_path = model_dir / "label_mapping.json"
+        if not mapping_path.exists():
+            mapping_path = AI_ENGINE_DIR / "data" / "label_mapping.json"
 
         if mapping_path.exists():
             with mapping_path.open("r", encoding="utf-8") as f:
@@ -28,31 +62,64 @@ class EmotionInference:
                 "angry": 5,
             }
 
+    @property
+    def source(self) -> str:
+        return "model" if self.pipeline is not None else "rules"
+
     def classify(self, text: str) -> Dict:
-        t = text.lower()
-
-        if any(k in t for k in ["happy", "great", "good", "awesome"]):
-            emotion = "happy"
-        elif any(k in t for k in ["sad", "down", "depressed"]):
-            emotion = "sad"
-        elif any(k in t for k in ["stress", "overwhelm", "tired"]):
-            emotion = "stressed"
-        elif any(k in t for k in ["anxious", "panic", "worried"]):
-            emotion = "anxious"
-        elif any(k in t for k in ["angry", "mad", "furious"]):
-            emotion = "angry"
-        else:
-            emotion = "neutral"
+        return self.classify_many([text])[0]
+
+    def classify_many(self, texts: Sequence[str], batch_size: int = 512) -> List[Dict]:
+        """
+        Classifies a batch. With a trained model, TF-IDF + predict_proba run
+        once per `batch_size` texts, and every result carries the full
+        per-class probability distribution.
+        """
+        texts = [str(t or "") for t in texts]
+        if self.pipeline is None:
+            return [self._classify_rules(t) for t in texts]
+
+        out: List[Dict] = []
+        for start in range(0, len(texts), batch_size):
+            proba = self.pipeline.predict_proba(texts[start:start + batch_size])
+            best = proba.argmax(axis=1)
+            for row, j in zip(proba, best):
+                emotion = self.classes[j]
+                out.append({
+                    "emotion": emotion,
+                    "label": self.label_mapping.get(emotion, -1),
+                    "confidence": float(row[j]),
+                    "probabilities": {c: float(p) for c, p in zip(self.classes, np.round(row, 6))},
+                    "source": "model",
+                })
+        return out
+
+    def _classify_rules(self, text: str) -> Dict:
+        # one pass over the text; negated keywords ("not happy") don't count
+        emotion = _rule_matcher.first(text, default="neutral")
 
         return {
             "emotion": emotion,
             "label": self.label_mapping.get(emotion, -1),
-            "confidence": 0.75
+            "confidence": RULE_CONFIDENCE,
+            "probabilities": None,  # rules don't produce a distribution
+            "source": "rules",
         }
 
 
 # ✅ SIMPLE FUNCTION API (senin çağırdığın şey)
+# built at import: the model is loaded once per process
 _engine = EmotionInference()
 
 def predict_emotion(text: str) -> Dict:
     return _engine.classify(text)
+
+def predict_emotions(texts: Sequence[str]) -> List[Dict]:
+    return _engine.classify_many(texts)
+
+
+def reload_engine(model_dir: Optional[str | Path] = None) -> EmotionInference:
+    """Rebuilds the shared engine (e.g. after training a new model)."""
+    global _engine
+    _engine = EmotionInference(model_dir)
+    return _engine
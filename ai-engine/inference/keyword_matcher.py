@@ -0,0 +1,155 @@
+# inference/keyword_matcher.py
+"""
+One compiled regex for all rule vocabularies (emotion fallback, chat fallback).
+
+    matcher = KeywordMatcher({"sad": ["sad", "depress*"], "stress": ["stress*", "overwhelm*"]})
+    matcher.categories("Not sad, just stressed out")   -> ["stress"]
+
+- keywords match whole words, case-insensitive; a trailing * matches any word
+  starting with the prefix ("stress*" -> stress, stressed, stressful)
+- a keyword is negated when a negator ("not", "never", "don't", ...) comes
+  before it in the same clause with at most `negation_window` words in between,
+  unless the negator intensifies instead ("I've never been so stressed",
+  "never felt this sad", "no more ..."): missing those would hide exactly the
+  strongest statements
+- every category is found in a single left-to-right pass over the text, and
+  the cost of that pass doesn't grow with the number of keywords
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_NEGATORS = (
+    "not", "no", "never", "without", "hardly", "barely", "nor",
+    "don't", "dont", "doesn't", "doesnt", "didn't", "didnt",
+    "isn't", "isnt", "wasn't", "wasnt", "aren't", "arent", "weren't", "werent",
+    "haven't", "havent", "hasn't", "hasnt",
+)
+# "can't" / "won't" are left out on purpose: "I can't handle the stress" is not a negation of stress
+
+# negators that intensify when followed by these words: "never been so/more/this ...", "no more ..."
+INTENSIFYING_NEGATORS: Dict[str, "re.Pattern[str]"] = {
+    "never": re.compile(r"\s+(?:(?:been|felt|feel|was|were|got|gotten|had)\s+)?(?:so|more|this)(?![\w'’])"),
+    "no": re.compile(r"\s+more(?![\w'’])"),
+}
+
+# characters that end a clause: negation doesn't carry over them
+_CLAUSE_BREAKS = ".,;:!?\n"
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    category: str
+    keyword: str        # the text that matched
+    start: int
+    negated: bool
+
+
+_WORD_CHARS = r"\w'’"     # apostrophes count as part of a word ("don't")
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Alternation compiled as a prefix trie ("sad|stress*" -> "s(?:ad|tress<word chars>*)"),
+    so the regex engine tries at most one branch per character instead of every
+    keyword. A trailing * in a word matches the rest of the word.
+    """
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        if "*" in node:
+            return f"[{_WORD_CHARS}]*"
+        kids = sorted((ch, sub) for ch, sub in node.items() if ch)
+        if not kids:
+            return ""
+        # straight or typographic apostrophe (iOS keyboards send ’)
+        alts = [("['’]" if ch == "'" else re.escape(ch)) + build(sub) for ch, sub in kids]
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(
+        self,
+        vocab: Mapping[str, Iterable[str]],
+        negators: Sequence[str] = DEFAULT_NEGATORS,
+        negation_window: int = 2,
+    ):
+        self.order: List[str] = list(vocab)                 # category priority = insertion order
+        self.negation_window = negation_window
+
+        self._exact: Dict[str, str] = {}                    # word -> category
+        self._prefixes: List[Tuple[str, str]] = []          # (stem, category), longest stem first
+        for category, words in vocab.items():
+            for w in words:
+                w = w.strip().lower().replace("’", "'")
+                if not w:
+                    continue
+                if w.endswith("*"):
+                    self._prefixes.append((w[:-1], category))
+                else:
+                    self._exact.setdefault(w, category)
+        self._prefixes.sort(key=lambda x: len(x[0]), reverse=True)
+        self._negators = {n.lower().replace("’", "'") for n in negators}
+
+        words = list(self._exact) + [stem + "*" for stem, _ in self._prefixes] + sorted(self._negators)
+        # the match starts on the separator before the word: that character class is
+        # a cheap first-character filter for the regex engine (text gets a leading space)
+        self._regex = re.compile(f"[^{_WORD_CHARS}]({_trie_regex(words)})(?![{_WORD_CHARS}])") if words else None
+
+    def _category(self, word: str) -> Optional[str]:
+        word = word.replace("’", "'")
+        if word in self._exact:
+            return self._exact[word]
+        for stem, category in self._prefixes:
+            if word.startswith(stem):
+                return category
+        return None     # a negator
+
+    def scan(self, text: str) -> List[KeywordHit]:
+        """All keyword hits in text order, each flagged negated or not."""
+        if not text or self._regex is None:
+            return []
+        low = " " + text.lower()
+        hits: List[KeywordHit] = []
+        neg_end = -1
+        for m in self._regex.finditer(low):
+            word = m.group(1)
+            if word.replace("’", "'") in self._negators:
+                intensifier = INTENSIFYING_NEGATORS.get(word)
+                # an intensifier cancels any negation before it too ("not that I've never been so ...")
+                neg_end = -1 if intensifier is not None and intensifier.match(low, m.end(1)) else m.end(1)
+                continue
+            category = self._category(word)
+            if category is None:
+                continue
+            negated = neg_end >= 0 and self._in_window(low, neg_end, m.start(1))
+            hits.append(KeywordHit(category, text[m.start(1) - 1:m.end(1) - 1], m.start(1) - 1, negated))
+        return hits
+
+    def _in_window(self, text: str, a: int, b: int) -> bool:
+        if b - a > 40 * (self.negation_window + 1):    # too far apart to be a few words
+            return False
+        gap = text[a:b]
+        if any(c in gap for c in _CLAUSE_BREAKS):
+            return False
+        return len(gap.split()) <= self.negation_window
+
+    def categories(self, text: str, include_negated: bool = False) -> List[str]:
+        """Matched categories in priority (vocab) order."""
+        found = {h.category for h in self.scan(text) if include_negated or not h.negated}
+        return [c for c in self.order if c in found]
+
+    def first(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Highest-priority matched category, like an if/elif chain over the vocab."""
+        cats = self.categories(text)
+        return cats[0] if cats else default
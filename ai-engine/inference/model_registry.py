@@ -0,0 +1,212 @@
+# inference/model_registry.py
+from __future__ import annotations
+
+import hashlib
+import mmap
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from inference.recommendation_logic import IBCFRecommender
+
+
+# files whose change means "a new model was written"
+# versioned dirs: only manifest.json, which save() replaces atomically after every array
+# (watching the arrays too would start a reload in the middle of a save)
+MANIFEST_FILE = "manifest.json"
+# legacy dirs (no manifest) have no commit point; these are the best we can watch
+LEGACY_WATCHED_FILES = ("model.json", "sim.npy", "r_norm.npy", "user_mean.npy")
+
+
+def _file_backed(a: Any) -> bool:
+    # scipy wraps the loaded buffers in views, so look down the .base chain for the mapping
+    while isinstance(a, np.ndarray):
+        if isinstance(a, np.memmap):
+            return True
+        a = a.base
+    return isinstance(a, mmap.mmap)
+
+
+def is_memory_mapped(m: Any) -> bool:
+    """True when a dense array, or a CSR matrix's data/indices, are mapped from the artifact files."""
+    if m is None:
+        return False
+    if sparse.issparse(m):
+        return _file_backed(m.data) and _file_backed(m.indices)
+    return _file_backed(m)
+
+
+@dataclass
+class LoadedModel:
+    model: IBCFRecommender
+    model_dir: Path
+    version: str
+    fingerprint: str
+    loaded_at: float
+    load_seconds: float
+    nbytes: int
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "model_dir": str(self.model_dir),
+            "version": self.version,
+            "loaded_at": int(self.loaded_at),
+            "load_ms": round(self.load_seconds * 1000, 2),
+            "memory_bytes": self.nbytes,
+            "mmap": is_memory_mapped(self.model.sim),
+            "num_users": len(self.model.user_ids),
+            "num_items": len(self.model.item_ids),
+            "precomputed_k": int(self.model.topk_items.shape[1]) if self.model.topk_items is not None else 0,
+        }
+
+
+@dataclass
+class _Slot:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    current: Optional[LoadedModel] = None
+    checked_at: float = 0.0
+    last_error: Optional[str] = None
+
+
+def artifact_fingerprint(model_dir: Path) -> str:
+    """
+    Cheap change detector: name + size + mtime of the artifact files.
+    Never reads the arrays themselves. For the versioned format that is just
+    manifest.json, so a new fingerprint always means a finished save.
+    """
+    h = hashlib.sha1()
+    names = (MANIFEST_FILE,) if (model_dir / MANIFEST_FILE).exists() else LEGACY_WATCHED_FILES
+    for name in names:
+        f = model_dir / name
+        try:
+            st = f.stat()
+        except FileNotFoundError:
+            continue
+        h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded recommenders, keyed by resolved model dir.
+
+    - Each model dir is loaded once and then reused by every request.
+    - At most every `check_interval` seconds a request stats the artifacts;
+      if the fingerprint changed, the new model is loaded next to the old one
+      and swapped in with a single assignment. Requests that already hold the
+      old LoadedModel keep using it until they finish.
+    - If the reload fails (e.g. files are still being written), the old model
+      keeps serving and we retry on the next check.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Path], IBCFRecommender] = IBCFRecommender.load,
+        check_interval: float = 5.0,
+    ):
+        self._loader = loader
+        self.check_interval = check_interval
+        self._slots: Dict[Path, _Slot] = {}
+        self._slots_lock = threading.Lock()
+        self._listeners: List[Callable[[Path, Optional[str], str], None]] = []
+
+    def on_swap(self, callback: Callable[[Path, Optional[str], str], None]) -> None:
+        """Registers callback(model_dir, old_version, new_version), called after a model is (re)loaded."""
+        self._listeners.append(callback)
+
+    def get(self, model_dir: str | Path) -> LoadedModel:
+        key = Path(model_dir).resolve()
+        slot = self._slot(key)
+
+        current = slot.current
+        now = time.monotonic()
+        if current is not None and now - slot.checked_at < self.check_interval:
+            return current
+
+        if current is None:
+            # first load: everybody waits for the one loader
+            with slot.lock:
+                if slot.current is None:
+                    self._load_into(slot, key, artifact_fingerprint(key))
+                return slot.current  # type: ignore[return-value]
+
+        # hot path: only one request checks for new artifacts, others keep serving
+        if not slot.lock.acquire(blocking=False):
+            return current
+        try:
+            slot.checked_at = time.monotonic()
+            fp = artifact_fingerprint(key)
+            if fp != current.fingerprint:
+                try:
+                    self._load_into(slot, key, fp)
+                except Exception as e:
+                    slot.last_error = f"{type(e).__name__}: {e}"
+            return slot.current  # type: ignore[return-value]
+        finally:
+            slot.lock.release()
+
+    def invalidate(self, model_dir: str | Path) -> None:
+        """Forces the next get() to check the artifacts again."""
+        slot = self._slots.get(Path(model_dir).resolve())
+        if slot is not None:
+            slot.checked_at = 0.0
+
+    def stats(self) -> List[Dict[str, Any]]:
+        out = []
+        for key, slot in list(self._slots.items()):
+            cur = slot.current
+            row: Dict[str, Any] = cur.info() if cur is not None else {"model_dir": str(key), "version": None}
+            row["last_reload_error"] = slot.last_error
+            out.append(row)
+        return out
+
+    def _slot(self, key: Path) -> _Slot:
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._slots_lock:
+                slot = self._slots.setdefault(key, _Slot())
+        return slot
+
+    def _load_into(self, slot: _Slot, key: Path, fingerprint: str) -> None:
+        started = time.perf_counter()
+        model = self._loader(key)
+        took = time.perf_counter() - started
+
+        version = str(model.version or model.meta.get("trained_at") or fingerprint[:12])
+        loaded = LoadedModel(
+            model=model,
+            model_dir=key,
+            version=version,
+            fingerprint=fingerprint,
+            loaded_at=time.time(),
+            load_seconds=took,
+            nbytes=model.nbytes(),
+        )
+        # atomic swap: readers see either the old or the new LoadedModel
+        old_version = slot.current.version if slot.current is not None else None
+        slot.current = loaded
+        slot.checked_at = time.monotonic()
+        slot.last_error = None
+
+        for cb in list(self._listeners):
+            try:
+                cb(key, old_version, version)
+            except Exception:
+                # a broken listener must not break model loading
+                pass
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    return _registry
+
+
+def get_model(model_dir: str | Path) -> LoadedModel:
+    return _registry.get(model_dir)
@@ -3,34 +3,78 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 
-from inference.recommendation_logic import IBCFRecommender
-from inference.schemas import RecommendResponse, RecItem
+from inference.model_registry import get_model
+from inference.schemas import Contribution, RecommendResponse, RecItem
 
 
 DEFAULT_REC_MODEL_DIR = Path("models/recommendation/latest")
 
 
-def recommend(user_id: str, k: int = 10, model_dir: str | Path = DEFAULT_REC_MODEL_DIR) -> RecommendResponse:
-    model = IBCFRecommender.load(model_dir)
-    recs = model.recommend(user_id=user_id, k=k)
+def recommend(
+    user_id: str,
+    k: int = 10,
+    model_dir: str | Path = DEFAULT_REC_MODEL_DIR,
+    explain: bool = True,
+) -> RecommendResponse:
+    loaded = get_model(model_dir)
+    recs = loaded.model.recommend(user_id=user_id, k=k, explain=explain)
     return RecommendResponse(
         user_id=user_id,
-        results=[RecItem(item_id=r.item_id, score=r.score, explanation=r.explanation) for r in recs],
+        results=[_rec_item(r) for r in recs],
+        model_version=loaded.version,
     )
 
 
+def recommend_many(
+    user_ids: Iterable[str],
+    k: int = 10,
+    model_dir: str | Path = DEFAULT_REC_MODEL_DIR,
+    explain: bool = True,
+    batch_size: int = 256,
+) -> Iterator[RecommendResponse]:
+    """
+    Yields one RecommendResponse per user id, in input order. Users are scored
+    `batch_size` at a time with model.recommend_batch (one matrix product per
+    chunk), and the model is pinned for the whole run so every answer comes
+    from the same version. Lazy: nothing is scored until the first item is read.
+    """
+    loaded = get_model(model_dir)
+    chunk: List[str] = []
+    for u in user_ids:
+        chunk.append(str(u))
+        if len(chunk) >= batch_size:
+            yield from _score_chunk(loaded, chunk, k, explain, batch_size)
+            chunk = []
+    if chunk:
+        yield from _score_chunk(loaded, chunk, k, explain, batch_size)
+
+
+def _score_chunk(loaded, chunk: List[str], k: int, explain: bool, batch_size: int) -> Iterator[RecommendResponse]:
+    recs = loaded.model.recommend_batch(chunk, k=k, batch_size=batch_size, explain=explain)
+    for u in chunk:
+        yield RecommendResponse(user_id=u, results=[_rec_item(r) for r in recs[u]], model_version=loaded.version)
+
+
+def _rec_item(r) -> RecItem:
+    because = None
+    if r.because is not None:
+        because = [Contribution(item_id=c.item_id, weight=c.weight) for c in r.because]
+    return RecItem(item_id=r.item_id, score=r.score, explanation=r.explanation, because=because)
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--task", default="recommend", choices=["recommend"])
     ap.add_argument("--user", required=True)
     ap.add_argument("--k", type=int, default=10)
     ap.add_argument("--model", default=str(DEFAULT_REC_MODEL_DIR))
+    ap.add_argument("--no-explain", action="store_true", help="Skip explanations")
     args = ap.parse_args()
 
     if args.task == "recommend":
-        out = recommend(args.user, args.k, args.model)
+        out = recommend(args.user, args.k, args.model, explain=not args.no_explain)
         print(out.model_dump_json(indent=2))
 
 
@@ -2,20 +2,325 @@
 from __future__ import annotations
 
 import json
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 
+from inference.artifacts import add_arrays, open_array, read_manifest, write_array, write_manifest
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first. Uses argpartition so only the
+    k candidates get sorted; ties are broken by item index. Items scored
+    -inf (already rated) are never returned, so the list can be shorter than k.
+    """
+    n = scores.shape[0]
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        cand = np.argpartition(-scores, k - 1)[:k]
+        # argpartition may cut a tie group in half; take the whole group at the boundary
+        kth = scores[cand].min()
+        cand = np.flatnonzero(scores >= kth)
+    else:
+        cand = np.arange(n)
+    order = np.lexsort((cand, -scores[cand]))
+    top = cand[order][:k]
+    return top[scores[top] > -np.inf]
+
+
+def _dense(x) -> np.ndarray:
+    """Sparse or dense (maybe memory-mapped) block -> plain float32 ndarray."""
+    if sparse.issparse(x):
+        return x.toarray().astype(np.float32, copy=False)
+    return np.asarray(x, dtype=np.float32)
+
+
+def _csr_nbytes(m: sparse.csr_matrix) -> int:
+    return int(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes)
+
+
+def shrink_similarity(S: np.ndarray, support: np.ndarray, shrinkage: float = 0.0, min_support: int = 1) -> np.ndarray:
+    """
+    Damps similarities backed by few co-ratings (in place on a dense block):
+        s'_ij = s_ij * n_ij / (n_ij + shrinkage)
+    and drops them entirely where n_ij < min_support.
+    n_ij = number of users who rated both items.
+    """
+    if shrinkage > 0:
+        S *= (support / (support + np.float32(shrinkage))).astype(S.dtype, copy=False)
+    if min_support > 1:
+        S[support < min_support] = 0.0
+    return S
+
+
+def topn_cosine(
+    R_norm: sparse.csr_matrix,
+    n_neighbors: int,
+    chunk_size: Optional[int] = None,
+    support: Optional[sparse.csr_matrix] = None,
+    shrinkage: float = 0.0,
+    min_support: int = 1,
+) -> sparse.csr_matrix:
+    """
+    Item-item cosine similarity on the columns of a sparse users x items
+    matrix, keeping only the `n_neighbors` most similar items per row.
+
+    Rows are computed `chunk_size` items at a time, so peak memory is
+    O(chunk_size x n_items) instead of O(n_items^2). The default chunk keeps
+    each dense block around 1M cells. The diagonal is zeroed like the dense
+    model does.
+
+    support (binary users x items "has rated") enables shrinkage/min_support,
+    applied per block before the top-N cut.
+    """
+    n_items = R_norm.shape[1]
+    if chunk_size is None:
+        chunk_size = max(16, (1 << 20) // max(n_items, 1))
+    X = sparse.csc_matrix(R_norm, dtype=np.float32)
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel())
+    inv = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0).astype(np.float32)
+    X = X @ sparse.diags(inv)                       # unit-length item columns
+    XT = X.T.tocsr()                                # items x users
+    if support is not None:
+        B = sparse.csc_matrix(support, dtype=np.float32)
+        BT = B.T.tocsr()
+
+    n_keep = min(int(n_neighbors), n_items)
+    data_parts, index_parts, counts = [], [], []
+    for a in range(0, n_items, chunk_size):
+        b = min(a + chunk_size, n_items)
+        block = (XT[a:b] @ X).toarray()             # (b-a) x items
+        block[np.arange(b - a), np.arange(a, b)] = 0.0
+        if support is not None:
+            shrink_similarity(block, (BT[a:b] @ B).toarray(), shrinkage, min_support)
+
+        if n_keep <= 0:
+            idx = np.zeros((b - a, 0), dtype=np.int64)
+        elif n_keep < n_items:
+            idx = np.argpartition(-block, n_keep - 1, axis=1)[:, :n_keep]
+        else:
+            idx = np.tile(np.arange(n_items), (b - a, 1))
+        vals = np.take_along_axis(block, idx, axis=1)
+
+        keep = vals != 0
+        counts.append(keep.sum(axis=1))
+        index_parts.append(idx[keep])
+        data_parts.append(vals[keep])
+
+    indptr = np.concatenate([[0], np.cumsum(np.concatenate(counts) if counts else [])]).astype(np.int64)
+    indices = np.concatenate(index_parts) if index_parts else np.empty(0, dtype=np.int64)
+    data = np.concatenate(data_parts) if data_parts else np.empty(0, dtype=np.float32)
+
+    sim = sparse.csr_matrix(
+        (data.astype(np.float32), indices.astype(np.int32), indptr.astype(np.int32)),
+        shape=(n_items, n_items),
+    )
+    sim.sort_indices()
+    return sim
+
+
+DUPLICATE_REDUCTIONS = ("last", "mean", "max")
+NORMALIZATIONS = ("user_mean", "none")
+
+
+@dataclass
+class RatingMatrix:
+    """Users x items ratings in coordinate form; ids sorted, one entry per (user, item)."""
+    user_ids: List[str]
+    item_ids: List[str]
+    rows: np.ndarray    # int64 user positions
+    cols: np.ndarray    # int64 item positions
+    vals: np.ndarray    # float32 ratings
+    counts: Optional[np.ndarray] = None    # int64 input rows reduced into each entry
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.user_ids), len(self.item_ids)
+
+    def dense(self) -> np.ndarray:
+        R = np.zeros(self.shape, dtype=np.float32)
+        R[self.rows, self.cols] = self.vals
+        return R
+
+    def csr(self) -> sparse.csr_matrix:
+        return sparse.csr_matrix((self.vals, (self.rows, self.cols)), shape=self.shape, dtype=np.float32)
+
+
+def factorize_ids(col: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Id column -> (int64 codes, sorted unique ids as str). Categorical columns
+    (e.g. from training.dataset_loader) are remapped through their categories,
+    so no per-row string objects are created.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.cat.remove_unused_categories()
+        cats = np.asarray(col.cat.categories.astype(str))
+        order = np.argsort(cats, kind="stable")
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        return remap[col.cat.codes.to_numpy()], cats[order]
+    codes, uniques = pd.factorize(col.astype(str), sort=True)
+    return codes.astype(np.int64), np.asarray(uniques)
+
+
+def id_positions(col: pd.Series, ids: Sequence[str]) -> np.ndarray:
+    """Positions of the column's ids in `ids` (-1 where unknown)."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        lookup = pd.Index(ids).get_indexer(col.cat.categories.astype(str))
+        return lookup[col.cat.codes.to_numpy()]
+    return pd.Index(ids).get_indexer(col.astype(str))
+
+
+def build_rating_matrix(ratings: pd.DataFrame, duplicates: str = "last") -> RatingMatrix:
+    """
+    Vectorized ingestion: factorizes user/item ids into sorted integer codes
+    and reduces repeated (user, item) ratings in one pass.
+
+    duplicates:
+      - "last": the last row in the frame wins
+      - "mean": average of the repeated ratings
+      - "max":  highest of the repeated ratings
+    """
+    if duplicates not in DUPLICATE_REDUCTIONS:
+        raise ValueError(f"duplicates must be one of {DUPLICATE_REDUCTIONS}, got {duplicates!r}")
+
+    u_codes, u_ids = factorize_ids(ratings["user_id"])
+    i_codes, i_ids = factorize_ids(ratings["item_id"])
+    vals = ratings["rating"].to_numpy(dtype=np.float32)
+
+    n_items = max(len(i_ids), 1)
+    key = u_codes.astype(np.int64) * n_items + i_codes.astype(np.int64)
+
+    if duplicates == "last":
+        # unique on the reversed keys -> first hit is the last occurrence
+        uniq, rev_idx, counts = np.unique(key[::-1], return_index=True, return_counts=True)
+        out_vals = vals[::-1][rev_idx]
+    else:
+        uniq, inv = np.unique(key, return_inverse=True)
+        counts = np.bincount(inv)
+        if duplicates == "mean":
+            out_vals = np.bincount(inv, weights=vals) / counts
+        else:
+            out_vals = np.full(len(uniq), -np.inf)
+            np.maximum.at(out_vals, inv, vals)
+
+    return RatingMatrix(
+        user_ids=[str(u) for u in u_ids],
+        item_ids=[str(it) for it in i_ids],
+        rows=(uniq // n_items).astype(np.int64),
+        cols=(uniq % n_items).astype(np.int64),
+        vals=np.asarray(out_vals, dtype=np.float32),
+        counts=counts.astype(np.int64),
+    )
+
+
+def _resize_csr(m: sparse.csr_matrix, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """Grows a CSR matrix with empty rows/columns at the end."""
+    indptr = np.concatenate([m.indptr, np.full(shape[0] - m.shape[0], m.indptr[-1], dtype=m.indptr.dtype)])
+    return sparse.csr_matrix((m.data, m.indices, indptr), shape=shape)
+
+
+def _replace_rows(m: sparse.csr_matrix, rows: np.ndarray, values: np.ndarray, present: np.ndarray) -> sparse.csr_matrix:
+    """New CSR with `rows` replaced by the dense `values` where `present` is set."""
+    coo = m.tocoo()
+    keep = ~np.isin(coo.row, rows)
+    r, c = np.nonzero(present)
+    return sparse.csr_matrix(
+        (
+            np.concatenate([coo.data[keep], values[r, c].astype(np.float32)]),
+            (np.concatenate([coo.row[keep], rows[r]]), np.concatenate([coo.col[keep], c])),
+        ),
+        shape=m.shape,
+        dtype=np.float32,
+    )
+
+
+def _prune_topn(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, shape: Tuple[int, int], n_neighbors: int) -> sparse.csr_matrix:
+    """COO triplets -> CSR keeping the `n_neighbors` largest values per row."""
+    nz = vals != 0
+    rows, cols, vals = rows[nz], cols[nz], vals[nz]
+    order = np.lexsort((-vals, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+    keep = rank < n_neighbors
+    m = sparse.csr_matrix((vals[keep].astype(np.float32), (rows[keep], cols[keep])), shape=shape)
+    m.sort_indices()
+    return m
+
+
+DEFAULT_POPULARITY_HALF_LIFE_S = 30 * 24 * 3600.0
+
+
+def recency_weights(timestamps: np.ndarray, ref_time: float, half_life_s: float) -> np.ndarray:
+    """exp decay: a rating `half_life_s` older than ref_time counts half."""
+    age = np.maximum(ref_time - timestamps.astype(np.float64), 0.0)
+    return np.exp2(-age / half_life_s)
+
+
+class IdIndex(Mapping[str, int]):
+    """
+    Read-only id -> position lookup over a numpy string array.
+
+    `keys` is the sorted id array and `pos` the position of each key in the
+    original order, so a lookup is one searchsorted (O(log n)) and loading a
+    model never has to build a Python dict of every id.
+    """
+
+    def __init__(self, keys: np.ndarray, pos: np.ndarray):
+        self.keys = keys
+        self.pos = pos
+
+    @classmethod
+    def from_ids(cls, ids: Sequence[str]) -> "IdIndex":
+        arr = np.asarray(list(ids), dtype=np.str_)
+        order = np.argsort(arr, kind="stable").astype(np.int64)
+        return cls(arr[order], order)
+
+    def _find(self, key: object) -> int:
+        if not isinstance(key, str) or len(self.keys) == 0:
+            return -1
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.pos[i])
+        return -1
+
+    def __getitem__(self, key: str) -> int:
+        j = self._find(key)
+        if j < 0:
+            raise KeyError(key)
+        return j
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(k) for k in self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+@dataclass
+class Contribution:
+    item_id: str        # a rated item behind the recommendation
+    weight: float       # its similarity to the recommended item
+
 
 @dataclass
 class RecResult:
     item_id: str
     score: float
     explanation: Optional[str] = None
+    because: Optional[List[Contribution]] = None
 
 
 class IBCFRecommender:
@@ -23,141 +328,799 @@ class IBCFRecommender:
     Item-Based Collaborative Filtering (cosine similarity)
     with per-user mean normalization:
         r'_{u,i} = r_{u,i} - mean_u
+
+    n_neighbors=None keeps the full dense item x item matrix.
+    n_neighbors=N trains on a sparse ratings matrix and keeps only the top-N
+    neighbors per item (CSR); scoring then works on those neighbor lists.
+
+    duplicates picks how repeated (user, item) ratings are reduced: "last", "mean" or "max".
+
+    Tuning knobs (defaults reproduce the plain model):
+      - shrinkage: s_ij * n_ij / (n_ij + shrinkage), n_ij = users who rated both items
+      - min_support: similarities backed by fewer co-ratings are dropped
+      - normalization: "user_mean" (r - mean_u) or "none" (raw ratings)
     """
 
-    def __init__(self):
-        self.item_ids: List[str] = []
-        self.user_ids: List[str] = []
-        self.item_index: Dict[str, int] = {}
-        self.user_index: Dict[str, int] = {}
+    def __init__(
+        self,
+        n_neighbors: Optional[int] = None,
+        duplicates: str = "last",
+        popularity_half_life_s: float = DEFAULT_POPULARITY_HALF_LIFE_S,
+        shrinkage: float = 0.0,
+        min_support: int = 1,
+        normalization: str = "user_mean",
+    ):
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"normalization must be one of {NORMALIZATIONS}, got {normalization!r}")
+        self.n_neighbors = n_neighbors
+        self.duplicates = duplicates            # how repeated (user, item) ratings are reduced
+        self.shrinkage = float(shrinkage)
+        self.min_support = int(min_support)
+        self.normalization = normalization
+        self.fit_timings: Dict[str, float] = {}
+        # ids are lists after fit, numpy string arrays after load
+        self.item_ids: Sequence[str] = []
+        self.user_ids: Sequence[str] = []
+        self.item_index: Mapping[str, int] = {}
+        self.user_index: Mapping[str, int] = {}
         self.user_mean: np.ndarray | None = None
+        self.ratings: sparse.csr_matrix | None = None   # raw user x item ratings (for partial_fit/compact)
+        # duplicates="mean" only: how many ratings each mean in `ratings` is over, so partial_fit can extend it
+        self.rating_counts: sparse.csr_matrix | None = None
+        self.pending_updates: int = 0               # ratings applied by partial_fit since the last fit/compact
+
+        # dense ndarrays, or CSR matrices when n_neighbors is set
+        self.sim: np.ndarray | sparse.csr_matrix | None = None      # item-item similarity
+        self.r_norm: np.ndarray | sparse.csr_matrix | None = None   # user x item normalized ratings
+        self._abs_sim: sparse.csr_matrix | None = None
+        self._item_norm: np.ndarray | None = None
 
-        self.sim: np.ndarray | None = None          # item-item similarity
-        self.r_norm: np.ndarray | None = None       # user x item normalized ratings
+        # precomputed per-user top-K (see precompute_topk); row = user position, -1 = padding
+        self.topk_items: np.ndarray | None = None       # users x K item positions
+        self.topk_scores: np.ndarray | None = None      # users x K scores
+        self.topk_because: np.ndarray | None = None     # users x K x 2 explanation item positions
+
+        # cold start index, built at training time: item positions ranked by recency-weighted popularity
+        self.popularity_half_life_s = popularity_half_life_s
+        self.popularity_ref_time: float = 0.0
+        self.item_count: np.ndarray | None = None       # ratings per item
+        self.item_popularity: np.ndarray | None = None  # recency-weighted rating count per item
+        self.popular_items: np.ndarray | None = None    # item positions, most popular first
         self.items_title: Dict[str, str] = {}       # optional
+        self.meta: dict = {}                        # training metadata
+        self.version: Optional[str] = None          # artifact version (from manifest.json)
 
     def fit(self, ratings: pd.DataFrame, items: Optional[pd.DataFrame] = None) -> None:
-        # ids
-        self.user_ids = sorted(ratings["user_id"].astype(str).unique().tolist())
-        self.item_ids = sorted(ratings["item_id"].astype(str).unique().tolist())
+        t0 = time.perf_counter()
+        rm = build_rating_matrix(ratings, duplicates=self.duplicates)
+        self.user_ids = rm.user_ids
+        self.item_ids = rm.item_ids
         self.user_index = {u: i for i, u in enumerate(self.user_ids)}
         self.item_index = {it: j for j, it in enumerate(self.item_ids)}
+        t1 = time.perf_counter()
+
+        self._fit_popularity(ratings)
 
+        # user mean over the user's ratings (avoid div by 0)
         n_users = len(self.user_ids)
-        n_items = len(self.item_ids)
+        cnt = np.bincount(rm.rows, minlength=n_users).astype(np.float32)
+        sums = np.bincount(rm.rows, weights=rm.vals, minlength=n_users).astype(np.float32)
+        self.user_mean = (sums / np.maximum(cnt, 1.0)).reshape(-1, 1).astype(np.float32)
+        self.ratings = rm.csr()
+        self.rating_counts = self._counts_csr(rm) if self.duplicates == "mean" else None
 
-        # rating matrix
-        R = np.zeros((n_users, n_items), dtype=np.float32)
-        cnt = np.zeros((n_users, 1), dtype=np.float32)
-
-        for row in ratings.itertuples(index=False):
-            u = str(row.user_id)
-            it = str(row.item_id)
-            r = float(row.rating)
-            ui = self.user_index[u]
-            ij = self.item_index[it]
-            R[ui, ij] = r
-            cnt[ui, 0] += 1.0
-
-        # user mean (avoid div by 0)
-        sums = R.sum(axis=1, keepdims=True)
-        denom = np.maximum(cnt, 1.0)
-        self.user_mean = (sums / denom).astype(np.float32)
-
-        # normalize only where rating exists
-        mask = (R > 0).astype(np.float32)
-        R_norm = (R - self.user_mean) * mask
-        self.r_norm = R_norm
+        norm_vals = self._normalize(rm.vals, self.user_mean[rm.rows, 0])
+        normed = RatingMatrix(rm.user_ids, rm.item_ids, rm.rows, rm.cols, norm_vals)
+        t2 = time.perf_counter()
 
         # item vectors = columns (users x items)
         # similarity between item columns
-        self.sim = cosine_similarity(R_norm.T)
-        np.fill_diagonal(self.sim, 0.0)
+        self._abs_sim = None
+        self._item_norm = None
+        self.pending_updates = 0
+        self._drop_topk()
+        if self.n_neighbors:
+            R_norm = normed.csr()
+            R_norm.eliminate_zeros()
+            self.r_norm = R_norm
+        else:
+            self.r_norm = normed.dense()
+        self.sim = self._full_similarity()
+        t3 = time.perf_counter()
 
         if items is not None:
             # items: item_id, title
             self.items_title = {str(r.item_id): str(r.title) for r in items.itertuples(index=False)}
 
-    def recommend(self, user_id: str, k: int = 10) -> List[RecResult]:
+        self.fit_timings = {
+            "ingest_s": round(t1 - t0, 4),
+            "normalize_s": round(t2 - t1, 4),
+            "similarity_s": round(t3 - t2, 4),
+        }
+
+    def _first_ratings(self, ratings: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (user positions, item positions, timestamps) with one entry per
+        (user, item) pair: its earliest rating. Popularity counts pairs, not
+        rows, so re-rating an item doesn't make it more popular.
+        """
+        users = id_positions(ratings["user_id"], self.user_ids).astype(np.int64)
+        items = id_positions(ratings["item_id"], self.item_ids).astype(np.int64)
+        ts = self._timestamps(ratings)
+        key = users * max(len(self.item_ids), 1) + items
+        order = np.lexsort((ts, key))
+        _, first = np.unique(key[order], return_index=True)
+        pick = order[first]
+        return users[pick], items[pick], ts[pick]
+
+    def _fit_popularity(self, ratings: pd.DataFrame) -> None:
+        _, codes, ts = self._first_ratings(ratings)
+        self.popularity_ref_time = float(ts.max()) if len(ts) else 0.0
+
+        n_items = len(self.item_ids)
+        self.item_count = np.bincount(codes, minlength=n_items).astype(np.float32)
+        w = recency_weights(ts, self.popularity_ref_time, self.popularity_half_life_s)
+        self.item_popularity = np.bincount(codes, weights=w, minlength=n_items).astype(np.float32)
+        self._rank_popularity()
+
+    def _update_popularity(self, codes: np.ndarray, ts: np.ndarray) -> None:
+        """Adds the first ratings of (user, item) pairs the model didn't have yet."""
+        n_items = len(self.item_ids)
+        count = np.zeros(n_items, dtype=np.float32)
+        pop = np.zeros(n_items, dtype=np.float32)
+        if self.item_count is not None:
+            count[:len(self.item_count)] = self.item_count
+            pop[:len(self.item_popularity)] = self.item_popularity
+
+        ref = max(self.popularity_ref_time, float(ts.max()) if len(ts) else 0.0)
+        # age the existing scores to the new reference time, then add the new ratings
+        pop *= np.float32(np.exp2(-(ref - self.popularity_ref_time) / self.popularity_half_life_s))
+        pop += np.bincount(codes, weights=recency_weights(ts, ref, self.popularity_half_life_s), minlength=n_items).astype(np.float32)
+        count += np.bincount(codes, minlength=n_items).astype(np.float32)
+
+        self.item_count, self.item_popularity, self.popularity_ref_time = count, pop, ref
+        self._rank_popularity()
+
+    def _rank_popularity(self) -> None:
+        # most popular first; ties -> more ratings, then item position
+        n_items = len(self.item_popularity)
+        self.popular_items = np.lexsort((np.arange(n_items), -self.item_count, -self.item_popularity)).astype(np.int32)
+
+    @staticmethod
+    def _timestamps(ratings: pd.DataFrame) -> np.ndarray:
+        if "timestamp" not in ratings.columns:
+            return np.zeros(len(ratings), dtype=np.float64)
+        return pd.to_numeric(ratings["timestamp"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+    def partial_fit(self, new_ratings: pd.DataFrame) -> Dict[str, int]:
+        """
+        Applies new/changed ratings without a full refit. A rating for a
+        (user, item) pair the model already has is merged the way fit reduces
+        duplicates ("last" replaces it, "mean" and "max" combine them).
+
+        Only the touched users' means and normalized rows are recomputed, and
+        only the similarity rows/columns of items those users rated. Unknown
+        users and items are appended to the id indexes.
+
+        Dense models stay exact. Top-N models update the touched rows exactly,
+        but other rows can only pick up neighbors they already had or the
+        touched items, so they drift slightly until compact().
+
+        Mutates the model in place: run it on a private copy (e.g. the
+        update_recommendation job), not on a model that is serving requests.
+        """
         if self.sim is None or self.r_norm is None or self.user_mean is None:
             raise RuntimeError("Model not trained/loaded")
 
-        u = str(user_id)
-        if u not in self.user_index:
-            # cold start: return top popular-ish = items with highest total similarity sum (cheap fallback)
-            simsums = self.sim.sum(axis=1)
-            top_idx = np.argsort(-simsums)[:k]
-            return [RecResult(item_id=self.item_ids[j], score=float(simsums[j]), explanation="Cold start fallback.") for j in top_idx]
+        self._make_writable()
+        self._drop_topk()
+        rm = build_rating_matrix(new_ratings, duplicates=self.duplicates)
+        if len(rm.vals) == 0:
+            return {"ratings": 0, "new_users": 0, "new_items": 0, "users_touched": 0, "items_touched": 0}
 
-        ui = self.user_index[u]
-        user_vec = self.r_norm[ui]  # normalized ratings
+        new_users = self._append_ids(self.user_ids, self.user_index, rm.user_ids)
+        new_items = self._append_ids(self.item_ids, self.item_index, rm.item_ids)
+        self._grow(len(self.user_ids), len(self.item_ids))
 
-        rated_mask = (user_vec != 0)
-        scores = np.zeros(len(self.item_ids), dtype=np.float32)
+        urow = np.array([self.user_index[u] for u in rm.user_ids], dtype=np.int64)[rm.rows]
+        icol = np.array([self.item_index[it] for it in rm.item_ids], dtype=np.int64)[rm.cols]
+        users = np.unique(urow)
+        pos = np.searchsorted(users, urow)
+        b, n_items = len(users), len(self.item_ids)
 
-        # score(item j) = sum_{i rated} sim[j,i] * r_norm[u,i] / (sum |sim[j,i]| + eps)
-        eps = 1e-8
-        for j in range(len(self.item_ids)):
-            if rated_mask[j]:
-                scores[j] = -np.inf  # don't recommend already rated
-                continue
-            sims = self.sim[j]
-            numer = np.sum(sims[rated_mask] * user_vec[rated_mask])
-            denom = np.sum(np.abs(sims[rated_mask])) + eps
-            scores[j] = numer / denom
-
-        top = np.argsort(-scores)[:k]
-        results: List[RecResult] = []
-        for j in top:
-            it = self.item_ids[j]
-            expl = self._explain(u, it)
-            results.append(RecResult(item_id=it, score=float(scores[j]), explanation=expl))
+        # raw ratings of the touched users, with the new ones merged in
+        sub = self.ratings[users].tocoo()
+        raw = np.zeros((b, n_items), dtype=np.float64)
+        present = np.zeros((b, n_items), dtype=bool)
+        raw[sub.row, sub.col] = sub.data
+        present[sub.row, sub.col] = True
+        had = present[pos, icol]
+
+        # only pairs the model didn't have count towards popularity
+        fu, fi, fts = self._first_ratings(new_ratings)
+        is_new = ~present[np.searchsorted(users, fu), fi]
+        self._update_popularity(fi[is_new], fts[is_new])
+
+        # same reduction fit applies to repeated ratings, old ones included
+        if self.duplicates == "mean":
+            n = np.zeros((b, n_items), dtype=np.int64)
+            if self.rating_counts is not None:
+                csub = self.rating_counts[users].tocoo()
+                n[csub.row, csub.col] = csub.data
+            else:
+                # older artifacts don't say how many ratings a mean is over: assume one
+                n[present] = 1
+            n_old = np.where(had, n[pos, icol], 0)
+            raw[pos, icol] = (raw[pos, icol] * n_old + rm.vals.astype(np.float64) * rm.counts) / (n_old + rm.counts)
+            n[pos, icol] = n_old + rm.counts
+        elif self.duplicates == "max":
+            raw[pos, icol] = np.where(had, np.maximum(raw[pos, icol], rm.vals), rm.vals)
+        else:
+            raw[pos, icol] = rm.vals
+        present[pos, icol] = True
+
+        # same rules as fit: mean over all ratings, normalize where rating > 0
+        count = present.sum(axis=1)
+        mean = raw.sum(axis=1) / np.maximum(count, 1)
+        new_norm = self._normalize(raw, mean[:, None])
+        old_norm = _dense(self.r_norm[users])
+
+        self.user_mean[users, 0] = mean
+        self.ratings = _replace_rows(self.ratings, users, raw, present)
+        if self.duplicates == "mean":
+            self.rating_counts = _replace_rows(self._rating_counts(), users, n, present)
+        if sparse.issparse(self.r_norm):
+            self.r_norm = _replace_rows(self.r_norm, users, new_norm, new_norm != 0)
+        else:
+            self.r_norm[users] = new_norm
+
+        # every item these users rated moved (their mean shifted), so those columns change
+        touched = np.flatnonzero((old_norm != 0).any(axis=0) | (new_norm != 0).any(axis=0))
+        self._update_similarity(touched)
+
+        self.pending_updates += int(len(rm.vals))
+        return {
+            "ratings": int(len(rm.vals)),
+            "new_users": new_users,
+            "new_items": new_items,
+            "users_touched": int(b),
+            "items_touched": int(len(touched)),
+        }
+
+    def compact(self) -> None:
+        """
+        Rebuilds the similarity matrix from the current normalized ratings
+        (what fit would give). Run it periodically after partial_fit calls.
+        """
+        if self.r_norm is None:
+            raise RuntimeError("Model not trained/loaded")
+        self._make_writable()
+        self.sim = self._full_similarity()
+        self._abs_sim = None
+        self._item_norm = None
+        self.pending_updates = 0
+        self._drop_topk()
+
+    def _normalize(self, vals: np.ndarray, means: np.ndarray) -> np.ndarray:
+        # only where a rating exists (rating > 0)
+        centered = vals if self.normalization == "none" else vals - means
+        return np.where(vals > 0, centered, 0.0).astype(np.float32)
+
+    def _support(self) -> Optional[sparse.csr_matrix]:
+        """Binary users x items "has rated" matrix, or None when no knob needs co-rating counts."""
+        if self.shrinkage <= 0 and self.min_support <= 1:
+            return None
+        raw = sparse.csr_matrix(self._raw_ratings())
+        return sparse.csr_matrix((raw > 0).astype(np.float32))
+
+    def _full_similarity(self) -> np.ndarray | sparse.csr_matrix:
+        support = self._support()
+        if sparse.issparse(self.r_norm):
+            return topn_cosine(
+                self.r_norm, self.n_neighbors or self.r_norm.shape[1],
+                support=support, shrinkage=self.shrinkage, min_support=self.min_support,
+            )
+        sim = cosine_similarity(self.r_norm.T)
+        np.fill_diagonal(sim, 0.0)
+        if support is not None:
+            B = _dense(support)
+            shrink_similarity(sim, B.T @ B, self.shrinkage, self.min_support)
+        return sim
+
+    def _drop_topk(self) -> None:
+        # precomputed lists are only valid for the ratings/similarities they were built from
+        self.topk_items = self.topk_scores = self.topk_because = None
+
+    def _make_writable(self) -> None:
+        # loaded models are memory-mapped read-only with array ids; partial_fit needs plain copies
+        if sparse.issparse(self.sim):
+            self.sim = sparse.csr_matrix(self.sim, copy=True)
+        elif not self.sim.flags.writeable or isinstance(self.sim, np.memmap):
+            self.sim = np.array(self.sim)
+        if sparse.issparse(self.r_norm):
+            self.r_norm = sparse.csr_matrix(self.r_norm, copy=True)
+        elif not self.r_norm.flags.writeable or isinstance(self.r_norm, np.memmap):
+            self.r_norm = np.array(self.r_norm)
+        self.user_mean = np.array(self.user_mean, dtype=np.float32)
+
+        self.ratings = sparse.csr_matrix(self._raw_ratings(), copy=True)
+        if self.rating_counts is not None:
+            self.rating_counts = sparse.csr_matrix(self.rating_counts, copy=True)
+
+        if not isinstance(self.user_ids, list):
+            self.user_ids = [str(u) for u in self.user_ids]
+            self.user_index = {u: i for i, u in enumerate(self.user_ids)}
+        if not isinstance(self.item_ids, list):
+            self.item_ids = [str(it) for it in self.item_ids]
+            self.item_index = {it: j for j, it in enumerate(self.item_ids)}
+
+    @staticmethod
+    def _append_ids(ids: List[str], index: Dict[str, int], incoming: Sequence[str]) -> int:
+        added = 0
+        for x in incoming:
+            if x not in index:
+                index[x] = len(ids)
+                ids.append(x)
+                added += 1
+        return added
+
+    def _grow(self, n_users: int, n_items: int) -> None:
+        old_users, old_items = self.r_norm.shape
+        if (n_users, n_items) == (old_users, old_items):
+            return
+
+        if sparse.issparse(self.r_norm):
+            self.r_norm = _resize_csr(self.r_norm, (n_users, n_items))
+            self.sim = _resize_csr(self.sim, (n_items, n_items))
+        else:
+            r_norm = np.zeros((n_users, n_items), dtype=np.float32)
+            r_norm[:old_users, :old_items] = self.r_norm
+            self.r_norm = r_norm
+            sim = np.zeros((n_items, n_items), dtype=self.sim.dtype)
+            sim[:old_items, :old_items] = self.sim
+            self.sim = sim
+
+        self.ratings = _resize_csr(self.ratings, (n_users, n_items))
+        if self.rating_counts is not None:
+            self.rating_counts = _resize_csr(self.rating_counts, (n_users, n_items))
+        self.user_mean = np.concatenate([self.user_mean, np.zeros((n_users - old_users, 1), dtype=np.float32)])
+        if self._item_norm is not None:
+            self._item_norm = np.concatenate([self._item_norm, np.zeros(n_items - old_items)])
+
+    def _update_similarity(self, touched: np.ndarray) -> None:
+        """Recomputes cosine similarity between the `touched` item columns and all items."""
+        self._abs_sim = None
+        if len(touched) == 0:
+            return
+
+        if self._item_norm is None:
+            sq = self.r_norm.multiply(self.r_norm).sum(axis=0) if sparse.issparse(self.r_norm) else (self.r_norm.astype(np.float64) ** 2).sum(axis=0)
+            self._item_norm = np.sqrt(np.asarray(sq, dtype=np.float64).ravel())
+        cols = self.r_norm[:, touched]
+        self._item_norm[touched] = np.sqrt(np.asarray(_dense(cols).astype(np.float64) ** 2).sum(axis=0))
+
+        dots = _dense(cols.T @ self.r_norm).astype(np.float64)       # touched x items
+        norms = np.outer(self._item_norm[touched], self._item_norm)
+        S = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0).astype(np.float32)
+        S[np.arange(len(touched)), touched] = 0.0
+        support = self._support()
+        if support is not None:
+            shrink_similarity(S, _dense(support[:, touched].T @ support), self.shrinkage, self.min_support)
+
+        if not sparse.issparse(self.sim):
+            self.sim[touched, :] = S
+            self.sim[:, touched] = S.T
+            return
+
+        # top-N: touched rows are recomputed; other rows merge their kept
+        # neighbors with the fresh similarities to the touched items
+        n_items = self.sim.shape[0]
+        coo = self.sim.tocoo()
+        keep = ~np.isin(coo.row, touched) & ~np.isin(coo.col, touched)
+        t_rows, t_cols = np.nonzero(S)
+        other = ~np.isin(t_cols, touched)
+        self.sim = _prune_topn(
+            rows=np.concatenate([coo.row[keep], touched[t_rows], t_cols[other]]),
+            cols=np.concatenate([coo.col[keep], t_cols, touched[t_rows[other]]]),
+            vals=np.concatenate([coo.data[keep], S[t_rows, t_cols], S[t_rows[other], t_cols[other]]]),
+            shape=(n_items, n_items),
+            n_neighbors=self.n_neighbors or n_items,
+        )
+
+    def recommend(self, user_id: str, k: int = 10, explain: bool = True) -> List[RecResult]:
+        return self.recommend_batch([user_id], k=k, explain=explain)[str(user_id)]
+
+    def recommend_batch(
+        self,
+        user_ids: Sequence[str],
+        k: int = 10,
+        batch_size: int = 256,
+        explain: bool = True,
+    ) -> Dict[str, List[RecResult]]:
+        """
+        Scores many users at once. Known users are scored in chunks of
+        `batch_size` with one sim x ratings product per chunk; unknown users
+        get the cold start fallback. Returns {user_id: results}.
+
+        explain=False skips the explanation pass (explanation/because stay None).
+        """
+        if self.sim is None or self.r_norm is None or self.user_mean is None:
+            raise RuntimeError("Model not trained/loaded")
+
+        uids = [str(u) for u in user_ids]
+        out: Dict[str, List[RecResult]] = {}
+
+        cold = [u for u in uids if u not in self.user_index]
+        if cold:
+            cold_recs = self._cold_start(k, explain=explain)
+            for u in cold:
+                out[u] = list(cold_recs)
+
+        known = list(dict.fromkeys(u for u in uids if u in self.user_index))
+        if self.topk_items is not None and k <= self.topk_items.shape[1]:
+            for u in known:
+                out[u] = self._from_topk(self.user_index[u], k, explain=explain)
+            known = []
+
+        for start in range(0, len(known), batch_size):
+            chunk = known[start:start + batch_size]
+            uis = np.array([self.user_index[u] for u in chunk], dtype=np.int64)
+            U = _dense(self.r_norm[uis])
+            scores = self._score_users(uis, U)
+            for row, u in enumerate(chunk):
+                top = _top_k(scores[row], k)
+                because = weights = None
+                if explain:
+                    because, weights = self._contributors(U[row], top)
+                out[u] = self._results(top, scores[row, top], because, weights)
+
+        return {u: out[u] for u in uids}
+
+    def topk_arrays(self, user_ids: Sequence[str], k: int = 10, batch_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same ranking as recommend_batch, as arrays instead of result objects:
+        (len(user_ids) x k item positions, -1 padded; matching scores, -inf padded).
+        Meant for evaluation, where building RecResult lists is pure overhead.
+        """
+        if self.sim is None or self.r_norm is None or self.user_mean is None:
+            raise RuntimeError("Model not trained/loaded")
+
+        k = min(int(k), len(self.item_ids))
+        items = np.full((len(user_ids), k), -1, dtype=np.int32)
+        scores = np.full((len(user_ids), k), -np.inf, dtype=np.float32)
+        uis = np.array([self.user_index.get(str(u), -1) for u in user_ids], dtype=np.int64)
+
+        cold = np.flatnonzero(uis < 0)
+        if len(cold):
+            self._ensure_popularity()
+            pop = np.asarray(self.popular_items[:k])
+            items[cold, :len(pop)] = pop
+            scores[cold, :len(pop)] = np.asarray(self.item_popularity)[pop]
+
+        known = np.flatnonzero(uis >= 0)
+        if self.topk_items is not None and k <= self.topk_items.shape[1]:
+            items[known] = self.topk_items[uis[known], :k]
+            scores[known] = self.topk_scores[uis[known], :k]
+            return items, scores
+
+        for start in range(0, len(known), batch_size):
+            rows = known[start:start + batch_size]
+            block = self._score_users(uis[rows])
+            for row, r in enumerate(rows):
+                top = _top_k(block[row], k)
+                items[r, :len(top)] = top
+                scores[r, :len(top)] = block[row, top]
+        return items, scores
+
+    def precompute_topk(self, k: int = 50, batch_size: int = 256) -> None:
+        """
+        Batch stage: scores every known user once and keeps the top-k items,
+        their scores and the two rated items behind each explanation.
+        recommend()/recommend_batch() then answer any k <= this k by slicing.
+        """
+        if self.sim is None or self.r_norm is None:
+            raise RuntimeError("Model not trained/loaded")
+
+        n_users = len(self.user_ids)
+        k = min(int(k), len(self.item_ids))
+        items = np.full((n_users, k), -1, dtype=np.int32)
+        scores = np.full((n_users, k), -np.inf, dtype=np.float32)
+        because = np.full((n_users, k, 2), -1, dtype=np.int32)
+
+        for start in range(0, n_users, batch_size):
+            uis = np.arange(start, min(start + batch_size, n_users))
+            U = _dense(self.r_norm[uis])
+            block = self._score_users(uis, U)
+            for row, ui in enumerate(uis):
+                top = _top_k(block[row], k)
+                items[ui, :len(top)] = top
+                scores[ui, :len(top)] = block[row, top]
+                because[ui, :len(top)] = self._contributors(U[row], top)[0]
+
+        self.topk_items, self.topk_scores, self.topk_because = items, scores, because
+
+    def _contributors(self, user_vec: np.ndarray, items: np.ndarray, n: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For all `items` at once: the user's n rated items most similar to each
+        one, and those similarities. One (items x rated) slice of sim per call,
+        so a whole top-k list is explained in a single pass. -1 / 0.0 padded.
+        """
+        idx = np.full((len(items), n), -1, dtype=np.int32)
+        weights = np.zeros((len(items), n), dtype=np.float32)
+        rated_idx = np.flatnonzero(user_vec != 0)
+        if len(rated_idx) == 0 or len(items) == 0:
+            return idx, weights
+        block = _dense(self.sim[items])[:, rated_idx]
+        order = np.argsort(-block, axis=1, kind="stable")[:, :n]
+        idx[:, :order.shape[1]] = rated_idx[order]
+        weights[:, :order.shape[1]] = np.take_along_axis(block, order, axis=1)
+        return idx, weights
+
+    def _pair_weights(self, items: np.ndarray, because: np.ndarray) -> np.ndarray:
+        """sim[item, because] for stored explanation positions (0.0 where padded)."""
+        rows = np.repeat(items, because.shape[1])
+        cols = because.ravel()
+        valid = cols >= 0
+        w = np.zeros(len(cols), dtype=np.float32)
+        if valid.any():
+            w[valid] = np.asarray(self.sim[rows[valid], cols[valid]], dtype=np.float32).ravel()
+        return w.reshape(because.shape)
+
+    def _from_topk(self, ui: int, k: int, explain: bool = True) -> List[RecResult]:
+        items = np.asarray(self.topk_items[ui, :k])
+        n = int(np.count_nonzero(items >= 0))
+        items = items[:n]
+        because = weights = None
+        if explain:
+            because = np.asarray(self.topk_because[ui, :n])
+            weights = self._pair_weights(items, because)
+        return self._results(items, self.topk_scores[ui, :n], because, weights)
+
+    def _results(
+        self,
+        items: np.ndarray,
+        scores: np.ndarray,
+        because: Optional[np.ndarray],
+        weights: Optional[np.ndarray],
+    ) -> List[RecResult]:
+        if because is None:
+            return [RecResult(item_id=str(self.item_ids[j]), score=float(s)) for j, s in zip(items, scores)]
+        results = []
+        for j, s, b, w in zip(items, scores, because, weights):
+            contribs = [Contribution(item_id=str(self.item_ids[t]), weight=float(x)) for t, x in zip(b, w) if t >= 0]
+            results.append(RecResult(item_id=str(self.item_ids[j]), score=float(s), explanation=self._render_because(contribs), because=contribs))
         return results
 
-    def _explain(self, user_id: str, item_id: str) -> str:
-        # simple explanation: top 2 similar-to-rated items
-        ui = self.user_index.get(user_id)
-        ij = self.item_index.get(item_id)
-        if ui is None or ij is None:
+    def _render_because(self, contribs: List[Contribution]) -> str:
+        if not contribs:
             return "Recommended based on similar items."
+        reasons = [self.items_title.get(c.item_id, c.item_id) for c in contribs]
+        return f"Because you liked items similar to: {', '.join(reasons)}."
 
-        user_vec = self.r_norm[ui]
-        rated_idx = np.where(user_vec != 0)[0]
-        if len(rated_idx) == 0:
-            return "Recommended based on similar items."
+    def save_topk(self, out_dir: str | Path) -> None:
+        """Adds the precomputed top-k arrays to an already saved model dir."""
+        p = Path(out_dir)
+        manifest = add_arrays(p, self._write_topk(p))
+        self.version = manifest["version"]
 
-        sims = self.sim[ij, rated_idx]
-        top2 = rated_idx[np.argsort(-sims)[:2]]
+    def _write_topk(self, p: Path) -> Dict[str, dict]:
+        if self.topk_items is None:
+            return {}
+        return {
+            "topk_items": write_array(p, "topk_items", self.topk_items),
+            "topk_scores": write_array(p, "topk_scores", self.topk_scores),
+            "topk_because": write_array(p, "topk_because", self.topk_because),
+        }
 
-        def title(xid: str) -> str:
-            return self.items_title.get(xid, xid)
+    def _cold_start(self, k: int, explain: bool = True) -> List[RecResult]:
+        """
+        Unknown users get the most popular items from the training-time
+        popularity index: O(k) per request.
+        """
+        self._ensure_popularity()
+        explanation = "Cold start fallback." if explain else None
+        return [
+            RecResult(item_id=str(self.item_ids[j]), score=float(self.item_popularity[j]), explanation=explanation)
+            for j in self.popular_items[:k]
+        ]
 
-        reasons = [title(self.item_ids[t]) for t in top2]
-        return f"Because you liked items similar to: {', '.join(reasons)}."
+    def _ensure_popularity(self) -> None:
+        if self.popular_items is None:
+            # older artifacts: rank once by similarity sums (the old heuristic) and keep it
+            simsums = np.asarray(self.sim.sum(axis=1), dtype=np.float32).ravel()
+            self.item_popularity = simsums
+            self.popular_items = np.argsort(-simsums, kind="stable").astype(np.int32)
+
+    def _score_users(self, uis: np.ndarray, U: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        score(item j) = sum_{i rated} sim[j,i] * r_norm[u,i] / (sum |sim[j,i]| + eps)
+        for every user row in `uis` (batch x items). Already rated items get -inf.
+
+        Only the columns rated by someone in the batch contribute, so the
+        dense similarity matrix is sliced to those before the products. A
+        sparse top-N model multiplies its neighbor lists directly.
+        """
+        # float32 on purpose: same precision as the stored matrices, so eps and ties behave as before
+        eps = np.float32(1e-8)
+        if U is None:
+            U = _dense(self.r_norm[uis])                        # batch x items
+        rated = (U != 0)
+
+        if sparse.issparse(self.sim):
+            if self._abs_sim is None:
+                self._abs_sim = abs(self.sim)
+            numer = np.asarray(self.sim @ U.T).T
+            denom = np.asarray(self._abs_sim @ rated.T.astype(np.float32)).T + eps
+            scores = (numer / denom).astype(np.float32)
+            scores[rated] = -np.inf
+            return scores
+
+        cols = np.flatnonzero(rated.any(axis=0))
+
+        S = np.asarray(self.sim[:, cols], dtype=np.float32)     # items x rated-cols
+        numer = U[:, cols] @ S.T
+        denom = rated[:, cols].astype(np.float32) @ np.abs(S).T + eps
+
+        scores = numer / denom
+        scores[rated] = -np.inf  # don't recommend already rated
+        return scores
+
+    def nbytes(self) -> int:
+        """Approximate footprint of the numeric artifacts (mapped bytes when memory-mapped)."""
+        total = 0
+        for a in (self.sim, self.r_norm, self.user_mean, self.topk_items, self.topk_scores, self.topk_because, self.popular_items):
+            if a is None:
+                continue
+            total += _csr_nbytes(a) if sparse.issparse(a) else a.nbytes
+        return int(total)
+
+    @staticmethod
+    def _counts_csr(rm: RatingMatrix) -> sparse.csr_matrix:
+        return sparse.csr_matrix((rm.counts.astype(np.float32), (rm.rows, rm.cols)), shape=rm.shape, dtype=np.float32)
+
+    def _rating_counts(self) -> sparse.csr_matrix:
+        if self.rating_counts is not None:
+            return self.rating_counts
+        # models fitted before counts were kept: one rating behind every stored one
+        r = sparse.csr_matrix(self._raw_ratings())
+        return sparse.csr_matrix((np.ones(len(r.data), dtype=np.float32), r.indices, r.indptr), shape=r.shape)
+
+    def _raw_ratings(self) -> sparse.csr_matrix:
+        if self.ratings is not None:
+            return self.ratings
+        # older artifacts have no raw ratings: best guess is r_norm + mean where r_norm != 0
+        coo = sparse.coo_matrix(self.r_norm)
+        nz = coo.data != 0
+        vals = coo.data[nz] + np.asarray(self.user_mean)[coo.row[nz], 0]
+        return sparse.csr_matrix((vals.astype(np.float32), (coo.row[nz], coo.col[nz])), shape=self.r_norm.shape)
 
     def save(self, out_dir: str | Path, meta: Optional[dict] = None) -> None:
+        """
+        Writes the model in the versioned artifact format (see inference/artifacts.py):
+        one .npy per array, a binary id index, and manifest.json written last.
+        """
         p = Path(out_dir)
         p.mkdir(parents=True, exist_ok=True)
+        if meta is not None:
+            self.meta = dict(meta)
 
-        # np artifacts
-        np.save(p / "sim.npy", self.sim)
-        np.save(p / "r_norm.npy", self.r_norm)
-        np.save(p / "user_mean.npy", self.user_mean)
-
-        # json artifacts
-        payload = {
-            "user_ids": self.user_ids,
-            "item_ids": self.item_ids,
-            "items_title": self.items_title,
-            "meta": meta or {},
-        }
-        with (p / "model.json").open("w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        users = IdIndex.from_ids([str(u) for u in self.user_ids])
+        items = IdIndex.from_ids([str(it) for it in self.item_ids])
+
+        arrays = {}
+        for name in ("sim", "r_norm", "ratings", "rating_counts"):
+            m = self._raw_ratings() if name == "ratings" else getattr(self, name)
+            if m is None:
+                continue
+            if sparse.issparse(m):
+                m = sparse.csr_matrix(m)
+                arrays[f"{name}_data"] = write_array(p, f"{name}_data", m.data)
+                arrays[f"{name}_indices"] = write_array(p, f"{name}_indices", m.indices)
+                arrays[f"{name}_indptr"] = write_array(p, f"{name}_indptr", m.indptr)
+            else:
+                arrays[name] = write_array(p, name, m)
+
+        arrays.update({
+            "user_mean": write_array(p, "user_mean", self.user_mean),
+            "user_ids": write_array(p, "user_ids", np.asarray([str(u) for u in self.user_ids], dtype=np.str_)),
+            "item_ids": write_array(p, "item_ids", np.asarray([str(it) for it in self.item_ids], dtype=np.str_)),
+            "user_keys": write_array(p, "user_keys", users.keys),
+            "user_pos": write_array(p, "user_pos", users.pos),
+            "item_keys": write_array(p, "item_keys", items.keys),
+            "item_pos": write_array(p, "item_pos", items.pos),
+        })
+        arrays.update(self._write_topk(p))
+        if self.item_count is not None:
+            arrays["item_count"] = write_array(p, "item_count", self.item_count)
+            arrays["item_popularity"] = write_array(p, "item_popularity", self.item_popularity)
+            arrays["popular_items"] = write_array(p, "popular_items", self.popular_items)
+        manifest = write_manifest(
+            p,
+            arrays,
+            extra={
+                "model_type": "ibcf-topn" if sparse.issparse(self.sim) else "ibcf",
+                "n_neighbors": self.n_neighbors,
+                "duplicates": self.duplicates,
+                "shrinkage": self.shrinkage,
+                "min_support": self.min_support,
+                "normalization": self.normalization,
+                "shape": {"users": len(self.user_ids), "items": len(self.item_ids)},
+                "items_title": self.items_title,
+                "meta": self.meta,
+                "pending_updates": self.pending_updates,
+                "popularity": {"half_life_s": self.popularity_half_life_s, "ref_time": self.popularity_ref_time},
+            },
+        )
+        self.version = manifest["version"]
+
+        # the legacy model.json would now be stale; the loader prefers manifest.json anyway
+        legacy = p / "model.json"
+        if legacy.exists():
+            legacy.unlink()
 
     @classmethod
-    def load(cls, model_dir: str | Path) -> "IBCFRecommender":
+    def load(cls, model_dir: str | Path, *, mmap: bool = True, verify: str = "quick") -> "IBCFRecommender":
+        """
+        Loads a saved model. With the versioned format the arrays are opened
+        with mmap_mode="r", so every worker process shares one page-cached copy.
+        Old directories with only model.json + .npy files still load (fully in memory).
+        """
         p = Path(model_dir)
+        manifest = read_manifest(p)
+        if manifest is None:
+            return cls._load_legacy(p)
+
+        def arr(name: str) -> np.ndarray:
+            return open_array(p, manifest, name, mmap=mmap, verify=verify)
 
+        extra = manifest.get("extra", {})
+        obj = cls(
+            n_neighbors=extra.get("n_neighbors"),
+            duplicates=extra.get("duplicates", "last"),
+            shrinkage=extra.get("shrinkage", 0.0),
+            min_support=extra.get("min_support", 1),
+            normalization=extra.get("normalization", "user_mean"),
+        )
+        obj.items_title = extra.get("items_title", {})
+        obj.meta = extra.get("meta", {})
+        obj.version = manifest["version"]
+
+        obj.user_ids = arr("user_ids")
+        obj.item_ids = arr("item_ids")
+        obj.user_index = IdIndex(arr("user_keys"), arr("user_pos"))
+        obj.item_index = IdIndex(arr("item_keys"), arr("item_pos"))
+
+        n_users, n_items = len(obj.user_ids), len(obj.item_ids)
+        obj.sim = cls._open_matrix(manifest, arr, "sim", (n_items, n_items))
+        obj.r_norm = cls._open_matrix(manifest, arr, "r_norm", (n_users, n_items))
+        obj.user_mean = arr("user_mean")
+        if "ratings_indptr" in manifest["arrays"]:
+            obj.ratings = cls._open_matrix(manifest, arr, "ratings", (n_users, n_items))
+        if "rating_counts_indptr" in manifest["arrays"]:
+            obj.rating_counts = cls._open_matrix(manifest, arr, "rating_counts", (n_users, n_items))
+        obj.pending_updates = int(extra.get("pending_updates", 0))
+        if "popular_items" in manifest["arrays"]:
+            pop = extra.get("popularity", {})
+            obj.popularity_half_life_s = float(pop.get("half_life_s", DEFAULT_POPULARITY_HALF_LIFE_S))
+            obj.popularity_ref_time = float(pop.get("ref_time", 0.0))
+            obj.item_count = arr("item_count")
+            obj.item_popularity = arr("item_popularity")
+            obj.popular_items = arr("popular_items")
+        if "topk_items" in manifest["arrays"]:
+            obj.topk_items = arr("topk_items")
+            obj.topk_scores = arr("topk_scores")
+            obj.topk_because = arr("topk_because")
+        return obj
+
+    @staticmethod
+    def _open_matrix(manifest: dict, arr, name: str, shape: Tuple[int, int]):
+        if name in manifest["arrays"]:
+            return arr(name)
+        # CSR stored as three arrays; scipy keeps the (memory-mapped) buffers as-is
+        return sparse.csr_matrix((arr(f"{name}_data"), arr(f"{name}_indices"), arr(f"{name}_indptr")), shape=shape, copy=False)
+
+    @classmethod
+    def _load_legacy(cls, p: Path) -> "IBCFRecommender":
         obj = cls()
         with (p / "model.json").open("r", encoding="utf-8") as f:
             payload = json.load(f)
@@ -167,8 +1130,9 @@ class IBCFRecommender:
         obj.user_index = {u: i for i, u in enumerate(obj.user_ids)}
         obj.item_index = {it: j for j, it in enumerate(obj.item_ids)}
         obj.items_title = payload.get("items_title", {})
+        obj.meta = payload.get("meta", {})
 
         obj.sim = np.load(p / "sim.npy")
         obj.r_norm = np.load(p / "r_norm.npy")
         obj.user_mean = np.load(p / "user_mean.npy")
-        return obj
\ No newline at end of file
+        return obj
@@ -8,14 +8,22 @@ from pydantic import BaseModel
 class RecommendRequest(BaseModel):
     user_id: str
     k: int = 10
+    explain: bool = True
+
+
+class Contribution(BaseModel):
+    item_id: str
+    weight: float
 
 
 class RecItem(BaseModel):
     item_id: str
     score: float
     explanation: Optional[str] = None
+    because: Optional[List[Contribution]] = None
 
 
 class RecommendResponse(BaseModel):
     user_id: str
-    results: List[RecItem]
\ No newline at end of file
+    results: List[RecItem]
+    model_version: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# I make ai-engine importable as a root so tests can do: from inference... import ...
+AI_ENGINE_DIR = Path(__file__).resolve().parents[1]
+if str(AI_ENGINE_DIR) not in sys.path:
+    sys.path.insert(0, str(AI_ENGINE_DIR))
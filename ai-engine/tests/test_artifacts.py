@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference.artifacts import ArtifactError
+from inference.recommendation_logic import IBCFRecommender
+
+
+@pytest.fixture
+def saved(tmp_path):
+    rng = np.random.default_rng(1)
+    rows = [
+        {"user_id": f"user-{u}", "item_id": f"item-{i}", "rating": int(rng.integers(1, 6))}
+        for u in range(30) for i in range(200) if rng.random() < 0.2
+    ]
+    m = IBCFRecommender()
+    m.fit(pd.DataFrame(rows))
+    m.save(tmp_path, meta={"trained_at": 123})
+    return m, tmp_path
+
+
+def test_roundtrip_is_memory_mapped(saved):
+    m, path = saved
+    loaded = IBCFRecommender.load(path)
+
+    assert isinstance(loaded.sim, np.memmap)
+    assert not loaded.sim.flags.writeable
+    assert loaded.version == json.loads((path / "manifest.json").read_text())["version"]
+    assert loaded.meta == {"trained_at": 123}
+    assert loaded.user_index["user-7"] == m.user_index["user-7"]
+    assert "nobody" not in loaded.user_index
+
+    for u in ["user-0", "user-13", "nobody"]:
+        assert [(r.item_id, r.score) for r in loaded.recommend(u, k=5)] == [(r.item_id, r.score) for r in m.recommend(u, k=5)]
+
+
+def test_full_verify_catches_corruption_quick_check_skips(saved):
+    _, path = saved
+    raw = bytearray((path / "sim.npy").read_bytes())
+    mid = len(raw) // 2
+    raw[mid] ^= 0xFF
+    (path / "sim.npy").write_bytes(bytes(raw))
+
+    IBCFRecommender.load(path)  # same size, head and tail intact
+    with pytest.raises(ArtifactError):
+        IBCFRecommender.load(path, verify="full")
+
+
+def test_truncated_file_is_rejected(saved):
+    _, path = saved
+    raw = (path / "r_norm.npy").read_bytes()
+    (path / "r_norm.npy").write_bytes(raw[:-16])
+    with pytest.raises(ArtifactError):
+        IBCFRecommender.load(path)
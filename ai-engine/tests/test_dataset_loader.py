@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from training import dataset_loader
+from training.dataset_loader import load_ratings_csv
+
+
+@pytest.fixture
+def ratings_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        " user_id": [f"u{u}" for u in rng.integers(0, 30, n)],   # stray space in the header
+        "item_id": [f"i{i}" for i in rng.integers(0, 20, n)],
+        "rating": rng.integers(1, 6, n),
+        "timestamp": np.arange(n),
+        "extra": "ignored",
+    })
+    p = tmp_path / "ratings.csv"
+    df.to_csv(p, index=False)
+    return p
+
+
+def _reference(path, duplicates):
+    df = pd.read_csv(path)
+    df.columns = [c.strip() for c in df.columns]
+    g = df.groupby(["user_id", "item_id"], sort=True)
+    agg = {"last": "last", "mean": "mean", "max": "max"}[duplicates]
+    out = g.agg(rating=("rating", agg), timestamp=("timestamp", "max")).reset_index()
+    return out
+
+
+@pytest.mark.parametrize("duplicates", ["last", "mean", "max"])
+def test_chunked_dedupe_matches_whole_file(ratings_csv, duplicates):
+    got = load_ratings_csv(ratings_csv, chunksize=37, duplicates=duplicates)
+    assert isinstance(got["user_id"].dtype, pd.CategoricalDtype)
+    assert got["rating"].dtype == np.float32 and got["timestamp"].dtype == np.int64
+
+    got = got.assign(user_id=got["user_id"].astype(str), item_id=got["item_id"].astype(str))
+    got = got.sort_values(["user_id", "item_id"]).reset_index(drop=True)
+    ref = _reference(ratings_csv, duplicates)
+    assert list(got["user_id"]) == list(ref["user_id"]) and list(got["item_id"]) == list(ref["item_id"])
+    np.testing.assert_allclose(got["rating"], ref["rating"], rtol=1e-6)
+    np.testing.assert_array_equal(got["timestamp"], ref["timestamp"])
+
+
+def test_keeps_all_rows_without_dedupe(ratings_csv):
+    got = load_ratings_csv(ratings_csv, chunksize=64)
+    assert len(got) == 500
+    assert list(got["timestamp"]) == list(range(500))
+    assert list(got.columns) == ["user_id", "item_id", "rating", "timestamp"]
+
+
+def test_columnar_cache_skips_csv_parsing(ratings_csv, tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    first = load_ratings_csv(ratings_csv, duplicates="last", cache_dir=cache)
+    assert (cache / "meta.json").exists()
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError("CSV was parsed although the cache is valid")
+
+    monkeypatch.setattr(dataset_loader.pd, "read_csv", no_parsing)
+    again = load_ratings_csv(ratings_csv, duplicates="last", cache_dir=cache)
+    pd.testing.assert_frame_equal(again, first)
+
+    # a different reduction is a different cache entry
+    with pytest.raises(AssertionError):
+        load_ratings_csv(ratings_csv, duplicates="max", cache_dir=cache)
+
+
+@pytest.mark.parametrize("duplicates", ["last", "mean", "max"])
+def test_training_cli_matches_fit_on_raw_rows(ratings_csv, tmp_path, monkeypatch, duplicates):
+    from inference.recommendation_logic import IBCFRecommender
+    from training import train_recommendation
+
+    out = tmp_path / "model"
+    monkeypatch.setattr("sys.argv", [
+        "train_recommendation", "--ratings", str(ratings_csv), "--sample", "", "--out", str(out),
+        "--duplicates", duplicates, "--chunksize", "37", "--cache-dir", str(tmp_path / "cache"),
+    ])
+    train_recommendation.main()
+    trained = IBCFRecommender.load(out)
+
+    raw = pd.read_csv(ratings_csv, skipinitialspace=True).rename(columns=str.strip)
+    ref = IBCFRecommender(duplicates=duplicates)
+    ref.fit(raw)
+
+    def same(a, b):
+        for attr in ("ratings", "rating_counts", "r_norm", "sim", "user_mean", "item_count", "item_popularity"):
+            x, y = getattr(a, attr), getattr(b, attr)
+            assert (x is None) == (y is None), attr
+            if x is not None:
+                x = x.toarray() if hasattr(x, "toarray") else np.asarray(x)
+                y = y.toarray() if hasattr(y, "toarray") else np.asarray(y)
+                np.testing.assert_allclose(x, y, atol=1e-5, err_msg=attr)
+
+    same(trained, ref)
+    # re-rates on top: a "mean" model must still know how many ratings each mean is over
+    update = raw.iloc[:40].assign(rating=lambda d: 6 - d["rating"], timestamp=10_000)
+    trained.partial_fit(update)
+    ref.partial_fit(update)
+    same(trained, ref)
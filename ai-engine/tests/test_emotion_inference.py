@@ -0,0 +1,39 @@
+import joblib
+import numpy as np
+
+from inference.emotion_inference import EmotionInference
+from training.train_emotion import train_emotion_model
+
+TEXTS = [
+    "I feel great today", "such a good and happy day",
+    "I am feeling very sad", "so down and depressed",
+    "I am anxious about my exams", "panic and worried all night",
+]
+LABELS = ["happy", "happy", "sad", "sad", "anxious", "anxious"]
+
+
+def test_trained_model_is_used_with_real_probabilities(tmp_path):
+    pipeline = train_emotion_model(TEXTS, LABELS)
+    joblib.dump(pipeline, tmp_path / "model.joblib")
+
+    engine = EmotionInference(model_dir=tmp_path)
+    assert engine.source == "model"
+
+    queries = ["what a great day", "worried about tomorrow", "", "so sad"]
+    batch = engine.classify_many(queries, batch_size=3)
+    proba = pipeline.predict_proba(queries)
+    for out, row in zip(batch, proba):
+        assert out["source"] == "model"
+        assert out["emotion"] == pipeline.classes_[row.argmax()]
+        assert np.isclose(out["confidence"], row.max())
+        assert set(out["probabilities"]) == {"anxious", "happy", "sad"}
+        assert np.isclose(sum(out["probabilities"].values()), 1.0, atol=1e-4)
+    assert engine.classify("so sad") == batch[-1]
+
+
+def test_rules_only_without_a_model(tmp_path):
+    engine = EmotionInference(model_dir=tmp_path)
+    assert engine.source == "rules"
+    out = engine.classify_many(["I am so tired", "nothing special"])
+    assert [o["emotion"] for o in out] == ["stressed", "neutral"]
+    assert out[0]["confidence"] == 0.75 and out[0]["probabilities"] is None
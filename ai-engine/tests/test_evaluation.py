@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from evaluation.evaluate_models import evaluate_topk, leave_one_out_split
+from inference.recommendation_logic import IBCFRecommender
+
+
+def _loop_split(ratings):
+    # reference: the original groupby + concat split
+    df = ratings.copy()
+    df["timestamp"] = df["timestamp"].astype(float)
+    df = df.sort_values(["user_id", "timestamp"])
+    test_rows, train_parts = [], []
+    for _, g in df.groupby("user_id"):
+        if len(g) >= 2:
+            test_rows.append((str(g.iloc[-1]["user_id"]), str(g.iloc[-1]["item_id"])))
+            g = g.iloc[:-1]
+        train_parts.append(g)
+    return pd.concat(train_parts, ignore_index=True), test_rows
+
+
+def _ratings(seed=0, n_users=50, n_items=40, n=600):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_id": [f"u{u}" for u in rng.integers(0, n_users, n)],
+        "item_id": [f"i{i}" for i in rng.integers(0, n_items, n)],
+        "rating": rng.integers(1, 6, n),
+        "timestamp": rng.integers(0, 50, n),  # plenty of equal timestamps
+    })
+
+
+def test_vectorized_split_matches_loop():
+    ratings = _ratings()
+    train, test = leave_one_out_split(ratings)
+    ref_train, ref_test = _loop_split(ratings)
+    assert test == ref_test
+    pd.testing.assert_frame_equal(train, ref_train)
+
+
+def test_metrics_match_per_user_recommend():
+    train, test = leave_one_out_split(_ratings(seed=1))
+    model = IBCFRecommender()
+    model.fit(train)
+    test = test + [("never-seen-user", "i1"), ("u1", "item-not-in-train")]
+    k = 5
+
+    got = evaluate_topk(model, test, k, batch_size=7)
+
+    hits, rr, ndcg, shown = [], [], [], set()
+    for u, true_item in test:
+        recs = [r.item_id for r in model.recommend(u, k=k)]
+        shown.update(recs)
+        rank = recs.index(true_item) + 1 if true_item in recs else 0
+        hits.append(rank > 0)
+        rr.append(1.0 / rank if rank else 0.0)
+        ndcg.append(1.0 / np.log2(rank + 1) if rank else 0.0)
+
+    assert got["HitRate@k"] == np.mean(hits) == got["Recall@k"]
+    assert np.isclose(got["MRR@k"], np.mean(rr))
+    assert np.isclose(got["NDCG@k"], np.mean(ndcg))
+    assert np.isclose(got["Precision@k"], np.sum(hits) / (len(test) * k))
+    assert np.isclose(got["Coverage@k"], len(shown) / len(model.item_ids))
+
+
+def test_parallel_sweep_matches_direct_evaluation():
+    from evaluation.sweep_recommenders import parse_grid, sweep
+
+    grid = parse_grid("n_neighbors=0,10;shrinkage=0,5")
+    assert len(grid) == 4 and grid[1] == {"n_neighbors": None, "shrinkage": 5.0}
+
+    train, test = leave_one_out_split(_ratings(seed=2))
+    rows = sweep(train, test, grid, k=5, workers=2)
+    assert [(r["n_neighbors"], r["shrinkage"]) for r in rows] == [(0, 0.0), (0, 5.0), (10, 0.0), (10, 5.0)]
+
+    model = IBCFRecommender(n_neighbors=10, shrinkage=5.0)
+    model.fit(train)
+    assert rows[3]["NDCG@k"] == round(evaluate_topk(model, test, 5)["NDCG@k"], 4)
+    assert all(r["fit_s"] >= 0 and r["peak_mb"] > 0 for r in rows)
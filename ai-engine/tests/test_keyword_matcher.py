@@ -0,0 +1,74 @@
+import pytest
+
+from inference.emotion_inference import EMOTION_KEYWORDS, EmotionInference
+from inference.keyword_matcher import KeywordMatcher
+
+VOCAB = {"sad": ["sad", "depress*"], "stress": ["stress*", "overwhelm*"], "calm": ["at ease"]}
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(VOCAB)
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Stressful week; DEPRESSING news", ["sad", "stress"]),
+    ("sadly, the stressball broke", ["stress"]),       # whole words only; prefixes still match
+    ("Sadness is not the same as sad", ["sad"]),
+    ("felt at ease tonight", ["calm"]),
+    ("", []),
+])
+def test_word_boundaries_and_prefixes(matcher, text, expected):
+    assert matcher.categories(text) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Not sad, just stressed out", ["stress"]),
+    ("I don’t feel sad", []),                      # typographic apostrophe
+    ("I don't really feel sad", []),
+    ("not that I was ever, like, sad", ["sad"]),   # a comma ends the negated clause
+    ("never in my whole life was I this sad", ["sad"]),
+    ("I can't handle the stress", ["stress"]),
+    # "never" / "no" that intensify are not negations
+    ("I've never been so stressed", ["stress"]),
+    ("never felt this sad before", ["sad"]),
+    ("I have never been more overwhelmed", ["stress"]),
+    ("no more depressing nights, please", ["sad"]),
+    ("never sad, never stressed", []),
+    ("no stress at all", []),
+])
+def test_negation(matcher, text, expected):
+    assert matcher.categories(text) == expected
+
+
+def test_scan_reports_every_hit_in_one_pass(matcher):
+    text = "Overwhelmed and not sad. Stress again."
+    hits = matcher.scan(text)
+    assert [(h.category, h.keyword, h.negated) for h in hits] == [
+        ("stress", "Overwhelmed", False), ("sad", "sad", True), ("stress", "Stress", False),
+    ]
+    assert all(text[h.start:h.start + len(h.keyword)] == h.keyword for h in hits)
+    assert matcher.categories(text, include_negated=True) == ["sad", "stress"]
+
+
+def test_first_follows_vocab_order():
+    m = KeywordMatcher(EMOTION_KEYWORDS)
+    assert m.first("angry and happy") == "happy"
+    assert m.first("not happy, just tired") == "stressed"
+    assert m.first("nothing special", default="neutral") == "neutral"
+
+
+def test_rule_fallback_uses_the_matcher(tmp_path):
+    engine = EmotionInference(model_dir=tmp_path)
+    out = engine.classify_many(["I'm not happy, I'm panicking", "madness", "so overwhelmed"])
+    assert [o["emotion"] for o in out] == ["anxious", "neutral", "stressed"]
+
+
+@pytest.mark.parametrize("text,emotion", [
+    ("I've never been so stressed", "stressed"),
+    ("I’ve never felt this anxious", "anxious"),
+    ("never been more depressed in my life", "sad"),
+    ("I'm never stressed", "neutral"),
+])
+def test_intensifying_never_still_detects_the_emotion(text, emotion):
+    assert KeywordMatcher(EMOTION_KEYWORDS).first(text, default="neutral") == emotion
@@ -0,0 +1,96 @@
+import os
+
+import pandas as pd
+
+from inference.model_registry import ModelRegistry, artifact_fingerprint
+from inference.recommendation_logic import IBCFRecommender
+
+
+def _train(out_dir, ratings, trained_at):
+    m = IBCFRecommender()
+    m.fit(pd.DataFrame(ratings))
+    m.save(out_dir, meta={"trained_at": trained_at})
+
+
+RATINGS = [
+    {"user_id": "u1", "item_id": "a", "rating": 5},
+    {"user_id": "u1", "item_id": "b", "rating": 2},
+    {"user_id": "u2", "item_id": "a", "rating": 4},
+    {"user_id": "u2", "item_id": "c", "rating": 1},
+]
+
+
+def test_registry_loads_once(tmp_path):
+    _train(tmp_path, RATINGS, 1)
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        return IBCFRecommender.load(p)
+
+    reg = ModelRegistry(loader=loader, check_interval=60)
+    first = reg.get(tmp_path)
+    second = reg.get(str(tmp_path))
+    assert first is second
+    assert len(calls) == 1
+    assert reg.stats()[0]["version"] == first.model.version
+
+
+def test_registry_hot_swaps_new_artifacts(tmp_path):
+    _train(tmp_path, RATINGS, 1)
+    reg = ModelRegistry(check_interval=0)
+    old = reg.get(tmp_path)
+
+    _train(tmp_path, RATINGS + [{"user_id": "u3", "item_id": "b", "rating": 3}], 2)
+    # make sure the mtime moves even on coarse filesystems
+    st = os.stat(tmp_path / "manifest.json")
+    os.utime(tmp_path / "manifest.json", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    new = reg.get(tmp_path)
+    assert new is not old
+    assert new.version != old.version
+    assert new.model.meta["trained_at"] == 2
+    assert "u3" in new.model.user_index
+    # in-flight holders of the old model are untouched
+    assert "u3" not in old.model.user_index
+
+
+def test_registry_keeps_old_model_when_reload_fails(tmp_path):
+    _train(tmp_path, RATINGS, 1)
+    reg = ModelRegistry(check_interval=0)
+    old = reg.get(tmp_path)
+
+    # the manifest moved on, but an array doesn't match it
+    with (tmp_path / "sim.npy").open("ab") as f:
+        f.write(b"half written")
+    st = os.stat(tmp_path / "manifest.json")
+    os.utime(tmp_path / "manifest.json", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert reg.get(tmp_path) is old
+    assert reg.stats()[0]["last_reload_error"]
+
+
+def test_half_written_save_does_not_trigger_a_reload(tmp_path):
+    _train(tmp_path, RATINGS, 1)
+    reg = ModelRegistry(check_interval=0)
+    old = reg.get(tmp_path)
+    fp = artifact_fingerprint(tmp_path)
+
+    # a save is rewriting the arrays but hasn't written manifest.json yet
+    for name in ("sim.npy", "r_norm.npy", "user_mean.npy"):
+        f = tmp_path / name
+        if f.exists():
+            st = os.stat(f)
+            os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert artifact_fingerprint(tmp_path) == fp
+    assert reg.get(tmp_path) is old
+
+
+def test_info_reports_mmap_for_dense_and_sparse_models(tmp_path):
+    for neighbors in (None, 2):
+        out = tmp_path / f"n{neighbors}"
+        m = IBCFRecommender(n_neighbors=neighbors)
+        m.fit(pd.DataFrame(RATINGS))
+        m.save(out)
+        assert ModelRegistry().get(out).info()["mmap"] is True
+        in_memory = ModelRegistry(loader=lambda p: IBCFRecommender.load(p, mmap=False))
+        assert in_memory.get(out).info()["mmap"] is False
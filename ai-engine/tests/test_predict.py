@@ -0,0 +1,20 @@
+from inference.predict import recommend, recommend_many
+from inference.recommendation_logic import IBCFRecommender
+
+from tests.test_recommendation import _random_ratings
+
+
+def test_recommend_many_matches_single_calls(tmp_path):
+    m = IBCFRecommender()
+    m.fit(_random_ratings())
+    m.save(tmp_path)
+
+    users = ["u3", "nobody", "u1", "u3"] + [f"u{i}" for i in range(10, 20)]
+    out = list(recommend_many(users, k=4, model_dir=tmp_path, batch_size=3))
+
+    assert [r.user_id for r in out] == users
+    for resp in out:
+        assert resp == recommend(resp.user_id, k=4, model_dir=tmp_path)
+
+    plain = next(recommend_many(["u1"], k=4, model_dir=tmp_path, explain=False))
+    assert all(item.because is None for item in plain.results)
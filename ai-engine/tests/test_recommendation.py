@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference.recommendation_logic import IBCFRecommender, build_rating_matrix
+
+
+def _random_ratings(n_users=40, n_items=60, density=0.15, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for u in range(n_users):
+        for i in range(n_items):
+            if rng.random() < density:
+                rows.append({"user_id": f"u{u}", "item_id": f"i{i:03d}", "rating": int(rng.integers(1, 6))})
+    return pd.DataFrame(rows)
+
+
+def _loop_scores(model, user_id):
+    # reference: the original per-item scoring loop
+    user_vec = model.r_norm[model.user_index[user_id]]
+    rated_mask = user_vec != 0
+    scores = np.zeros(len(model.item_ids), dtype=np.float32)
+    for j in range(len(model.item_ids)):
+        if rated_mask[j]:
+            scores[j] = -np.inf
+            continue
+        sims = model.sim[j]
+        numer = np.sum(sims[rated_mask] * user_vec[rated_mask])
+        denom = np.sum(np.abs(sims[rated_mask])) + 1e-8
+        scores[j] = numer / denom
+    return scores
+
+
+@pytest.fixture(scope="module")
+def model():
+    m = IBCFRecommender()
+    m.fit(_random_ratings())
+    return m
+
+
+def test_vectorized_scores_match_loop(model):
+    for u in model.user_ids[:10]:
+        ref = _loop_scores(model, u)
+        got = model._score_users(np.array([model.user_index[u]]))[0]
+        np.testing.assert_allclose(got, ref, rtol=1e-5, atol=1e-6)
+
+
+def test_recommend_matches_loop_ranking(model):
+    for u in model.user_ids:
+        ref = _loop_scores(model, u)
+        expected = [model.item_ids[j] for j in np.argsort(-ref, kind="stable")[:10]]
+        got = [r.item_id for r in model.recommend(u, k=10)]
+        assert got == expected
+
+
+def test_recommend_batch_matches_single(model):
+    users = model.user_ids[:7] + ["unknown-user"]
+    batch = model.recommend_batch(users, k=5, batch_size=3)
+    assert list(batch.keys()) == users
+    for u in users:
+        assert [r.item_id for r in batch[u]] == [r.item_id for r in model.recommend(u, k=5)]
+    assert batch["unknown-user"][0].explanation == "Cold start fallback."
+
+
+def test_batched_explanations_match_per_item(model):
+    for u in model.user_ids[:10]:
+        user_vec = model.r_norm[model.user_index[u]]
+        rated_idx = np.flatnonzero(user_vec != 0)
+        for rec in model.recommend(u, k=5):
+            # reference: the original per-item explanation
+            sims = model.sim[model.item_index[rec.item_id]][rated_idx]
+            top2 = rated_idx[np.argsort(-sims, kind="stable")[:2]]
+            assert [c.item_id for c in rec.because] == [model.item_ids[t] for t in top2]
+            np.testing.assert_allclose([c.weight for c in rec.because], sims[np.argsort(-sims, kind="stable")[:2]])
+            assert rec.explanation == f"Because you liked items similar to: {', '.join(c.item_id for c in rec.because)}."
+
+    plain = model.recommend(model.user_ids[0], k=5, explain=False)
+    assert [r.item_id for r in plain] == [r.item_id for r in model.recommend(model.user_ids[0], k=5)]
+    assert all(r.explanation is None and r.because is None for r in plain)
+
+
+def test_sparse_topn_without_pruning_matches_dense(model):
+    ratings = _random_ratings()
+    sparse_model = IBCFRecommender(n_neighbors=10_000)
+    sparse_model.fit(ratings)
+
+    np.testing.assert_allclose(sparse_model.sim.toarray(), model.sim, atol=1e-5)
+    for u in model.user_ids[:10]:
+        assert [r.item_id for r in sparse_model.recommend(u, k=10)] == [r.item_id for r in model.recommend(u, k=10)]
+
+
+def test_sparse_topn_keeps_n_neighbors_per_item(tmp_path):
+    m = IBCFRecommender(n_neighbors=5)
+    m.fit(_random_ratings())
+    assert m.sim.getnnz(axis=1).max() <= 5
+    assert m.sim.diagonal().max() == 0
+
+    m.save(tmp_path)
+    loaded = IBCFRecommender.load(tmp_path)
+    assert loaded.n_neighbors == 5
+    assert [r.item_id for r in loaded.recommend("u1", k=5)] == [r.item_id for r in m.recommend("u1", k=5)]
+
+
+@pytest.mark.parametrize("duplicates,expected", [("last", 1.0), ("mean", 3.0), ("max", 5.0)])
+def test_duplicate_ratings_reduction(duplicates, expected):
+    ratings = pd.DataFrame({
+        "user_id": ["a", "a", "a", "b"],
+        "item_id": ["x", "x", "y", "x"],
+        "rating": [5, 1, 3, 2],
+    })
+    rm = build_rating_matrix(ratings, duplicates=duplicates)
+    assert rm.user_ids == ["a", "b"]
+    assert rm.item_ids == ["x", "y"]
+    assert rm.dense()[0, 0] == expected
+    assert len(rm.vals) == 3
+
+
+def _aligned(model, ref, attr):
+    # model ids may be in append order; reorder to the refit model's sorted ids
+    u = [model.user_index[x] for x in ref.user_ids]
+    i = [model.item_index[x] for x in ref.item_ids]
+    a, b = getattr(model, attr), getattr(ref, attr)
+    a = a.toarray() if hasattr(a, "toarray") else np.asarray(a)
+    b = b.toarray() if hasattr(b, "toarray") else np.asarray(b)
+    return (a[np.ix_(i, i)] if attr == "sim" else a[np.ix_(u, i)]), b
+
+
+NEW_RATINGS = pd.DataFrame({
+    "user_id": ["u1", "u1", "u5", "newbie", "u7"],
+    "item_id": ["i003", "i050", "i010", "i001", "brand_new"],
+    "rating": [5, 1, 3, 4, 2],
+})
+
+
+def test_partial_fit_matches_full_refit(tmp_path):
+    base = _random_ratings()
+    m = IBCFRecommender()
+    m.fit(base)
+    m.save(tmp_path)
+    m = IBCFRecommender.load(tmp_path)  # memory-mapped: partial_fit must copy
+
+    stats = m.partial_fit(NEW_RATINGS)
+    assert stats["new_users"] == 1 and stats["new_items"] == 1
+
+    ref = IBCFRecommender()
+    ref.fit(pd.concat([base, NEW_RATINGS], ignore_index=True))
+    for attr in ("r_norm", "sim"):
+        got, want = _aligned(m, ref, attr)
+        np.testing.assert_allclose(got, want, atol=1e-5)
+    assert m.recommend("newbie", k=3)[0].explanation != "Cold start fallback."
+
+
+def test_sparse_partial_fit_then_compact_matches_refit():
+    base = _random_ratings()
+    m = IBCFRecommender(n_neighbors=5)
+    m.fit(base)
+    m.partial_fit(NEW_RATINGS)
+    assert m.pending_updates == len(NEW_RATINGS)
+    assert m.sim.getnnz(axis=1).max() <= 5
+
+    m.compact()
+    ref = IBCFRecommender(n_neighbors=5)
+    ref.fit(pd.concat([base, NEW_RATINGS], ignore_index=True))
+    got, want = _aligned(m, ref, "r_norm")
+    np.testing.assert_allclose(got, want, atol=1e-5)
+    assert m.pending_updates == 0
+    assert m.sim.getnnz(axis=1).max() <= 5
+
+
+KNOBS = {"shrinkage": 5.0, "min_support": 2, "normalization": "none"}
+
+
+def test_shrinkage_and_min_support():
+    plain, tuned = IBCFRecommender(), IBCFRecommender(shrinkage=5.0, min_support=2)
+    plain.fit(_random_ratings())
+    tuned.fit(_random_ratings())
+
+    B = (plain.ratings.toarray() > 0).astype(np.float32)
+    support = B.T @ B
+    want = np.where(support >= 2, plain.sim * support / (support + 5.0), 0.0)
+    np.testing.assert_allclose(tuned.sim, want, atol=1e-6)
+
+    sparse_tuned = IBCFRecommender(n_neighbors=len(plain.item_ids), shrinkage=5.0, min_support=2)
+    sparse_tuned.fit(_random_ratings())
+    np.testing.assert_allclose(sparse_tuned.sim.toarray(), want, atol=1e-5)
+
+
+def test_tuned_partial_fit_matches_refit_and_roundtrips(tmp_path):
+    base = _random_ratings()
+    m = IBCFRecommender(**KNOBS)
+    m.fit(base)
+    m.save(tmp_path)
+    m = IBCFRecommender.load(tmp_path)
+    assert (m.shrinkage, m.min_support, m.normalization) == (5.0, 2, "none")
+
+    m.partial_fit(NEW_RATINGS)
+    ref = IBCFRecommender(**KNOBS)
+    ref.fit(pd.concat([base, NEW_RATINGS], ignore_index=True))
+    for attr in ("r_norm", "sim"):
+        got, want = _aligned(m, ref, attr)
+        np.testing.assert_allclose(got, want, atol=1e-5)
+
+
+def test_precomputed_topk_matches_live_scoring(tmp_path):
+    m = IBCFRecommender()
+    m.fit(_random_ratings())
+    live = {u: m.recommend(u, k=8) for u in m.user_ids}
+
+    m.save(tmp_path)
+    m.precompute_topk(k=10)
+    m.save_topk(tmp_path)
+    loaded = IBCFRecommender.load(tmp_path)
+    assert loaded.topk_items is not None
+
+    for u, recs in live.items():
+        assert loaded.recommend(u, k=8) == recs
+    # k above the precomputed size falls back to live scoring
+    assert len(loaded.recommend("u1", k=20)) == 20
+
+    loaded.partial_fit(NEW_RATINGS)
+    assert loaded.topk_items is None
+
+
+def test_cold_start_uses_recency_weighted_popularity(tmp_path):
+    day = 24 * 3600
+    ratings = pd.DataFrame({
+        "user_id": ["a", "b", "c", "a", "b", "c", "d"],
+        "item_id": ["old_hit", "old_hit", "old_hit", "fresh", "fresh", "x", "x"],
+        "rating": [5, 4, 5, 4, 5, 3, 3],
+        "timestamp": [0, 0, 0, 100 * day, 100 * day, 50 * day, 100 * day],
+    })
+    m = IBCFRecommender(popularity_half_life_s=10 * day)
+    m.fit(ratings)
+    assert m.item_count[m.item_index["old_hit"]] == 3
+
+    recs = m.recommend("brand-new-user", k=2)
+    assert [r.item_id for r in recs] == ["fresh", "x"]
+    assert recs[0].explanation == "Cold start fallback."
+
+    m.save(tmp_path)
+    loaded = IBCFRecommender.load(tmp_path)
+    assert loaded.recommend("someone", k=3) == m.recommend("someone", k=3)
+
+    # new ratings move the ranking without a refit
+    loaded.partial_fit(pd.DataFrame({
+        "user_id": ["e", "f", "g"], "item_id": ["x", "x", "x"], "rating": [4, 4, 4], "timestamp": [101 * day] * 3,
+    }))
+    assert loaded.recommend("someone", k=1)[0].item_id == "x"
+
+
+@pytest.mark.parametrize("duplicates", ["last", "mean", "max"])
+def test_partial_fit_merges_rerated_pairs_like_refit(tmp_path, duplicates):
+    base = _random_ratings()
+    u1 = list(base[base.user_id == "u1"].item_id)
+    u5 = list(base[base.user_id == "u5"].item_id)
+    rerates = pd.DataFrame({
+        # u1 and u5 re-rate items they already rated (u1 one of them twice in this batch)
+        "user_id": ["u1", "u1", "u1", "u5", "newbie"],
+        "item_id": [u1[0], u1[1], u1[0], u5[0], "i001"],
+        "rating": [1, 5, 4, 5, 2],
+    })
+    m = IBCFRecommender(duplicates=duplicates)
+    m.fit(base)
+    m.save(tmp_path)
+    m = IBCFRecommender.load(tmp_path)
+    assert m.duplicates == duplicates
+
+    m.partial_fit(rerates)
+    m.partial_fit(rerates.iloc[:2])     # and again, on top of merged values
+    ref = IBCFRecommender(duplicates=duplicates)
+    ref.fit(pd.concat([base, rerates, rerates.iloc[:2]], ignore_index=True))
+    for attr in ("ratings", "r_norm", "sim"):
+        got, want = _aligned(m, ref, attr)
+        np.testing.assert_allclose(got, want, atol=1e-5)
+
+
+def test_rerating_does_not_make_an_item_more_popular():
+    ratings = pd.DataFrame({"user_id": ["a", "b"], "item_id": ["x", "y"], "rating": [4, 4], "timestamp": [10, 10]})
+    m = IBCFRecommender()
+    m.fit(ratings)
+    m.partial_fit(pd.DataFrame({"user_id": ["a", "a", "c"], "item_id": ["x", "x", "y"], "rating": [5, 3, 4], "timestamp": [10, 10, 10]}))
+    assert m.item_count[m.item_index["x"]] == 1
+    assert m.item_count[m.item_index["y"]] == 2
+
+    ref = IBCFRecommender()
+    ref.fit(pd.concat([ratings, pd.DataFrame({"user_id": ["a", "c"], "item_id": ["x", "y"], "rating": [5, 4], "timestamp": [10, 10]})]))
+    np.testing.assert_allclose(_aligned_items(m, ref, "item_popularity"), ref.item_popularity)
+    np.testing.assert_allclose(_aligned_items(m, ref, "item_count"), ref.item_count)
+
+
+def _aligned_items(model, ref, attr):
+    return np.asarray(getattr(model, attr))[[model.item_index[x] for x in ref.item_ids]]
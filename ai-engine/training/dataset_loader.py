@@ -6,7 +6,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 
 @dataclass
@@ -15,23 +17,172 @@ class RecDataset:
     items: Optional[pd.DataFrame] = None  # columns: item_id, title(optional)
 
 
-def load_ratings_csv(path: str | Path) -> pd.DataFrame:
+RATING_COLUMNS = ["user_id", "item_id", "rating", "timestamp"]
+DEFAULT_CHUNKSIZE = 1_000_000
+RATINGS_CACHE_VERSION = 1
+
+
+def load_ratings_csv(
+    path: str | Path,
+    *,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    duplicates: Optional[str] = None,
+    cache_dir: str | Path | None = None,
+) -> pd.DataFrame:
+    """
+    Streams ratings.csv in chunks with compact dtypes:
+    categorical user_id/item_id, float32 rating, int64 timestamp (0 if missing).
+
+    duplicates: None keeps every row; "last" / "mean" / "max" reduce repeated
+    (user_id, item_id) ratings while reading (same rules as the model's
+    build_rating_matrix), so only one row per pair is ever held.
+
+    cache_dir: if set, the parsed columns are stored there (Parquet when
+    pyarrow is installed, else one .npy per column) and reused as long as the
+    CSV's size/mtime and `duplicates` are unchanged, skipping CSV parsing.
+    """
     p = Path(path)
-    df = pd.read_csv(p)
+    if duplicates is not None and duplicates not in ("last", "mean", "max"):
+        raise ValueError(f"duplicates must be None, 'last', 'mean' or 'max', got {duplicates!r}")
 
-    # normalize column names
-    df.columns = [c.strip() for c in df.columns]
+    key = _ratings_cache_key(p, duplicates)
+    if cache_dir is not None:
+        cached = _read_ratings_cache(Path(cache_dir), key)
+        if cached is not None:
+            return cached
 
+    # normalize column names (header only; the data is read in chunks below)
+    header = [c for c in pd.read_csv(p, nrows=0).columns]
+    by_name = {c.strip(): c for c in header}
     required = {"user_id", "item_id", "rating"}
-    missing = required - set(df.columns)
+    missing = required - set(by_name)
     if missing:
         raise ValueError(f"ratings.csv missing columns: {sorted(missing)}. Need {sorted(required)}")
 
     # timestamp is optional
-    if "timestamp" not in df.columns:
-        df["timestamp"] = 0
+    wanted = [c for c in RATING_COLUMNS if c in by_name]
+    # ids are parsed as plain strings and categorized per chunk (faster than dtype="category" in the parser)
+    dtypes = {by_name["user_id"]: str, by_name["item_id"]: str, by_name["rating"]: "float32"}
+    if "timestamp" in by_name:
+        dtypes[by_name["timestamp"]] = "float64"   # tolerate blanks; cast to int64 per chunk
 
-    return df[["user_id", "item_id", "rating", "timestamp"]].copy()
+    parts = []
+    reader = pd.read_csv(p, usecols=[by_name[c] for c in wanted], dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        chunk.columns = [c.strip() for c in chunk.columns]
+        chunk["user_id"] = chunk["user_id"].astype("category")
+        chunk["item_id"] = chunk["item_id"].astype("category")
+        if "timestamp" in chunk.columns:
+            chunk["timestamp"] = chunk["timestamp"].fillna(0).astype("int64")
+        else:
+            chunk["timestamp"] = np.zeros(len(chunk), dtype=np.int64)
+        parts.append(_reduce_duplicates(chunk[RATING_COLUMNS], duplicates, partial=True))
+
+    df = _concat_ratings(parts)
+    df = _reduce_duplicates(df, duplicates, partial=False)
+
+    if cache_dir is not None:
+        _write_ratings_cache(Path(cache_dir), key, df)
+    return df
+
+
+def _reduce_duplicates(df: pd.DataFrame, duplicates: Optional[str], *, partial: bool) -> pd.DataFrame:
+    """
+    One row per (user_id, item_id). "last" keeps the last row as is; "mean" /
+    "max" rows get the group's latest timestamp. For "mean" the partial
+    (per chunk) pass keeps sum + count so the final pass combines chunks exactly.
+    """
+    if duplicates is None:
+        return df
+    if duplicates == "last":
+        return df[~df.duplicated(["user_id", "item_id"], keep="last")].reset_index(drop=True)
+    g = df.groupby(["user_id", "item_id"], observed=True, sort=False)
+    if duplicates == "max":
+        out = g.agg(rating=("rating", "max"), timestamp=("timestamp", "max")).reset_index()
+    else:
+        if "rating_count" in df.columns:
+            out = g.agg(rating=("rating", "sum"), rating_count=("rating_count", "sum"), timestamp=("timestamp", "max")).reset_index()
+        else:
+            out = g.agg(rating=("rating", "sum"), rating_count=("rating", "size"), timestamp=("timestamp", "max")).reset_index()
+        if not partial:
+            out["rating"] = (out["rating"] / out.pop("rating_count")).astype("float32")
+    return out.reset_index(drop=True)
+
+
+def _concat_ratings(parts) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame({
+            "user_id": pd.Categorical([]), "item_id": pd.Categorical([]),
+            "rating": np.empty(0, dtype=np.float32), "timestamp": np.empty(0, dtype=np.int64),
+        })
+    out = {}
+    for col in parts[0].columns:
+        if col in ("user_id", "item_id"):
+            # chunks have different category sets; union them (sorted, like the model's id order)
+            out[col] = union_categoricals([pt[col] for pt in parts], sort_categories=True)
+        else:
+            out[col] = np.concatenate([pt[col].to_numpy() for pt in parts])
+    return pd.DataFrame(out)
+
+
+def _ratings_cache_key(p: Path, duplicates: Optional[str]) -> dict:
+    st = p.stat()
+    return {
+        "version": RATINGS_CACHE_VERSION,
+        "source": str(p.resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "duplicates": duplicates,
+    }
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _write_ratings_cache(cache_dir: Path, key: dict, df: pd.DataFrame) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta_path = cache_dir / "meta.json"
+    meta_path.unlink(missing_ok=True)   # invalid while the columns are being rewritten
+
+    if _parquet_available():
+        df.to_parquet(cache_dir / "ratings.parquet", index=False)
+        fmt = "parquet"
+    else:
+        for col in ("user_id", "item_id"):
+            np.save(cache_dir / f"{col}_codes.npy", df[col].cat.codes.to_numpy())
+            np.save(cache_dir / f"{col}_categories.npy", np.asarray(df[col].cat.categories, dtype=np.str_))
+        for col in ("rating", "timestamp"):
+            np.save(cache_dir / f"{col}.npy", df[col].to_numpy())
+        fmt = "npy"
+
+    meta_path.write_text(json.dumps({**key, "format": fmt, "rows": int(len(df))}, indent=2), encoding="utf-8")
+
+
+def _read_ratings_cache(cache_dir: Path, key: dict) -> Optional[pd.DataFrame]:
+    meta_path = cache_dir / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if any(meta.get(k) != v for k, v in key.items()):
+        return None
+
+    if meta.get("format") == "parquet":
+        if not _parquet_available():
+            return None
+        return pd.read_parquet(cache_dir / "ratings.parquet")
+
+    cols = {}
+    for col in ("user_id", "item_id"):
+        codes = np.load(cache_dir / f"{col}_codes.npy")
+        cols[col] = pd.Categorical.from_codes(codes, categories=np.load(cache_dir / f"{col}_categories.npy"))
+    for col in ("rating", "timestamp"):
+        cols[col] = np.load(cache_dir / f"{col}.npy")
+    return pd.DataFrame(cols)
 
 
 def load_items_csv(path: str | Path) -> pd.DataFrame:
@@ -56,6 +207,9 @@ def load_recommendation_dataset(
     ratings_csv: str | Path | None = None,
     items_csv: str | Path | None = None,
     sample_inputs_json: str | Path | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    duplicates: Optional[str] = None,
+    cache_dir: str | Path | None = None,
 ) -> RecDataset:
     """
     Loads recommendation dataset from either:
@@ -65,6 +219,8 @@ def load_recommendation_dataset(
       1) a dict with "ratings": [...]
       2) a dict with any list that contains user_id,item_id,rating
       3) directly a list of dicts: [{user_id,item_id,rating,...}, ...]
+
+    chunksize / duplicates / cache_dir only apply to the CSV path (see load_ratings_csv).
     """
 
     # ✅ Priority: sample JSON (demo mode)
@@ -120,15 +276,13 @@ def load_recommendation_dataset(
                     tmp["title"] = tmp["item_id"].astype(str)
                 items = tmp[["item_id", "title"]].copy()
 
-        return RecDataset(
-            ratings=ratings[["user_id", "item_id", "rating", "timestamp"]].copy(),
-            items=items,
-        )
+        # column selection already gives a new frame; no extra copy needed
+        return RecDataset(ratings=ratings[RATING_COLUMNS], items=items)
 
     # ✅ Otherwise: CSV mode
     if not ratings_csv:
         raise ValueError("You must provide either sample_inputs_json or ratings_csv")
 
-    ratings = load_ratings_csv(ratings_csv)
+    ratings = load_ratings_csv(ratings_csv, chunksize=chunksize, duplicates=duplicates, cache_dir=cache_dir)
     items = load_items_csv(items_csv) if items_csv else None
     return RecDataset(ratings=ratings, items=items)
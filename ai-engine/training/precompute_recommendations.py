@@ -0,0 +1,34 @@
+# training/precompute_recommendations.py
+from __future__ import annotations
+
+import argparse
+import time
+
+from inference.recommendation_logic import IBCFRecommender
+
+
+def main():
+    """
+    Batch stage after train_recommendation.py: precomputes the top-K list
+    (scores + explanation items) for every known user and adds it to the
+    model dir, so the API answers known users by slicing instead of scoring.
+    """
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="models/recommendation/latest", help="Model dir (updated in place)")
+    ap.add_argument("--k", type=int, default=50, help="How many items to keep per user (API k must be <= this)")
+    ap.add_argument("--batch-size", type=int, default=256)
+    args = ap.parse_args()
+
+    model = IBCFRecommender.load(args.model)
+
+    started = time.perf_counter()
+    model.precompute_topk(k=args.k, batch_size=args.batch_size)
+    took = time.perf_counter() - started
+
+    model.save_topk(args.model)
+    print(f"[OK] Precomputed top-{args.k} for {len(model.user_ids)} users in {took:.3f}s -> {args.model}")
+    print(f"  model version: {model.version}")
+
+
+if __name__ == "__main__":
+    main()
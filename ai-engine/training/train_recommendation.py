@@ -6,7 +6,7 @@ import time
 from pathlib import Path
 
 from training.dataset_loader import load_recommendation_dataset
-from inference.recommendation_logic import IBCFRecommender
+from inference.recommendation_logic import DUPLICATE_REDUCTIONS, NORMALIZATIONS, IBCFRecommender
 
 
 def main():
@@ -15,8 +15,20 @@ def main():
     ap.add_argument("--items", default="", help="Optional items.csv (item_id,title)")
     ap.add_argument("--sample", default="data/sample_inputs.json", help="Fallback sample_inputs.json")
     ap.add_argument("--out", default="models/recommendation/latest", help="Output dir")
+    ap.add_argument("--neighbors", type=int, default=0, help="Keep top-N neighbors per item (sparse model); 0 = dense")
+    ap.add_argument("--duplicates", default="last", choices=DUPLICATE_REDUCTIONS, help="How repeated (user,item) ratings are reduced")
+    ap.add_argument("--popularity-half-life-days", type=float, default=30.0, help="Recency decay for the cold start popularity index")
+    ap.add_argument("--shrinkage", type=float, default=0.0, help="Similarity shrinkage n/(n+shrinkage) by co-rating count")
+    ap.add_argument("--min-support", type=int, default=1, help="Drop similarities with fewer co-ratings")
+    ap.add_argument("--normalization", default="user_mean", choices=NORMALIZATIONS, help="Rating normalization before cosine")
+    ap.add_argument("--chunksize", type=int, default=1_000_000, help="Rows per chunk when streaming ratings.csv")
+    ap.add_argument("--cache-dir", default="", help="Columnar cache for the parsed ratings.csv (reused while the CSV is unchanged)")
+    ap.add_argument("--precompute-k", type=int, default=0, help="Also precompute per-user top-K lists (0 = skip)")
     args = ap.parse_args()
 
+    timings = {}
+    started = time.perf_counter()
+
     ratings_path = args.ratings.strip() or None
     items_path = args.items.strip() or None
     sample_path = args.sample.strip() or None
@@ -25,24 +37,52 @@ def main():
         ratings_csv=ratings_path,
         items_csv=items_path,
         sample_inputs_json=sample_path,
+        chunksize=args.chunksize,
+        # raw rows: fit reduces duplicates itself and keeps what the loader would
+        # throw away (ratings per pair for "mean", first-rating time for popularity)
+        duplicates=None,
+        cache_dir=args.cache_dir.strip() or None,
     )
 
-    model = IBCFRecommender()
+    timings["load_s"] = round(time.perf_counter() - started, 4)
+
+    model = IBCFRecommender(
+        n_neighbors=args.neighbors or None,
+        duplicates=args.duplicates,
+        popularity_half_life_s=args.popularity_half_life_days * 24 * 3600,
+        shrinkage=args.shrinkage,
+        min_support=args.min_support,
+        normalization=args.normalization,
+    )
     model.fit(ds.ratings, ds.items)
+    timings.update(model.fit_timings)
 
     meta = {
-        "model_type": "IBCF-cosine-user-mean",
+        "model_type": f"IBCF-cosine-user-mean-top{args.neighbors}" if args.neighbors else "IBCF-cosine-user-mean",
         "trained_at": int(time.time()),
         "num_users": int(ds.ratings["user_id"].nunique()),
         "num_items": int(ds.ratings["item_id"].nunique()),
         "num_ratings": int(len(ds.ratings)),
+        "duplicates": args.duplicates,
+        "shrinkage": args.shrinkage,
+        "min_support": args.min_support,
+        "normalization": args.normalization,
+        "timings": timings,
     }
 
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    if args.precompute_k:
+        model.precompute_topk(k=args.precompute_k)
+        timings["precompute_s"] = round(time.perf_counter() - started, 4)
+        started = time.perf_counter()
     model.save(out_dir, meta=meta)
+    timings["save_s"] = round(time.perf_counter() - started, 4)
 
     print(f"[OK] Recommendation model saved to: {out_dir}")
+    for stage, took in timings.items():
+        print(f"  {stage:<14} {took:>9.4f}")
 
 
 if __name__ == "__main__":
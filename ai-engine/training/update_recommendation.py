@@ -0,0 +1,63 @@
+# training/update_recommendation.py
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from training.dataset_loader import load_ratings_csv
+from inference.recommendation_logic import IBCFRecommender
+
+
+def main():
+    """
+    Applies new ratings to an existing model without a full retrain.
+    Meant to run every few minutes (cron / scheduler); the API's model
+    registry picks up the rewritten artifacts on its next check.
+    """
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ratings", required=True, help="CSV with the new ratings (user_id,item_id,rating,timestamp?)")
+    ap.add_argument("--model", default="models/recommendation/latest", help="Model dir to update in place")
+    ap.add_argument("--out", default="", help="Optional different output dir (default: overwrite --model)")
+    ap.add_argument("--compact-after", type=int, default=50_000, help="Rebuild similarities once this many updates are pending")
+    ap.add_argument("--compact", action="store_true", help="Rebuild similarities now")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    model = IBCFRecommender.load(args.model, mmap=False)
+    new_ratings = load_ratings_csv(args.ratings)
+    loaded_s = time.perf_counter() - started
+
+    # partial_fit drops precomputed top-K lists; rebuild them if the model had them
+    topk_k = model.topk_items.shape[1] if model.topk_items is not None else 0
+
+    started = time.perf_counter()
+    stats = model.partial_fit(new_ratings)
+    update_s = time.perf_counter() - started
+
+    compacted = False
+    if args.compact or model.pending_updates >= args.compact_after:
+        model.compact()
+        compacted = True
+
+    if topk_k:
+        model.precompute_topk(k=topk_k)
+
+    meta = dict(model.meta)
+    meta["updated_at"] = int(time.time())
+    meta["num_users"] = len(model.user_ids)
+    meta["num_items"] = len(model.item_ids)
+    if compacted:
+        meta["compacted_at"] = meta["updated_at"]
+
+    out_dir = Path(args.out or args.model)
+    model.save(out_dir, meta=meta)
+
+    print(f"[OK] Updated model saved to: {out_dir}")
+    print(f"  applied: {stats}")
+    print(f"  pending updates: {model.pending_updates} (compacted: {compacted})")
+    print(f"  load {loaded_s:.3f}s, partial_fit {update_s:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
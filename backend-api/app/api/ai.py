@@ -1,16 +1,55 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Query
-from app.services.ai_bridge import get_recommendations, ai_engine_healthcheck
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.models.schemas import RecommendBatchIn
+from app.services.ai_bridge import get_recommendations_async, open_recommendation_stream, ai_engine_healthcheck
+from app.services.work_pool import PoolSaturated
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 @router.get("/recommend")
-def recommend(
+async def recommend(
     user_id: str = Query(...),
     k: int = Query(10, ge=1, le=50),
+    explain: bool = Query(True),
 ):
-    return get_recommendations(user_id=user_id, k=k)
+    # I keep this async: scoring runs in its own bounded pool, so a burst of
+    # recommendation calls can't block the other routes.
+    try:
+        return await get_recommendations_async(user_id=user_id, k=k, explain=explain)
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Recommendation service is busy, please retry.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+@router.post("/recommend/batch")
+async def recommend_batch(payload: RecommendBatchIn, request: Request):
+    # I stream NDJSON (one user per line) so a bulk job can start consuming
+    # results while the rest are still being scored.
+    try:
+        lines = await open_recommendation_stream(payload.user_ids, k=payload.k, explain=payload.explain)
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Batch recommendation queue is full, please retry.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    async def body():
+        # I stop as soon as the client is gone, so the pool doesn't score the
+        # rest of a batch nobody will read
+        try:
+            async for chunk in lines:
+                yield chunk
+                if await request.is_disconnected():
+                    break
+        finally:
+            await lines.aclose()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
 
 @router.get("/health")
 def ai_health():
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
+import os
 import uuid
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from pydantic import BaseModel
 
-from app.services.assessment_service import load_assessment, score_assessment
-from app.services.firebase_service import firestore_db, verify_firebase_bearer
+from app.services.assessment_service import assessment_registry, score_assessment
+from app.services.firebase_service import firestore_client, verify_firebase_bearer
 
 
 router = APIRouter(prefix="/assessments", tags=["assessments"])
@@ -27,27 +28,47 @@ class SubmitAssessmentIn(BaseModel):
 # GET: Questions
 # =========================
 
+# Definitions only change with a deploy, and the ETag catches that anyway.
+QUESTIONS_MAX_AGE_S = int(os.getenv("ASSESSMENT_MAX_AGE_S", "86400"))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # weak comparison, as If-None-Match asks for
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
 @router.get("/questions/{name}")
-def get_questions(name: str) -> Dict[str, Any]:
+def get_questions(name: str, if_none_match: str = Header(default="")) -> Response:
     """
     Returns assessment metadata + questions.
     Used by iOS to render the assessment UI.
+
+    The body is serialized once at load time and comes with an ETag, so iOS
+    can revalidate with If-None-Match and get an empty 304 instead of the
+    questions again.
     """
     try:
-        return load_assessment(name)
+        a = assessment_registry.get(name)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    headers = {"ETag": a.etag, "Cache-Control": f"public, max-age={QUESTIONS_MAX_AGE_S}"}
+    if if_none_match and _etag_matches(if_none_match, a.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=a.body, media_type="application/json", headers=headers)
+
 
 # =========================
 # POST: Submit Assessment
 # =========================
 
 @router.post("/submit/{name}")
-async def submit_assessment(
+def submit_assessment(
     name: str,
     payload: SubmitAssessmentIn,
     authorization: str = Header(default=""),
+    db: Any = Depends(firestore_client),
 ):
     """
     Backend-authoritative assessment submit.
@@ -57,23 +78,27 @@ async def submit_assessment(
     2) Validate all questions answered
     3) Compute score & safety flags
     4) Save to Firestore
+
+    Plain def: the Firestore write blocks, so it runs in FastAPI's threadpool.
     """
 
     # 🔐 AUTH
     try:
-        uid = verify_firebase_bearer(authorization)
+        uid = verify_firebase_bearer(authorization)["uid"]
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
 
     # 🧮 VALIDATE + SCORE (deterministic)
-    result = score_assessment(name, payload.answers)
+    try:
+        result = score_assessment(name, payload.answers)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
     # ❌ Validation failed → iOS shows "Please answer all questions"
     if not result.get("ok"):
         return result
 
     # 💾 SAVE TO FIRESTORE
-    db = firestore_db()
     assessment_id = "as_" + str(uuid.uuid4())
 
     db.collection("users") \
@@ -1,22 +1,20 @@
 from __future__ import annotations
 
+import json
 import os
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.schemas import ChatIn, ChatOut
-from app.services.ai_service import generate_chat_reply
+from app.services.ai_service import generate_chat_reply, stream_chat_reply
 from app.services.firebase_service import verify_firebase_bearer
 
 
 router = APIRouter(tags=["chat"])
 
 
-@router.post("/chat", response_model=ChatOut)
-async def chat(
-    payload: ChatIn,
-    authorization: Optional[str] = Header(default=None),
-) -> ChatOut:
+def _chat_user(authorization: Optional[str]) -> str:
     # I allow a dev bypass so I can hit /chat with curl without Firebase.
     dev_bypass = os.getenv("DEV_AUTH_BYPASS", "false").lower() == "true"
 
@@ -25,11 +23,22 @@ async def chat(
         if not authorization or not authorization.startswith("Bearer "):
             raise HTTPException(status_code=401, detail="Missing Authorization header")
 
-        token = authorization.split("Bearer ", 1)[1].strip()
-        user_id = verify_firebase_bearer(token)
+        try:
+            user_id = verify_firebase_bearer(authorization)["uid"]
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid Firebase token")
+    return user_id
+
+
+@router.post("/chat", response_model=ChatOut)
+async def chat(
+    payload: ChatIn,
+    authorization: Optional[str] = Header(default=None),
+) -> ChatOut:
+    user_id = _chat_user(authorization)
 
     # I call the AI service with the exact keyword names it expects.
-    result: Dict[str, Any] = generate_chat_reply(
+    result: Dict[str, Any] = await generate_chat_reply(
         payload.userText,
         user_id=user_id,
         conversation_id=payload.conversationId,
@@ -40,3 +49,39 @@ async def chat(
         assistantText=result.get("assistantText", ""),
         metadata=result.get("metadata", {}),
     )
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    payload: ChatIn,
+    authorization: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Server-Sent Events version of /chat, so the app can show the reply as it is typed:
+      event: token   data: {"text": "..."}
+      event: done    data: {"assistantText": "...", "metadata": {...}}   (same shape as /chat)
+    """
+    user_id = _chat_user(authorization)
+
+    async def events():
+        replies = stream_chat_reply(
+            payload.userText,
+            user_id=user_id,
+            conversation_id=payload.conversationId,
+            history=payload.history,
+        )
+        try:
+            async for event in replies:
+                kind = event.pop("type")
+                yield f"event: {kind}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            # on disconnect Starlette drops this generator; close the reply stream
+            # (and the upstream call under it) right away
+            await replies.aclose()
+
+    # no-cache + X-Accel-Buffering: proxies (Render's included) must not hold tokens back
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
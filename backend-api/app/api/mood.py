@@ -1,76 +1,74 @@
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from typing import Any
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 
-from app.services.firebase_service import firestore_db, verify_firebase_bearer, env_timezone
+from app.models.mood import MoodIn
+from app.services.firebase_service import firestore_client, verify_firebase_bearer, env_timezone
+from app.services.mood_rollups import on_mood_written, read_days, summarize_days
+from app.services.mood_store import MoodReads, moods_ref, week_bounds
+from app.utils.validators import mood_score_guard
 
 router = APIRouter(prefix="/mood", tags=["mood"])
 
 
 @router.get("/weekly")
-async def weekly_insights(authorization: str = Header(default=""), weeks: int = 1):
+def weekly_insights(
+    authorization: str = Header(default=""),
+    weeks: int = Query(default=1, ge=1, le=52),
+    db: Any = Depends(firestore_client),
+):
     """
     I compute weekly mood stats from Firestore moods.
     Path: users/{uid}/moods/{moodDocId}
+
+    Finished weeks come from their rollup doc (one read per week, see
+    mood_rollups.py); only the running week is read from the raw moods
+    (range query, projected to timestamp + moodScore). "reads" says how many
+    documents that cost.
+    Plain def on purpose: the Firestore client is blocking, so FastAPI runs
+    this in its threadpool instead of on the event loop.
     """
 
     try:
-        uid = verify_firebase_bearer(authorization)
+        uid = verify_firebase_bearer(authorization)["uid"]
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
 
     tz_name = env_timezone()
     tz = ZoneInfo(tz_name)
+    start, end = week_bounds(tz, weeks)
 
-    now_local = datetime.now(timezone.utc).astimezone(tz)
-    start = (now_local - timedelta(days=now_local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-    start = start - timedelta(days=7 * (weeks - 1))
-    end = start + timedelta(days=7 * weeks)
-
-    db = firestore_db()
-    moods = db.collection("users").document(uid).collection("moods").stream()
-
-    scores = []
-    per_day = {}
-
-    for m in moods:
-        d = m.to_dict() or {}
-        ts = d.get("timestamp")
-        score = d.get("moodScore")
-        if not ts or score is None:
-            continue
-
-        ts_local = ts.replace(tzinfo=timezone.utc).astimezone(tz)
-        if not (start <= ts_local < end):
-            continue
-
-        try:
-            s = int(score)
-        except Exception:
-            continue
-
-        scores.append(s)
-        key = ts_local.date().isoformat()
-        per_day.setdefault(key, []).append(s)
-
-    if not scores:
-        return {
-            "range": {"start": start.date().isoformat(), "end": end.date().isoformat(), "tz": tz_name},
-            "mood": {"count": 0, "avg": None, "min": None, "max": None, "points": []},
-        }
-
-    points = []
-    for day in sorted(per_day.keys()):
-        a = sum(per_day[day]) / len(per_day[day])
-        points.append({"date": day, "avg": round(a, 2)})
+    reads = MoodReads()
+    mood = summarize_days(read_days(db, uid, start, end, tz, reads=reads))
 
     return {
         "range": {"start": start.date().isoformat(), "end": end.date().isoformat(), "tz": tz_name},
-        "mood": {
-            "count": len(scores),
-            "avg": round(sum(scores) / len(scores), 2),
-            "min": min(scores),
-            "max": max(scores),
-            "points": points
-        }
+        "mood": mood,
+        "reads": reads.as_dict(),
     }
+
+
+@router.post("")
+def log_mood(
+    payload: MoodIn,
+    authorization: str = Header(default=""),
+    db: Any = Depends(firestore_client),
+):
+    """
+    I store a mood the same way the iOS app does (users/{uid}/moods) and
+    rebuild that week's rollups right away.
+    """
+    try:
+        uid = verify_firebase_bearer(authorization)["uid"]
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid Firebase token")
+
+    now = datetime.now(timezone.utc)
+    _, ref = moods_ref(db, uid).add({
+        "timestamp": now,
+        "moodScore": mood_score_guard(payload.moodScore),
+        "note": payload.note or "",
+    })
+    week = on_mood_written(db, uid, now, ZoneInfo(env_timezone()))
+    return {"saved": True, "id": ref.id, "week": week["week"]}
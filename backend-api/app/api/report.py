@@ -1,61 +1,60 @@
-import uuid
-from datetime import datetime, timezone
-from fastapi import APIRouter, Header, HTTPException
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
 
-from app.services.firebase_service import firestore_db, verify_firebase_bearer
-from app.services.encryption_service import pack_private_report
+from app.services.firebase_service import firestore_client, verify_firebase_bearer
+from app.services.report_jobs import report_jobs
+from app.services.work_pool import PoolSaturated
 
 router = APIRouter(prefix="/report", tags=["report"])
 
 
-@router.post("")
-async def make_report(authorization: str = Header(default=""), weeks: int = 1):
-    """
-    For today:
-    - I generate a simple text report.
-    - I store it in Firestore under users/{uid}/reports/{reportId}.
-    """
-
+def _report_user(authorization: str) -> str:
     try:
-        uid = verify_firebase_bearer(authorization)
+        return verify_firebase_bearer(authorization)["uid"]
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
 
-    db = firestore_db()
-    moods = db.collection("users").document(uid).collection("moods").stream()
-
-    scores = []
-    for m in moods:
-        d = m.to_dict() or {}
-        if d.get("moodScore") is None:
-            continue
-        try:
-            scores.append(int(d["moodScore"]))
-        except Exception:
-            pass
-
-    avg = round(sum(scores) / len(scores), 2) if scores else None
-
-    report_text = (
-        f"Nuvio Weekly Report ({weeks} week(s))\n"
-        f"Generated: {datetime.now(timezone.utc).isoformat()}\n\n"
-        f"- Entries: {len(scores)}\n"
-        f"- Avg mood: {avg}\n"
-        f"- Min: {min(scores) if scores else None}\n"
-        f"- Max: {max(scores) if scores else None}\n\n"
-        "Disclaimer: informational only, not medical advice.\n"
-    )
 
-    report_id = "rep_" + str(uuid.uuid4())
+@router.post("", status_code=202)
+async def make_report(
+    authorization: str = Header(default=""),
+    idempotency_key: Optional[str] = Header(default=None, max_length=200),
+    weeks: int = Query(default=1, ge=1, le=52),
+    db: Any = Depends(firestore_client),
+):
+    """
+    I queue the report instead of building it inside the request:
+    - returns a job id right away; poll GET /report/{jobId}
+    - the job reads `weeks` weeks of mood rollups, writes the report to
+      users/{uid}/reports/{reportId} and packs it
+    - same Idempotency-Key header -> same job; unchanged data -> same report
+    """
+    uid = _report_user(authorization)
 
-    db.collection("users").document(uid).collection("reports").document(report_id).set({
-        "id": report_id,
-        "timestamp": datetime.now(timezone.utc),
-        "weeks": weeks,
-        "content": report_text
-    })
+    try:
+        job, created = await report_jobs.submit(db, uid, weeks, idempotency_key=idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Report queue is full, please retry.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    return JSONResponse(
+        status_code=202 if created else 200,
+        content=job.public(),
+        headers={"Location": f"/report/{job.id}"},
+    )
 
-    # I also give a packed version (base64) for easy transport.
-    packed = pack_private_report(report_text)
 
-    return {"reportId": report_id, "content": report_text, "packed": packed}
+@router.get("/{job_id}")
+async def report_status(job_id: str, authorization: str = Header(default="")):
+    # status is queued / running / done (with "result") / failed (with "error")
+    uid = _report_user(authorization)
+    job = report_jobs.get(job_id, uid)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown report job")
+    return job.public()
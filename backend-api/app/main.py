@@ -1,3 +1,7 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from app.firebase_admin_box import firestore_bag
 from fastapi import FastAPI
 
@@ -8,6 +12,29 @@ from app.api.mood import router as mood_router
 from app.api.report import router as report_router
 from app.api.assessments import router as assessments_router
 from app.api.ai import router as ai_router
+from app.services.ai_bridge import rec_batch_pool, rec_pool
+from app.services.assessment_service import assessment_registry
+from app.services.firebase_service import keep_signing_certs_warm, token_cache
+from app.services.llm_client import llm_pool
+from app.services.report_jobs import report_jobs
+
+
+@asynccontextmanager
+async def backend_lifespan(_app: FastAPI):
+    # I keep process-wide resources here so they are released when uvicorn stops.
+    # A broken assessment file should stop the deploy, not the first user who opens it.
+    assessment_registry.load()
+    llm_pool.start()
+    await report_jobs.start()
+    cert_refresh_s = float(os.getenv("FIREBASE_CERT_REFRESH_S", "3600"))
+    certs = asyncio.create_task(keep_signing_certs_warm(cert_refresh_s)) if cert_refresh_s > 0 else None
+    yield
+    if certs is not None:
+        certs.cancel()
+    await report_jobs.stop()
+    await llm_pool.aclose()
+    rec_pool.shutdown()
+    rec_batch_pool.shutdown()
 
 
 def build_backend_app() -> FastAPI:
@@ -16,6 +43,7 @@ def build_backend_app() -> FastAPI:
     core_api = FastAPI(
         title="Nuvio Backend API",
         version="0.1.0",
+        lifespan=backend_lifespan,
     )
 
     # I register routers here so endpoints are organized by feature/module.
@@ -39,7 +67,8 @@ def build_backend_app() -> FastAPI:
     # usually use something like this to check if the service is running.
     @core_api.get("/health")
     def health_probe():
-        return {"ok": True, "service": "backend-api"}
+        # authCache: verified-token cache counters (hits skip signature verification)
+        return {"ok": True, "service": "backend-api", "authCache": token_cache.stats()}
 
     return core_api
 
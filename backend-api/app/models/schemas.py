@@ -20,3 +20,12 @@ class ChatOut(BaseModel):
 
     # I attach extra info for debugging and UI decisions (tags/tone/etc).
     metadata: Dict[str, Any] = {}
+
+
+class RecommendBatchIn(BaseModel):
+    # I cap the list so one request can't hold the batch pool forever.
+    user_ids: List[str] = Field(..., min_length=1, max_length=100_000)
+    k: int = Field(10, ge=1, le=50)
+
+    # Push jobs usually don't show explanations, so they can switch them off.
+    explain: bool = True
@@ -1,9 +1,16 @@
 # backend-api/app/services/ai_bridge.py
 from __future__ import annotations
 
+import asyncio
+import itertools
+import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from app.services.work_pool import PoolSaturated, pool_from_env
 
 # Path layout (based on your screenshot):
 #   REPO_ROOT/
@@ -25,40 +32,217 @@ if not AI_ENGINE_DIR.exists():
 if str(AI_ENGINE_DIR) not in sys.path:
     sys.path.insert(0, str(AI_ENGINE_DIR))
 
+# I resolve the default against ai-engine so it works no matter where uvicorn is started from.
+DEFAULT_MODEL_DIR = AI_ENGINE_DIR / "models" / "recommendation" / "latest"
+
+
+# -------- Recommendation cache --------
+class RecommendationCache:
+    """
+    Small thread-safe LRU for recommendation responses.
+    Keys are (model_dir, model_version, user_id, k, explain), so a new model version
+    can never be served stale results; entries of old versions are also
+    dropped as soon as the registry swaps the model.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def drop_model(self, model_dir: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k[0] == model_dir]:
+                del self._data[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+rec_cache = RecommendationCache(int(os.getenv("REC_CACHE_SIZE", "10000")))
+# Scoring runs here, not in Starlette's shared threadpool (REC_POOL_WORKERS / REC_POOL_MAX_PENDING).
+rec_pool = pool_from_env("rec", "REC_POOL")
+# Bulk jobs get their own small pool so they can't crowd out interactive requests.
+rec_batch_pool = pool_from_env("rec-batch", "REC_BATCH_POOL", workers=1, pending_per_worker=4)
+_swap_listener_lock = threading.Lock()
+_swap_listener_added = False
+
+
+def _watch_model_swaps() -> None:
+    # I hook the cache into the registry once, so a model swap clears that model's entries.
+    global _swap_listener_added
+    if _swap_listener_added:
+        return
+    with _swap_listener_lock:
+        if _swap_listener_added:
+            return
+        from inference.model_registry import get_registry  # type: ignore
+
+        get_registry().on_swap(lambda model_dir, old, new: rec_cache.drop_model(str(model_dir)))
+        _swap_listener_added = True
+
 
 # -------- Recommendation bridge --------
 def get_recommendations(
     user_id: str,
     k: int = 10,
     model_dir: Optional[str] = None,
+    explain: bool = True,
 ) -> Dict[str, Any]:
     """
     Calls ai-engine recommendation inference and returns JSON-serializable dict.
 
     model_dir:
-      - default uses ai-engine/models/recommendation/latest (relative to ai-engine root)
+      - default uses ai-engine/models/recommendation/latest
       - you can pass an absolute path if you want
+
+    explain=False skips the explanation pass; results then carry no
+    explanation / because fields (cheaper for feeds that don't show them).
+
+    The model itself comes from the ai-engine model registry, so it is loaded
+    once per process and hot-swapped when new artifacts are written. Repeat
+    requests for the same (model version, user, k, explain) are served from rec_cache.
     """
     if model_dir is None:
-        model_dir = "models/recommendation/latest"
+        model_dir = str(DEFAULT_MODEL_DIR)
 
     # Import here (lazy import) so backend can still boot even if ai-engine deps are missing,
     # until this function is actually called.
+    from inference.model_registry import get_model  # type: ignore
     from inference.predict import recommend  # type: ignore
 
-    resp = recommend(user_id=user_id, k=k, model_dir=model_dir)
+    _watch_model_swaps()
+    loaded = get_model(model_dir)
+    cached = rec_cache.get((str(loaded.model_dir), loaded.version, user_id, k, explain))
+    if cached is not None:
+        return cached.model_dump()
+
+    resp = recommend(user_id=user_id, k=k, model_dir=model_dir, explain=explain)
+    # I key on the version that actually produced the answer (a swap may have happened in between)
+    rec_cache.put((str(loaded.model_dir), resp.model_version, user_id, k, explain), resp)
     return resp.model_dump()
 
 
+async def get_recommendations_async(
+    user_id: str,
+    k: int = 10,
+    model_dir: Optional[str] = None,
+    explain: bool = True,
+) -> Dict[str, Any]:
+    """
+    Same as get_recommendations, for async routes: the work goes to rec_pool,
+    and identical requests already in flight share one computation.
+    Raises PoolSaturated when the pool's queue is full.
+    """
+    if model_dir is None:
+        model_dir = str(DEFAULT_MODEL_DIR)
+    key = (model_dir, user_id, k, explain)
+    return await rec_pool.run(key, get_recommendations, user_id, k, model_dir, explain)
+
+
+async def open_recommendation_stream(
+    user_ids: Sequence[str],
+    k: int = 10,
+    model_dir: Optional[str] = None,
+    explain: bool = True,
+    batch_size: int = 256,
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON for bulk jobs: one RecommendResponse per line, in input order.
+    Users are scored batch_size at a time through inference.predict.recommend_many
+    on rec_batch_pool. The first chunk is scored before this returns, so a
+    missing model or a full pool still surfaces as an error, not a cut stream.
+    Bulk results skip rec_cache (they would only evict interactive entries).
+    """
+    if model_dir is None:
+        model_dir = str(DEFAULT_MODEL_DIR)
+
+    from inference.predict import recommend_many  # type: ignore
+
+    it = recommend_many(user_ids, k=k, model_dir=model_dir, explain=explain, batch_size=batch_size)
+    step = itertools.count()
+    closed: List[bool] = []  # set once lines() is closed; nothing is submitted after that
+
+    def next_chunk() -> List[Any]:
+        return list(itertools.islice(it, batch_size))
+
+    async def pull(wait_if_full: bool) -> bytes:
+        while not closed:
+            try:
+                rows = await rec_batch_pool.run((id(it), next(step)), next_chunk)
+                return "".join(r.model_dump_json() + "\n" for r in rows).encode("utf-8")
+            except PoolSaturated as e:
+                if not wait_if_full:
+                    raise
+                # I'm already streaming, so I wait for room instead of failing halfway
+                await asyncio.sleep(e.retry_after)
+        return b""
+
+    first = await pull(wait_if_full=False)
+
+    async def lines() -> AsyncIterator[bytes]:
+        # scored lazily: a chunk is only submitted to the pool once the previous
+        # one was sent, so closing this generator stops the rest of the batch
+        chunk = first
+        try:
+            while chunk:
+                yield chunk
+                chunk = await pull(wait_if_full=True)
+        finally:
+            closed.append(True)
+
+    return lines()
+
+
 # -------- Optional: Health check helper --------
 def ai_engine_healthcheck() -> Dict[str, Any]:
     """
     Basic sanity check: verifies ai-engine exists + model folder presence.
-    Does NOT guarantee model files are correct; just a quick debug tool.
+    Also lists the models the registry currently holds (version, load time,
+    memory). Does NOT load a model just to answer the health check.
     """
-    model_path = AI_ENGINE_DIR / "models" / "recommendation" / "latest"
-    return {
+    model_path = DEFAULT_MODEL_DIR
+    out: Dict[str, Any] = {
         "ai_engine_dir": str(AI_ENGINE_DIR),
         "model_dir": str(model_path),
         "model_dir_exists": model_path.exists(),
     }
+
+    try:
+        from inference.model_registry import get_registry  # type: ignore
+
+        out["models"] = get_registry().stats()
+        out["rec_cache"] = rec_cache.stats()
+        out["rec_pool"] = rec_pool.stats()
+        out["rec_batch_pool"] = rec_batch_pool.stats()
+    except Exception as e:
+        # ai-engine deps missing: health still answers
+        out["models"] = []
+        out["registry_error"] = f"{type(e).__name__}: {e}"
+    return out
@@ -3,22 +3,31 @@ from __future__ import annotations
 
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import httpx
-from openai import OpenAI
+# ai_bridge puts ai-engine on sys.path; the keyword matcher lives there so the
+# emotion fallback and this chat fallback share one engine.
+from app.services import ai_bridge  # noqa: F401
+from app.services.chat_cache import chat_cache
+from app.services.chat_context import context_builder
+from app.services.llm_client import llm_pool
+from inference.keyword_matcher import KeywordMatcher  # type: ignore
+
+# I compile the fallback vocabulary once; "word*" matches any word starting with it.
+REPLY_KEYWORDS = {
+    "stress": ["anx*", "overwhelm*", "stress*"],
+}
+_reply_matcher = KeywordMatcher(REPLY_KEYWORDS)
 
 
 def _rule_based_reply(user_text: str) -> Dict[str, Any]:
     # I keep a tiny fallback so the app never "silently fails".
     # This is NOT real AI, just a safety net.
-    text = user_text.strip().lower()
-    if "anx" in text or "overwhelm" in text or "stress" in text:
+    tags = _reply_matcher.categories(user_text)
+    if "stress" in tags:
         assistant = "I hear you. Want to tell me what’s making it feel the most overwhelming right now?"
-        tags = ["stress"]
     else:
         assistant = "I’m here with you. What’s on your mind today?"
-        tags = []
 
     return {
         "assistantText": assistant,
@@ -30,7 +39,46 @@ def _rule_based_reply(user_text: str) -> Dict[str, Any]:
     }
 
 
-def generate_chat_reply(
+SYSTEM_PROMPT = (
+    "You are a supportive mental health companion. "
+    "Be kind, practical, and ask one short follow-up question. "
+    "Do NOT claim to be a licensed therapist. "
+    "If user seems in immediate danger, advise contacting local emergency services."
+)
+
+
+# sampling params; part of the chat cache key
+LLM_PARAMS = {"temperature": 0.7, "max_tokens": 220}
+
+
+def _chat_model() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
+
+
+def _build_messages(
+    user_text: str,
+    history: Optional[List[Dict[str, str]]],
+    *,
+    user_id: str,
+    conversation_id: Optional[str],
+) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    # I keep history within a token budget (older turns get summarized), so
+    # long journal-style conversations don't make every turn slower and pricier.
+    return context_builder.build(SYSTEM_PROMPT, history, user_text, conversation_id=conversation_id, user_id=user_id)
+
+
+def _openai_reply(assistant_text: str, model: str, debug: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "assistantText": assistant_text,
+        "metadata": {
+            "tags": [],
+            "tone": "supportive",
+            "debug": {"provider": "openai", "model": model, **debug},
+        },
+    }
+
+
+async def generate_chat_reply(
     user_text: str,
     *,
     user_id: str,
@@ -39,77 +87,137 @@ def generate_chat_reply(
 ) -> Dict[str, Any]:
     """
     I generate a chat reply here.
-    - If OPENAI_API_KEY exists, I try real LLM.
+    - If OPENAI_API_KEY exists, I try real LLM (async, so a slow model call
+      never blocks the other requests on this worker).
     - If anything goes wrong, I fall back to rule-based so the endpoint still responds.
     """
-    api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
+    model = _chat_model()
 
-    if not api_key:
-        # I don't want prod to crash if the key is missing.
-        return _rule_based_reply(user_text)
+    try:
+        # I reuse the process-wide pooled client (see llm_client.py) instead of
+        # building a new httpx + OpenAI client (and a new TLS handshake) per turn.
+        client = llm_pool.client()
+        if client is None:
+            # I don't want prod to crash if the key is missing.
+            return _rule_based_reply(user_text)
 
-    # I keep timeouts tight because Render free instances can hang easily.
-    timeout = httpx.Timeout(connect=10.0, read=35.0, write=10.0, pool=10.0)
+        messages, context = _build_messages(user_text, history, user_id=user_id, conversation_id=conversation_id)
 
-    started = time.time()
+        async def ask_llm() -> Tuple[Dict[str, Any], int]:
+            with llm_pool.timed() as timing:
+                resp = await client.chat.completions.create(model=model, messages=messages, **LLM_PARAMS)
 
-    try:
-        # IMPORTANT: OpenAI() must be called with keyword args (api_key=...).
-        client = OpenAI(
-            api_key=api_key,
-            http_client=httpx.Client(timeout=timeout),
-        )
-
-        messages: List[Dict[str, str]] = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a supportive mental health companion. "
-                    "Be kind, practical, and ask one short follow-up question. "
-                    "Do NOT claim to be a licensed therapist. "
-                    "If user seems in immediate danger, advise contacting local emergency services."
-                ),
-            }
-        ]
-
-        # I optionally include short chat history for continuity.
-        if history:
-            for m in history[-10:]:
-                role = m.get("role")
-                content = m.get("content")
-                if role in ("user", "assistant") and content:
-                    messages.append({"role": role, "content": content})
-
-        messages.append({"role": "user", "content": user_text})
-
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=220,
-        )
-
-        assistant_text = (resp.choices[0].message.content or "").strip()
-        if not assistant_text:
-            # I treat empty output as failure and use fallback.
-            return _rule_based_reply(user_text)
+            assistant_text = (resp.choices[0].message.content or "").strip()
+            if not assistant_text:
+                # I treat empty output as failure (and never cache it).
+                raise RuntimeError("empty completion")
+
+            # tookMs = connectMs (TCP + TLS, 0 on a reused connection) + modelMs
+            debug = timing.as_debug()
+            if resp.usage is not None:
+                debug["promptTokensBilled"] = resp.usage.prompt_tokens
+            return _openai_reply(assistant_text, model, debug), debug["tookMs"]
+
+        if not chat_cache.cacheable(history):
+            reply, _ = await ask_llm()
+            reply["metadata"]["debug"].update(cache={"status": "bypass"}, context=context)
+            return reply
 
-        took_ms = int((time.time() - started) * 1000)
-
-        return {
-            "assistantText": assistant_text,
-            "metadata": {
-                "tags": [],
-                "tone": "supportive",
-                "debug": {
-                    "provider": "openai",
-                    "model": model,
-                    "tookMs": took_ms,
-                },
-            },
-        }
+        started = time.perf_counter()
+        key = chat_cache.key(model, messages, **LLM_PARAMS)
+        reply, status, saved_ms = await chat_cache.get_or_compute(key, ask_llm)
+        _note_cache(reply, status, saved_ms, started)
+        reply["metadata"]["debug"]["context"] = context
+        return reply
 
     except Exception:
         # I don't want one provider failure to kill the whole endpoint.
         return _rule_based_reply(user_text)
+
+
+def _note_cache(reply: Dict[str, Any], status: str, saved_ms: int, started: float) -> None:
+    debug = reply["metadata"]["debug"]
+    if status != "miss":
+        # a cache hit or a shared upstream call: this request's own wait is what counts
+        debug.update(tookMs=int((time.perf_counter() - started) * 1000), connectMs=0, modelMs=0)
+    stats = chat_cache.stats()
+    debug["cache"] = {
+        "status": status,
+        "savedMs": saved_ms,
+        "hitRate": stats["hit_rate"],
+        "savedMsTotal": stats["saved_ms"],
+    }
+
+
+async def stream_chat_reply(
+    user_text: str,
+    *,
+    user_id: str,
+    conversation_id: Optional[str] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Same reply as generate_chat_reply, but yielded as it is generated:
+      {"type": "token", "text": "..."}   any number of times
+      {"type": "done", "assistantText": ..., "metadata": ...}   exactly once, last
+    If the provider fails before the first token I stream the rule-based reply
+    instead; if it fails halfway I close with what arrived so far. Cached
+    replies come back as a single token; streams aren't coalesced.
+    """
+    model = _chat_model()
+    parts: List[str] = []
+
+    try:
+        client = llm_pool.client()
+        if client is None:
+            raise RuntimeError("no LLM client configured")
+
+        messages, context = _build_messages(user_text, history, user_id=user_id, conversation_id=conversation_id)
+        key = None
+        if chat_cache.cacheable(history):
+            started = time.perf_counter()
+            key = chat_cache.key(model, messages, **LLM_PARAMS)
+            cached = chat_cache.get(key)
+            if cached is not None:
+                reply, saved_ms = cached
+                _note_cache(reply, "hit", saved_ms, started)
+                reply["metadata"]["debug"]["context"] = context
+                yield {"type": "token", "text": reply["assistantText"]}
+                yield {"type": "done", **reply}
+                return
+
+        with llm_pool.timed() as timing:
+            stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **LLM_PARAMS)
+
+        first_token_ms = None
+        try:
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if not text:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = int(timing.total_s * 1000)
+                parts.append(text)
+                yield {"type": "token", "text": text}
+        finally:
+            # a client that disconnects closes this generator mid-stream: the upstream
+            # response (and its pooled connection) goes back now, not whenever GC runs
+            await stream.close()
+
+        assistant_text = "".join(parts).strip()
+        if not assistant_text:
+            raise RuntimeError("empty completion")
+        reply = _openai_reply(assistant_text, model, {**timing.as_debug(), "firstTokenMs": first_token_ms, "context": context})
+        if key is not None:
+            chat_cache.put(key, reply, reply["metadata"]["debug"]["tookMs"])
+            _note_cache(reply, "miss", 0, 0.0)
+        yield {"type": "done", **reply}
+
+    except Exception as e:
+        if parts:
+            # the user already saw part of the answer; I don't swap it for a canned one
+            reply = _openai_reply("".join(parts).strip(), model, {"interrupted": type(e).__name__})
+        else:
+            reply = _rule_based_reply(user_text)
+            yield {"type": "token", "text": reply["assistantText"]}
+        yield {"type": "done", **reply}
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import bisect
+import copy
+import hashlib
 import json
+import os
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-ASSESS_DIR = Path(__file__).resolve().parents[1] / "data" / "assessments"
+ASSESS_DIR = Path(os.getenv("ASSESS_DIR", str(Path(__file__).resolve().parents[2] / "data" / "assessment")))
 
 SUPPORTED = {
     "phq9": "phq9.json",
@@ -13,22 +18,125 @@ SUPPORTED = {
     "scl90_short": "scl90_short.json",
 }
 
+# Interpretation bands: (highest total in the band, level), ascending.
+# Simple interpretations (demo-safe, NOT diagnosis).
+BANDS: Dict[str, Tuple[Tuple[int, str], ...]] = {
+    # PHQ-9 total 0-27
+    "phq9": ((4, "minimal"), (9, "mild"), (14, "moderate"), (19, "moderately_severe"), (27, "severe")),
+}
+
+NOTES = {
+    "phq9": "This is a screening score, not a diagnosis.",
+    "who5": "Higher scores indicate better well-being (screening, not diagnosis).",
+    "scl90_short": "Demo short form (not clinical).",
+}
+
+
+@dataclass(frozen=True)
+class Assessment:
+    """One definition, validated and precompiled; never changes after load."""
+
+    name: str
+    definition: Dict[str, Any]          # the JSON as the iOS app gets it
+    question_ids: Tuple[str, ...]
+    question_set: FrozenSet[str]
+    scale_min: int
+    scale_max: int
+    band_limits: Tuple[int, ...]        # bisect over these ...
+    band_levels: Tuple[str, ...]        # ... to get the level
+    body: bytes                         # the definition serialized once, served as is
+    etag: str
+
+    def level(self, total: int) -> Optional[str]:
+        if not self.band_limits:
+            return None
+        i = bisect.bisect_left(self.band_limits, total)
+        return self.band_levels[min(i, len(self.band_levels) - 1)]
+
+
+def compile_assessment(name: str, definition: Dict[str, Any]) -> Assessment:
+    """Validates a definition and builds its lookup structures; raises ValueError on a bad file."""
+    if definition.get("name") != name:
+        raise ValueError(f"{name}: file says name={definition.get('name')!r}")
+    try:
+        mn, mx = int(definition["scale"]["min"]), int(definition["scale"]["max"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{name}: scale needs integer min and max")
+    if mn > mx:
+        raise ValueError(f"{name}: scale min {mn} > max {mx}")
+
+    questions = definition.get("questions") or []
+    qids = tuple(q.get("id") for q in questions if isinstance(q, dict))
+    if not qids or len(qids) != len(questions) or not all(isinstance(q, str) and q for q in qids):
+        raise ValueError(f"{name}: every question needs a non-empty id")
+    if len(set(qids)) != len(qids):
+        raise ValueError(f"{name}: duplicate question ids")
+
+    bands = BANDS.get(name, ())
+    if bands and bands[-1][0] < mx * len(qids):
+        raise ValueError(f"{name}: interpretation bands stop at {bands[-1][0]}, max total is {mx * len(qids)}")
+
+    body = json.dumps(definition, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Assessment(
+        name=name,
+        definition=definition,
+        question_ids=qids,
+        question_set=frozenset(qids),
+        scale_min=mn,
+        scale_max=mx,
+        band_limits=tuple(limit for limit, _ in bands),
+        band_levels=tuple(level for _, level in bands),
+        body=body,
+        etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+    )
+
+
+class AssessmentRegistry:
+    """
+    Every supported assessment, read from disk and validated once (at
+    startup via load(), or on first use), then served from memory.
+    A broken definition fails load() instead of the first user who opens it.
+    """
+
+    def __init__(self, directory: Path = ASSESS_DIR, files: Optional[Dict[str, str]] = None):
+        self.directory = Path(directory)
+        self.files = dict(files or SUPPORTED)
+        self._items: Optional[Dict[str, Assessment]] = None
+
+    def load(self) -> Dict[str, Assessment]:
+        items = {}
+        for name, filename in self.files.items():
+            path = self.directory / filename
+            with path.open("r", encoding="utf-8") as f:
+                items[name] = compile_assessment(name, json.load(f))
+        self._items = items
+        return items
+
+    def get(self, name: str) -> Assessment:
+        items = self._items
+        if items is None:
+            # no lifespan (scripts, bare tests); two threads racing here both load the same files
+            items = self.load()
+        try:
+            return items[name]
+        except KeyError:
+            raise ValueError(f"Unknown assessment: {name}")
+
+    def names(self) -> List[str]:
+        return list(self.files)
+
+
+assessment_registry = AssessmentRegistry()
+
+
 def load_assessment(name: str) -> Dict[str, Any]:
-    if name not in SUPPORTED:
-        raise ValueError(f"Unknown assessment: {name}")
-    path = ASSESS_DIR / SUPPORTED[name]
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-def validate_answers(assessment: Dict[str, Any], answers: Dict[str, int]) -> Tuple[bool, List[str]]:
-    missing = []
-    qids = [q["id"] for q in assessment["questions"]]
-    for qid in qids:
-        if qid not in answers:
-            missing.append(qid)
-
-    mn = int(assessment["scale"]["min"])
-    mx = int(assessment["scale"]["max"])
+    # a copy, so a caller editing it can't change what everyone else is served
+    return copy.deepcopy(assessment_registry.get(name).definition)
+
+
+def validate_answers(assessment: Assessment, answers: Dict[str, int]) -> Tuple[bool, List[str]]:
+    missing = [qid for qid in assessment.question_ids if qid not in answers]
+    mn, mx = assessment.scale_min, assessment.scale_max
     bad = [k for k, v in answers.items() if not isinstance(v, int) or v < mn or v > mx]
 
     errors = []
@@ -38,36 +146,42 @@ def validate_answers(assessment: Dict[str, Any], answers: Dict[str, int]) -> Tup
         errors.append(f"Out-of-range answers: {bad[:5]}{'...' if len(bad)>5 else ''}")
     return (len(errors) == 0), errors
 
-def score_assessment(name: str, answers: Dict[str, int]) -> Dict[str, Any]:
-    a = load_assessment(name)
+
+def _score(a: Assessment, answers: Dict[str, int], ts: int) -> Dict[str, Any]:
     ok, errors = validate_answers(a, answers)
     if not ok:
         return {"ok": False, "errors": errors}
 
     total = sum(int(v) for v in answers.values())
-    result: Dict[str, Any] = {"ok": True, "name": name, "total_score": total}
-
-    # Simple interpretations (demo-safe, NOT diagnosis)
-    if name == "phq9":
-        # PHQ-9 total 0-27
-        if total <= 4: level = "minimal"
-        elif total <= 9: level = "mild"
-        elif total <= 14: level = "moderate"
-        elif total <= 19: level = "moderately_severe"
-        else: level = "severe"
-        result["level"] = level
+    result: Dict[str, Any] = {"ok": True, "name": a.name, "total_score": total}
+
+    if a.name == "phq9":
+        result["level"] = a.level(total)
         # Q9 self-harm signal (not diagnosis, just flag)
-        q9 = int(answers.get("phq9_q9", 0))
-        result["safety_flag"] = q9 >= 1
-        result["note"] = "This is a screening score, not a diagnosis."
-    elif name == "who5":
+        result["safety_flag"] = answers.get("phq9_q9", 0) >= 1
+    elif a.name == "who5":
         # WHO-5 raw 0-25; common to scale *4 to 0-100
         result["score_0_100"] = total * 4
-        result["note"] = "Higher scores indicate better well-being (screening, not diagnosis)."
     else:
         # scl90_short
         result["avg_item_score"] = round(total / max(len(answers), 1), 3)
-        result["note"] = "Demo short form (not clinical)."
+    result["note"] = NOTES.get(a.name, "")
 
-    result["ts"] = int(time.time())
+    result["ts"] = ts
     return result
+
+
+def score_assessment(name: str, answers: Dict[str, int]) -> Dict[str, Any]:
+    return _score(assessment_registry.get(name), answers, int(time.time()))
+
+
+def score_many(name: str, answer_sets: Iterable[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """
+    Scores many submissions of one assessment (bulk rescoring after a band
+    or scoring change): the definition is looked up once and every result
+    carries the same ts. Results come back in input order; invalid
+    submissions get their {"ok": False, "errors": ...} in place.
+    """
+    a = assessment_registry.get(name)
+    ts = int(time.time())
+    return [_score(a, answers, ts) for answers in answer_sets]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    # "I feel stressed." and "i feel  stressed" are the same check-in
+    return _SPACES.sub(" ", (text or "").casefold()).strip().rstrip(".!?… ")
+
+
+class ChatReplyCache:
+    """
+    TTL + LRU cache for LLM chat replies, with in-flight coalescing.
+
+    - only short conversations are cached (at most max_history earlier
+      messages): quick check-ins like "I feel stressed" repeat a lot, long
+      conversations practically never do
+    - the key is a hash of (model, params, system prompt, trimmed history,
+      user text), every text normalized (case, whitespace, end punctuation)
+    - identical requests arriving while the first one is still waiting on
+      the provider share that one upstream call
+    - failures are never cached, so a provider outage doesn't outlive itself
+
+    Like BoundedPool, I only touch the bookkeeping from the event loop, so it
+    needs no lock.
+    """
+
+    def __init__(self, maxsize: int = 2000, ttl_s: float = 600.0, max_history: int = 2):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_s = float(ttl_s)
+        self.max_history = int(max_history)
+        # key -> (expires_at, reply, upstream_ms)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any], int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_ms = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    def cacheable(self, history: Optional[Sequence[Dict[str, str]]]) -> bool:
+        return self.enabled and len(history or []) <= self.max_history
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        payload = {
+            "model": model,
+            "params": params,
+            "messages": [[m.get("role"), normalize_text(m.get("content", ""))] for m in messages],
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """(reply copy, upstream ms it saved) or None; counts a hit or a miss."""
+        entry = self._data.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        self.saved_ms += entry[2]
+        return copy.deepcopy(entry[1]), entry[2]
+
+    def put(self, key: str, reply: Dict[str, Any], upstream_ms: int) -> None:
+        self._data[key] = (time.monotonic() + self.ttl_s, copy.deepcopy(reply), int(upstream_ms))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[Dict[str, Any], int]]],
+    ) -> Tuple[Dict[str, Any], str, int]:
+        """
+        Returns (reply, status, saved_ms) with status "hit", "coalesced" or "miss".
+        compute() returns (reply, upstream_ms) and raises on failure; the
+        exception reaches every coalesced caller.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], "hit", cached[1]
+
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            # shield: one caller disconnecting must not cancel the others' result
+            reply, _ = await asyncio.shield(fut)
+            return copy.deepcopy(reply), "coalesced", 0
+
+        async def run() -> Tuple[Dict[str, Any], int]:
+            try:
+                reply, upstream_ms = await compute()
+                self.put(key, reply, upstream_ms)
+                return reply, upstream_ms
+            finally:
+                self._inflight.pop(key, None)
+
+        # a task, so the upstream call finishes even if the first caller goes away
+        fut = asyncio.ensure_future(run())
+        self._inflight[key] = fut
+        reply, _ = await asyncio.shield(fut)
+        return copy.deepcopy(reply), "miss", 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "saved_ms": self.saved_ms,
+        }
+
+
+chat_cache = ChatReplyCache(
+    maxsize=int(os.getenv("CHAT_CACHE_SIZE", "2000")),
+    ttl_s=float(os.getenv("CHAT_CACHE_TTL_S", "600")),     # 0 turns the cache off
+    max_history=int(os.getenv("CHAT_CACHE_MAX_HISTORY", "2")),
+)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# chat format overhead per message and for priming the reply (OpenAI's counting recipe)
+MESSAGE_OVERHEAD = 4
+REPLY_PRIMING = 3
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s")
+
+
+def _load_tiktoken(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        enc = tiktoken.encoding_for_model(model)
+    except KeyError:
+        enc = tiktoken.get_encoding("o200k_base")
+    return enc
+
+
+class TokenCounter:
+    """
+    Exact counts with tiktoken when it is installed; otherwise an estimate.
+    The estimate is max(chars / 4, 1.3 tokens per word or punctuation mark):
+    ~4 chars per token is what OpenAI's tokenizers average on English prose,
+    and the per-word floor keeps short-word and non-English text (Turkish
+    suffixes, emoji) from being under-counted. It errs on the high side, which
+    is the safe side for a budget.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self._enc = _load_tiktoken(model)
+        self.name = "tiktoken" if self._enc is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._enc is not None:
+            return len(self._enc.encode(text))
+        return max(1, math.ceil(max(len(text) / 4, 1.3 * len(_WORDS.findall(text)))))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keeps the start of text, cut at a word boundary, within max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        if self._enc is not None:
+            cut = self._enc.decode(self._enc.encode(text)[:max_tokens])
+        else:
+            cut = text[: max_tokens * 4]
+            while cut and self.count(cut + " …") > max_tokens:
+                cut = cut[: int(len(cut) * 0.9)]
+        cut = cut.rsplit(" ", 1)[0] if " " in cut else cut
+        return cut.rstrip() + " …"
+
+    def messages(self, messages: Sequence[Dict[str, str]]) -> int:
+        return sum(MESSAGE_OVERHEAD + self.count(m.get("content", "")) for m in messages) + REPLY_PRIMING
+
+
+@dataclass
+class _Summary:
+    covered: int            # how many of the oldest history messages it covers
+    digest: str             # hash of those messages, to notice edited / different history
+    lines: List[str] = field(default_factory=list)
+
+
+def _digest(history: Sequence[Dict[str, str]]) -> str:
+    h = hashlib.sha256()
+    for m in history:
+        h.update(f"{m.get('role')}\x00{m.get('content', '')}\x01".encode("utf-8"))
+    return h.hexdigest()
+
+
+class ContextBuilder:
+    """
+    Builds the prompt for a chat turn within a token budget, so long
+    journal-style conversations don't make every turn slower and pricier.
+
+    prompt = system prompt + [summary of older turns] + recent turns + user text
+      - recent turns are added newest first while they fit history_tokens;
+        the first one that doesn't fit is cut short (if enough room is left)
+      - turns that didn't fit become a short extractive summary (the first
+        sentence of each), capped at summary_tokens, newest lines kept
+      - summaries are cached per conversation_id and extended incrementally
+        as more turns age out, so a long conversation isn't re-summarized on
+        every turn
+      - the system prompt and the user's own message are never cut
+
+    Env: CHAT_HISTORY_TOKENS (800), CHAT_SUMMARY_TOKENS (200),
+         CHAT_HISTORY_MESSAGES (40: at most this many aged-out messages are
+         summarized from scratch; older ones would be cut by the budget anyway).
+    """
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        history_tokens: int = 800,
+        summary_tokens: int = 200,
+        max_messages: int = 40,
+        cache_size: int = 5000,
+    ):
+        self.counter = counter or TokenCounter()
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.max_messages = max_messages
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[Hashable, _Summary]" = OrderedDict()
+        self.summary_hits = 0
+
+    @staticmethod
+    def _clean(history: Optional[Sequence[Dict[str, str]]]) -> List[Dict[str, str]]:
+        out = []
+        for m in history or []:
+            role, content = m.get("role"), m.get("content")
+            if role in ("user", "assistant") and content:
+                out.append({"role": role, "content": content})
+        return out
+
+    def _summary_line(self, m: Dict[str, str]) -> str:
+        first = _SENTENCE_END.split(m["content"].strip(), 1)[0]
+        who = "User" if m["role"] == "user" else "You"
+        return f"{who}: {self.counter.truncate(first, 40)}"
+
+    def _summarize(self, key: Optional[Hashable], older: List[Dict[str, str]]) -> Tuple[List[str], bool]:
+        """Summary lines for `older` (oldest first); True when the cache did most of the work."""
+        cached = self._summaries.get(key) if key is not None else None
+        reused = (
+            cached is not None
+            and cached.covered <= len(older)
+            and _digest(older[: cached.covered]) == cached.digest
+        )
+        if reused:
+            self.summary_hits += 1
+            lines = cached.lines + [self._summary_line(m) for m in older[cached.covered:][-self.max_messages:]]
+        else:
+            lines = [self._summary_line(m) for m in older[-self.max_messages:]]
+
+        # newest lines win; the summary stays within its own budget
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            cost = self.counter.count(line) + 1
+            if used + cost > self.summary_tokens:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+
+        if key is not None:
+            self._summaries[key] = _Summary(len(older), _digest(older), kept)
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return kept, reused
+
+    def build(
+        self,
+        system_prompt: str,
+        history: Optional[Sequence[Dict[str, str]]],
+        user_text: str,
+        conversation_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        turns = self._clean(history)
+
+        recent: List[Dict[str, str]] = []
+        left = self.history_tokens
+        cut_at = len(turns)
+        for m in reversed(turns):
+            cost = MESSAGE_OVERHEAD + self.counter.count(m["content"])
+            if cost <= left:
+                recent.append(m)
+                left -= cost
+                cut_at -= 1
+                continue
+            if left >= MESSAGE_OVERHEAD + 32:
+                # partly fits: keep its start rather than nothing
+                recent.append({"role": m["role"], "content": self.counter.truncate(m["content"], left - MESSAGE_OVERHEAD)})
+                cut_at -= 1
+            break
+        recent.reverse()
+
+        older = turns[:cut_at]
+        key = (user_id, conversation_id) if conversation_id else None
+        lines, reused = self._summarize(key, older) if older else ([], False)
+
+        messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+        if lines:
+            messages.append({"role": "system", "content": "Earlier in this conversation:\n" + "\n".join(lines)})
+        messages.extend(recent)
+        messages.append({"role": "user", "content": user_text})
+
+        info = {
+            "promptTokens": self.counter.messages(messages),
+            "tokenizer": self.counter.name,
+            "historyMessages": len(recent),
+            "summarizedMessages": len(older),
+            "summaryCached": reused,
+        }
+        return messages, info
+
+
+context_builder = ContextBuilder(
+    counter=TokenCounter(os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()),
+    history_tokens=int(os.getenv("CHAT_HISTORY_TOKENS", "800")),
+    summary_tokens=int(os.getenv("CHAT_SUMMARY_TOKENS", "200")),
+    max_messages=int(os.getenv("CHAT_HISTORY_MESSAGES", "40")),
+)
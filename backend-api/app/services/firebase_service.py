@@ -1,8 +1,18 @@
 # backend-api/app/services/firebase_service.py
 from __future__ import annotations
 
+import asyncio
+import copy
+import hashlib
+import logging
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # I make Firebase optional so the service can boot on Render even if credentials are missing.
 # If DEV_AUTH_BYPASS=true, I skip verification and DB entirely.
@@ -15,11 +25,102 @@ def env_timezone() -> str:
     return os.getenv("APP_TIMEZONE", "Europe/Istanbul")
 
 
+class TokenCache:
+    """
+    Verified Firebase ID tokens, so a token the iOS app sends again a few
+    seconds later skips signature verification.
+
+    - keyed by sha256(token): raw tokens are never kept
+    - an entry lives ttl_s seconds but never past the token's own exp
+    - LRU-bounded to maxsize entries; thread-safe (sync routes run in a threadpool)
+
+    The trade-off: a token revoked in Firebase stays accepted here for at
+    most ttl_s (verification never checked revocation before either).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl_s: float = 300.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_s = float(ttl_s)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        k = self.key(token)
+        with self._lock:
+            entry = self._data.get(k)
+            if entry is not None and entry[0] <= time.time():
+                del self._data[k]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(k)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, token: str, payload: Dict[str, Any], exp: Optional[float]) -> None:
+        if self.ttl_s <= 0:
+            return
+        expires_at = time.time() + self.ttl_s
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._data[self.key(token)] = (expires_at, copy.deepcopy(payload))
+            self._data.move_to_end(self.key(token))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+token_cache = TokenCache(
+    maxsize=int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000")),
+    ttl_s=float(os.getenv("FIREBASE_TOKEN_CACHE_TTL_S", "300")),     # 0 turns the cache off
+)
+
+
+@lru_cache(maxsize=1)
+def _firebase_auth() -> Any:
+    # I import and initialize firebase once, not on every request; still lazy so import-time never crashes.
+    import firebase_admin
+    from firebase_admin import auth
+
+    if not firebase_admin._apps:
+        # I expect GOOGLE_APPLICATION_CREDENTIALS or other Firebase default creds in prod.
+        firebase_admin.initialize_app()
+    return auth
+
+
+def _verify_id_token(token: str) -> Dict[str, Any]:
+    # the slow path: RS256 signature check against Google's certificates
+    return _firebase_auth().verify_id_token(token)
+
+
 def verify_firebase_bearer(auth_header: Optional[str]) -> Dict[str, Any]:
     """
     I verify Authorization: Bearer <token>.
     - In dev bypass, I return a fake user payload so endpoints can run.
-    - Otherwise, I try to verify using firebase_admin if configured.
+    - Otherwise, I try to verify using firebase_admin if configured;
+      tokens verified recently come from token_cache.
     """
     if os.getenv("DEV_AUTH_BYPASS", "false").lower() == "true":
         return {"uid": "dev-user", "email": "dev@local", "provider": "bypass"}
@@ -28,22 +129,89 @@ def verify_firebase_bearer(auth_header: Optional[str]) -> Dict[str, Any]:
     if not token:
         raise ValueError("Missing Bearer token")
 
-    # I import firebase lazily so import-time never crashes.
-    import firebase_admin
-    from firebase_admin import auth
-
-    if not firebase_admin._apps:
-        # I expect GOOGLE_APPLICATION_CREDENTIALS or other Firebase default creds in prod.
-        firebase_admin.initialize_app()
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
 
-    decoded = auth.verify_id_token(token)
+    decoded = _verify_id_token(token)
     # I normalize the payload a bit for my app.
-    return {
+    payload = {
         "uid": decoded.get("uid") or decoded.get("sub"),
         "email": decoded.get("email"),
         "provider": "firebase",
         "raw": decoded,
     }
+    token_cache.put(token, payload, decoded.get("exp"))
+    return payload
+
+
+# prefetch_signing_certs goes through firebase_admin internals; these are the
+# major versions it was checked against (requirements pin 6.5). Anything else
+# skips the warm-up with a warning; tokens still verify, the first ones just
+# fetch the certificates themselves.
+CERT_PREFETCH_FIREBASE_MAJORS = (6, 7)
+
+
+def prefetch_signing_certs() -> bool:
+    """
+    Fetches Google's ID-token signing certificates into firebase_admin's
+    verifier, whose HTTP cache then keeps them in memory (for the max-age
+    Google sends, hours). Called at startup and periodically from the app
+    lifespan, so no request pays for the fetch. Best effort: False when
+    Firebase isn't configured or the fetch fails; failures are logged.
+    """
+    if os.getenv("DEV_AUTH_BYPASS", "false").lower() == "true":
+        return False
+    if not (os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_CLOUD_PROJECT")):
+        # no credentials configured: initializing would just probe the GCE metadata server
+        return False
+
+    try:
+        import firebase_admin
+    except ImportError:
+        logger.warning("Signing cert prefetch skipped: firebase_admin is not installed")
+        return False
+
+    version = getattr(firebase_admin, "__version__", "unknown")
+    major = version.split(".", 1)[0]
+    if not major.isdigit() or int(major) not in CERT_PREFETCH_FIREBASE_MAJORS:
+        logger.warning(
+            "Signing cert prefetch skipped: firebase_admin %s is not a checked version %s",
+            version, CERT_PREFETCH_FIREBASE_MAJORS,
+        )
+        return False
+
+    try:
+        auth = _firebase_auth()
+        from firebase_admin import _token_gen
+
+        # firebase_admin keeps one verifier per app; its request object is the one with the cert cache
+        verifier = auth._get_client(firebase_admin.get_app())._token_verifier  # noqa: SLF001
+        resp = verifier.request(_token_gen.ID_TOKEN_CERT_URI)
+    except Exception:
+        logger.warning("Signing cert prefetch failed (firebase_admin %s)", version, exc_info=True)
+        return False
+    if resp.status != 200:
+        logger.warning("Signing cert prefetch got HTTP %s from Google", resp.status)
+        return False
+    return True
+
+
+async def keep_signing_certs_warm(interval_s: float) -> None:
+    """Lifespan task: prefetch now, then again every interval_s (FIREBASE_CERT_REFRESH_S)."""
+    while True:
+        await asyncio.to_thread(prefetch_signing_certs)
+        await asyncio.sleep(interval_s)
+
+
+def firestore_client() -> Any:
+    """
+    The Admin SDK Firestore client (created once, see firebase_admin_box).
+    Routes take it with Depends(firestore_client), so tests can swap in a stand-in.
+    """
+    from app.firebase_admin_box import firestore_bag
+
+    return firestore_bag()
 
 
 def verify_firebase_token(auth_header: Optional[str]) -> Dict[str, Any]:
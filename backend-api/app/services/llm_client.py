@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class LLMTiming:
+    """Where one LLM call spent its time; connect_s is 0 when a kept-alive connection was reused."""
+
+    started: float = 0.0
+    connect_s: float = 0.0
+    connects: int = 0
+    _open: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    @property
+    def total_s(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_debug(self) -> Dict[str, Any]:
+        total_ms = int(self.total_s * 1000)
+        connect_ms = int(self.connect_s * 1000)
+        return {
+            "tookMs": total_ms,
+            "connectMs": connect_ms,
+            "modelMs": max(total_ms - connect_ms, 0),
+            "connectionReused": self.connects == 0,
+        }
+
+
+# the timing of the call running in this task (None outside LLMClientPool.timed())
+_current_timing: contextvars.ContextVar[Optional[LLMTiming]] = contextvars.ContextVar("llm_timing", default=None)
+_CONNECT_EVENTS = ("connection.connect_tcp", "connection.start_tls")
+
+
+def _trace(event: str, info: Dict[str, Any]) -> None:
+    # httpcore calls this around every connection step; I only add up TCP + TLS setup
+    timing = _current_timing.get()
+    if timing is None or not event.startswith(_CONNECT_EVENTS):
+        return
+    step, _, phase = event.rpartition(".")
+    if phase == "started":
+        timing._open[step] = time.perf_counter()
+    elif phase == "complete":
+        began = timing._open.pop(step, None)
+        if began is not None:
+            timing.connect_s += time.perf_counter() - began
+        if step == "connection.connect_tcp":
+            timing.connects += 1
+
+
+async def _atrace(event: str, info: Dict[str, Any]) -> None:
+    _trace(event, info)
+
+
+class _TracedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = _atrace
+        return await super().handle_async_request(request)
+
+
+class LLMClientPool:
+    """
+    One AsyncOpenAI client per process, on top of one pooled httpx client, so
+    chat turns reuse kept-alive (and, with h2 installed, HTTP/2) connections
+    instead of paying a TCP + TLS handshake each time, and never block the
+    event loop while the model is thinking.
+
+    main.backend_lifespan calls start() / aclose(); client() also builds it
+    lazily so scripts and tests work without the app lifespan. The client
+    belongs to the event loop it is first used on (uvicorn runs one).
+
+    Env (all optional):
+      LLM_MAX_CONNECTIONS   (20)   connections per process
+      LLM_MAX_KEEPALIVE     (10)   idle connections kept open
+      LLM_KEEPALIVE_EXPIRY  (60)   seconds an idle connection stays open
+      LLM_HTTP2             (auto) true / false / auto = on when h2 is installed
+    """
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self.http2 = False
+        self.calls = 0
+        self.connects = 0
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+        )
+
+    def start(self) -> Optional[AsyncOpenAI]:
+        # no awaits in here, so two coroutines can't both build a client
+        if self._client is not None:
+            return self._client
+
+        api_key = os.getenv("OPENAI_API_KEY", "").strip()
+        if not api_key:
+            # no key: the chat service falls back to rules
+            return None
+
+        wanted = os.getenv("LLM_HTTP2", "auto").strip().lower()
+        self.http2 = _http2_available() if wanted == "auto" else wanted == "true"
+
+        # I keep timeouts tight because Render free instances can hang easily.
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(connect=10.0, read=35.0, write=10.0, pool=10.0),
+            transport=_TracedTransport(http2=self.http2, limits=self._limits()),
+        )
+        # IMPORTANT: AsyncOpenAI() must be called with keyword args (api_key=...).
+        self._client = AsyncOpenAI(api_key=api_key, http_client=self._http)
+        return self._client
+
+    def client(self) -> Optional[AsyncOpenAI]:
+        return self._client if self._client is not None else self.start()
+
+    @contextmanager
+    def timed(self) -> Iterator[LLMTiming]:
+        timing = LLMTiming(started=time.perf_counter())
+        token = _current_timing.set(timing)
+        try:
+            yield timing
+        finally:
+            _current_timing.reset(token)
+            self.calls += 1
+            self.connects += timing.connects
+
+    async def aclose(self) -> None:
+        http, self._http, self._client = self._http, None, None
+        if http is not None:
+            await http.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "calls": self.calls,
+            "connects": self.connects,
+        }
+
+
+llm_pool = LLMClientPool()
@@ -0,0 +1,254 @@
+"""
+Per-user mood rollups, so dashboards and reports read O(weeks) small docs
+instead of O(entries) raw moods.
+
+    users/{uid}/moodRollups/week-2026-W42   count, sum, min, max, days{date: stats}
+    users/{uid}/moodRollups/day-2026-10-18  count, sum, min, max, avg
+
+Days and ISO weeks are cut in the timezone from env_timezone(); every doc
+records it. Rollups are always rebuilt from the raw moods of one week (never
+incremented), so rebuilding is idempotent and a rollup can't drift from its
+source for longer than it takes the next rebuild to run:
+
+- on write: POST /mood rebuilds the week of the mood it stored
+- catch-up: catch_up() rebuilds the recent weeks; the iOS app writes moods
+  straight to Firestore, and late or backfilled entries land in old weeks
+- check_consistency() compares any range with its source and can repair it
+
+Reads use rollups only for weeks that are over; the running week (at most
+seven days of moods) is read raw, so a mood logged a second ago already
+counts even if nothing rebuilt its week yet. A rollup built before its
+week ended is provisional and gets rebuilt once, on its first read after.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.services.mood_store import MoodReads, as_utc, fetch_mood_points, week_bounds
+
+
+def day_key(d: date) -> str:
+    return d.isoformat()
+
+
+def week_key(d: date) -> str:
+    year, week, _ = d.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def rollups_ref(db: Any, uid: str) -> Any:
+    """users/{uid}/moodRollups"""
+    return db.collection("users").document(uid).collection("moodRollups")
+
+
+def _stats(scores: List[int]) -> Dict[str, Any]:
+    return {
+        "count": len(scores),
+        "sum": sum(scores),
+        "min": min(scores) if scores else None,
+        "max": max(scores) if scores else None,
+        "avg": round(sum(scores) / len(scores), 2) if scores else None,
+    }
+
+
+def aggregate_week(points: Iterable[Tuple[datetime, int]], tz: tzinfo) -> Dict[str, Any]:
+    """The week doc (minus bookkeeping) for the raw (timestamp, score) points of one week."""
+    per_day: Dict[str, List[int]] = {}
+    scores: List[int] = []
+    for ts, s in points:
+        per_day.setdefault(day_key(ts.astimezone(tz).date()), []).append(s)
+        scores.append(s)
+    return {**_stats(scores), "days": {d: _stats(v) for d, v in sorted(per_day.items())}}
+
+
+def _week_start(d: date, tz: tzinfo) -> datetime:
+    monday = d - timedelta(days=d.weekday())
+    return datetime(monday.year, monday.month, monday.day, tzinfo=tz)
+
+
+def rebuild_week(
+    db: Any,
+    uid: str,
+    week_start: datetime,
+    tz: tzinfo,
+    reads: Optional[MoodReads] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Recomputes one ISO week (and its day docs) from the raw moods and stores it.
+    builtAt says whether the week was over by then (see read_days).
+    """
+    week_end = week_start + timedelta(days=7)
+    points = fetch_mood_points(db, uid, week_start, week_end, reads=reads)
+    agg = aggregate_week(points, tz)
+
+    ref = rollups_ref(db, uid)
+    wkey = week_key(week_start.date())
+    previous = ref.document(f"week-{wkey}").get()
+    if reads is not None:
+        reads.add(1)
+    stale_days = set((previous.to_dict() or {}).get("days", {})) - set(agg["days"]) if previous.exists else set()
+
+    doc = {
+        **agg,
+        "kind": "week",
+        "week": wkey,
+        "start": week_start.date().isoformat(),
+        "tz": str(tz),
+        "builtAt": now or datetime.now(timezone.utc),
+    }
+    ref.document(f"week-{wkey}").set(doc)
+    for d, stats in agg["days"].items():
+        ref.document(f"day-{d}").set({**stats, "kind": "day", "date": d, "week": wkey, "tz": str(tz)})
+    for d in stale_days:
+        # every mood of that day was deleted or moved since the last rebuild
+        ref.document(f"day-{d}").delete()
+    return doc
+
+
+def weeks_between(start: datetime, end: datetime, tz: tzinfo) -> List[datetime]:
+    """Local Monday 00:00 of every ISO week overlapping [start, end)."""
+    out = []
+    week = _week_start(start.astimezone(tz).date(), tz)
+    while week < end:
+        out.append(week)
+        week = _week_start((week + timedelta(days=7)).date(), tz)
+    return out
+
+
+def rebuild_range(
+    db: Any, uid: str, start: datetime, end: datetime, tz: tzinfo, now: Optional[datetime] = None,
+) -> List[str]:
+    return [rebuild_week(db, uid, w, tz, now=now)["week"] for w in weeks_between(start, end, tz)]
+
+
+def on_mood_written(
+    db: Any, uid: str, timestamp: datetime, tz: tzinfo, now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Keeps the rollups of the week `timestamp` falls in up to date after a write."""
+    ts_local = as_utc(timestamp).astimezone(tz)
+    return rebuild_week(db, uid, _week_start(ts_local.date(), tz), tz, now=now)
+
+
+def catch_up(db: Any, uid: str, tz: tzinfo, days: int = 14, now: Optional[datetime] = None) -> List[str]:
+    """
+    Rebuilds every week touching the last `days` days. Moods the app wrote
+    straight to Firestore, and late entries for recent days, get picked up
+    here; backfills older than that need a larger `days` or check_consistency().
+    """
+    now = now or datetime.now(timezone.utc)
+    return rebuild_range(db, uid, now - timedelta(days=days), now, tz, now=now)
+
+
+def read_days(
+    db: Any,
+    uid: str,
+    start: datetime,
+    end: datetime,
+    tz: tzinfo,
+    reads: Optional[MoodReads] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-day stats for [start, end) (start/end on local week boundaries), from
+    one rollup doc per finished week and raw moods for the running week.
+    A finished week is rebuilt on the spot when it has no rollup yet, or
+    only a provisional one built before the week ended (POST /mood and
+    catch_up() roll up the running week too, and the app keeps writing
+    moods straight to Firestore after that). Once rebuilt after its end,
+    a week's rollup is final until check_consistency() finds a backfill.
+    """
+    now = now or datetime.now(timezone.utc)
+    ref = rollups_ref(db, uid)
+    days: Dict[str, Dict[str, Any]] = {}
+    for week in weeks_between(start, end, tz):
+        week_end = week + timedelta(days=7)
+        if week_end > now:
+            agg = aggregate_week(fetch_mood_points(db, uid, week, week_end, reads=reads), tz)
+        else:
+            agg = ref.document(f"week-{week_key(week.date())}").get().to_dict()
+            if reads is not None:
+                reads.add(1)
+            built = agg.get("builtAt") if agg is not None else None
+            if agg is None or agg.get("tz") != str(tz) or built is None or as_utc(built) < week_end:
+                # never built, cut in another timezone before APP_TIMEZONE
+                # changed, or built while the week was still running
+                agg = rebuild_week(db, uid, week, tz, reads=reads, now=now)
+        days.update(agg.get("days", {}))
+    return days
+
+
+def summarize_days(days: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """count/avg/min/max + per-day averages over day stats, same shape as /mood/weekly."""
+    days = {d: s for d, s in sorted(days.items()) if s.get("count")}
+    if not days:
+        return {"count": 0, "avg": None, "min": None, "max": None, "points": []}
+    count = sum(s["count"] for s in days.values())
+    return {
+        "count": count,
+        "avg": round(sum(s["sum"] for s in days.values()) / count, 2),
+        "min": min(s["min"] for s in days.values()),
+        "max": max(s["max"] for s in days.values()),
+        "points": [{"date": d, "avg": round(s["sum"] / s["count"], 2)} for d, s in days.items()],
+    }
+
+
+def check_consistency(
+    db: Any,
+    uid: str,
+    start: datetime,
+    end: datetime,
+    tz: tzinfo,
+    repair: bool = False,
+) -> List[str]:
+    """
+    Recomputes every week in [start, end) from the raw moods and returns the
+    rollup docs (week-... / day-...) that are missing or disagree with it.
+    With repair=True those weeks are rebuilt.
+    """
+    ref = rollups_ref(db, uid)
+    bad: List[str] = []
+    for week in weeks_between(start, end, tz):
+        want = aggregate_week(fetch_mood_points(db, uid, week, week + timedelta(days=7)), tz)
+        wkey = week_key(week.date())
+        have = ref.document(f"week-{wkey}").get().to_dict()
+        week_bad = []
+        if have is None or have.get("tz") != str(tz) or {k: have.get(k) for k in want} != want:
+            week_bad.append(f"week-{wkey}")
+        for d, stats in want["days"].items():
+            day = ref.document(f"day-{d}").get().to_dict() or {}
+            if {k: day.get(k) for k in stats} != stats:
+                week_bad.append(f"day-{d}")
+        if week_bad and repair:
+            rebuild_week(db, uid, week, tz)
+        bad.extend(week_bad)
+    return bad
+
+
+def main():
+    from app.services.firebase_service import env_timezone, firestore_client
+
+    ap = argparse.ArgumentParser(description="Mood rollup catch-up / consistency check")
+    ap.add_argument("--uid", action="append", default=[], help="user id (repeatable); default = every user")
+    ap.add_argument("--days", type=int, default=14, help="catch-up window in days")
+    ap.add_argument("--check-weeks", type=int, default=0, help="also verify this many past weeks against the raw moods")
+    ap.add_argument("--repair", action="store_true", help="rebuild the weeks the check finds wrong")
+    args = ap.parse_args()
+
+    db = firestore_client()
+    tz = ZoneInfo(env_timezone())
+    uids = args.uid or [doc.id for doc in db.collection("users").list_documents()]
+    for uid in uids:
+        weeks = catch_up(db, uid, tz, days=args.days)
+        print(f"[OK] {uid}: rebuilt {', '.join(weeks)}")
+        if args.check_weeks:
+            start, end = week_bounds(tz, args.check_weeks)
+            bad = check_consistency(db, uid, start, end, tz, repair=args.repair)
+            print(f"[{'FIXED' if args.repair and bad else 'OK' if not bad else 'BAD'}] {uid}: {bad or 'consistent'}")
+
+
+if __name__ == "__main__":
+    main()
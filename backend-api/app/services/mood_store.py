@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, List, Optional, Tuple
+
+# the only fields the mood dashboards ever look at
+MOOD_FIELDS = ["timestamp", "moodScore"]
+
+
+def _field_filter(field: str, op: str, value: Any) -> Any:
+    # I import lazily so this module loads without the Firestore SDK (dev bypass, tests)
+    try:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+    except ImportError:
+        return _Filter(field, op, value)
+    return FieldFilter(field, op, value)
+
+
+@dataclass(frozen=True)
+class _Filter:
+    # same attribute names as FieldFilter, for the in-memory stand-in
+    field_path: str
+    op_string: str
+    value: Any
+
+
+def moods_ref(db: Any, uid: str) -> Any:
+    """users/{uid}/moods"""
+    return db.collection("users").document(uid).collection("moods")
+
+
+def as_utc(ts: datetime) -> datetime:
+    # Firestore gives back UTC datetimes; naive ones written by old clients are UTC too
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def week_bounds(tz: tzinfo, weeks: int = 1, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """[Monday 00:00 `weeks - 1` weeks ago, Monday 00:00 next week) in local time."""
+    now_local = (now or datetime.now(timezone.utc)).astimezone(tz)
+    start = (now_local - timedelta(days=now_local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = start - timedelta(days=7 * (weeks - 1))
+    return start, start + timedelta(days=7 * weeks)
+
+
+@dataclass
+class MoodReads:
+    """Firestore documents billed for one request (an empty query still costs one read)."""
+
+    queries: int = 0
+    documents: int = 0
+    billed: int = 0
+
+    def add(self, n_docs: int) -> None:
+        self.queries += 1
+        self.documents += n_docs
+        self.billed += max(n_docs, 1)
+
+    def as_dict(self) -> dict:
+        return {"queries": self.queries, "documents": self.documents, "billed": self.billed}
+
+
+def fetch_mood_points(
+    db: Any,
+    uid: str,
+    start: datetime,
+    end: datetime,
+    reads: Optional[MoodReads] = None,
+) -> List[Tuple[datetime, int]]:
+    """
+    (timestamp UTC, score) for start <= timestamp < end, oldest first.
+
+    The range and the ordering run in Firestore and only timestamp +
+    moodScore come back, so a dashboard load reads the documents of that
+    range instead of every mood the user ever logged.
+    """
+    query = (
+        moods_ref(db, uid)
+        .where(filter=_field_filter("timestamp", ">=", as_utc(start)))
+        .where(filter=_field_filter("timestamp", "<", as_utc(end)))
+        .order_by("timestamp")
+        .select(MOOD_FIELDS)
+    )
+
+    points: List[Tuple[datetime, int]] = []
+    n_docs = 0
+    for snap in query.stream():
+        n_docs += 1
+        d = snap.to_dict() or {}
+        ts, score = d.get("timestamp"), d.get("moodScore")
+        if not ts or score is None:
+            continue
+        try:
+            points.append((as_utc(ts), int(score)))
+        except Exception:
+            continue
+
+    if reads is not None:
+        reads.add(n_docs)
+    return points
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.services.encryption_service import pack_private_report
+from app.services.firebase_service import env_timezone
+from app.services.mood_rollups import read_days, summarize_days
+from app.services.mood_store import week_bounds
+from app.services.work_pool import PoolSaturated
+
+
+# -------- the report itself (blocking; runs in a worker thread) --------
+
+def data_version(days: Dict[str, Dict[str, Any]], tz_name: str) -> str:
+    """Changes whenever any mood in the range (or the timezone) does."""
+    raw = json.dumps({"tz": tz_name, "days": days}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def report_text(weeks: int, mood: Dict[str, Any]) -> str:
+    return (
+        f"Nuvio Weekly Report ({weeks} week(s))\n"
+        f"Generated: {datetime.now(timezone.utc).isoformat()}\n\n"
+        f"- Entries: {mood['count']}\n"
+        f"- Avg mood: {mood['avg']}\n"
+        f"- Min: {mood['min']}\n"
+        f"- Max: {mood['max']}\n\n"
+        "Disclaimer: informational only, not medical advice.\n"
+    )
+
+
+# (uid, weeks, window start, window end, data version)
+ReportKey = Tuple[str, int, str, str, str]
+
+
+class ReportCache:
+    """ReportKey -> finished report; thread-safe LRU (workers build reports in threads)."""
+
+    def __init__(self, maxsize: int = 5000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[ReportKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: ReportKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: ReportKey, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def build_report(db: Any, uid: str, weeks: int, cache: ReportCache) -> Dict[str, Any]:
+    """
+    Reads the `weeks` weeks of mood stats (rollups, O(weeks) docs) and
+    returns the report. If nothing changed since the last identical
+    request, the stored report is reused: no new text, doc or packing.
+    The version is taken over what read_days returns, which rebuilds
+    rollups made before their week ended, so moods written straight to
+    Firestore late in a week change it too.
+    """
+    tz_name = env_timezone()
+    tz = ZoneInfo(tz_name)
+    start, end = week_bounds(tz, weeks)
+    days = read_days(db, uid, start, end, tz)
+    version = data_version(days, tz_name)
+    # the window is part of the key: two windows with the same moods (e.g. none) are different reports
+    key = (uid, weeks, start.isoformat(), end.isoformat(), version)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    content = report_text(weeks, summarize_days(days))
+    report_id = "rep_" + str(uuid.uuid4())
+
+    db.collection("users").document(uid).collection("reports").document(report_id).set({
+        "id": report_id,
+        "timestamp": datetime.now(timezone.utc),
+        "weeks": weeks,
+        "dataVersion": version,
+        "content": content,
+    })
+
+    # I also give a packed version (base64) for easy transport.
+    result = {"reportId": report_id, "content": content, "packed": pack_private_report(content), "dataVersion": version}
+    cache.put(key, result)
+    return {**result, "cached": False}
+
+
+# -------- jobs --------
+
+@dataclass
+class ReportJob:
+    id: str
+    uid: str
+    weeks: int
+    status: str = "queued"          # queued -> running -> done | failed
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    db: Any = field(default=None, repr=False)
+
+    def public(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"jobId": self.id, "status": self.status, "weeks": self.weeks}
+        if self.result is not None:
+            out["result"] = self.result
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+class ReportBroker(ABC):
+    """
+    Where jobs wait and get run. The in-process asyncio broker below is the
+    only one today; an external broker (Redis, Cloud Tasks, ...) would
+    implement the same three methods and call `handler(job)` on its workers.
+    """
+
+    @abstractmethod
+    async def start(self, handler: Callable[[ReportJob], Awaitable[None]]) -> None:
+        """Starts the workers; each one awaits handler(job) for the jobs it takes."""
+
+    @abstractmethod
+    def submit(self, job: ReportJob) -> None:
+        """Queues job or raises PoolSaturated; never blocks."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Stops the workers; queued jobs that haven't started are dropped."""
+
+
+class AsyncioBroker(ReportBroker):
+    """asyncio.Queue + `workers` tasks on the app's event loop."""
+
+    def __init__(self, workers: int = 2, max_pending: int = 100, retry_after: int = 2):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.retry_after = int(retry_after)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, handler: Callable[[ReportJob], Awaitable[None]]) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._work(handler)) for _ in range(self.workers)]
+
+    async def _work(self, handler: Callable[[ReportJob], Awaitable[None]]) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            try:
+                await handler(job)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, job: ReportJob) -> None:
+        assert self._queue is not None, "broker not started"
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise PoolSaturated("report", self.retry_after)
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+
+class ReportJobs:
+    """
+    POST /report -> submit() -> job id; GET /report/{id} -> get().
+
+    - the report runs on a broker worker, and its blocking Firestore work in
+      a thread, so request workers never wait for it
+    - an Idempotency-Key (per user) maps to the job it first created, so a
+      retried POST doesn't queue the same report twice
+    - identical reports are reused while the data is unchanged (ReportCache)
+    - finished jobs are kept for `ttl_s` seconds, and only while there are at
+      most `max_jobs` jobs in all (oldest go first); unfinished jobs are
+      never dropped, the broker's queue limit bounds those
+    """
+
+    def __init__(self, broker: ReportBroker, ttl_s: float = 3600.0, max_jobs: int = 10_000):
+        self.broker = broker
+        self.ttl_s = ttl_s
+        self.max_jobs = max_jobs
+        self.cache = ReportCache()
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._idempotency: Dict[Tuple[str, str], str] = {}
+        self._started = False
+
+    async def start(self) -> None:
+        await self.broker.start(self._run)
+        self._started = True
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        self._started = False
+
+    async def _run(self, job: ReportJob) -> None:
+        job.status = "running"
+        try:
+            job.result = await asyncio.to_thread(build_report, job.db, job.uid, job.weeks, self.cache)
+            job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            job.db = None
+
+    def _evict(self) -> None:
+        # only finished jobs go: a queued or running one is still being polled
+        cutoff = time.time() - self.ttl_s
+        over = len(self._jobs) - self.max_jobs
+        for job_id in [j for j, job in self._jobs.items() if job.finished is not None]:
+            if self._jobs[job_id].finished < cutoff or over > 0:
+                del self._jobs[job_id]
+                over -= 1
+        alive = set(self._jobs)
+        for k in [k for k, v in self._idempotency.items() if v not in alive]:
+            del self._idempotency[k]
+
+    async def submit(self, db: Any, uid: str, weeks: int, idempotency_key: Optional[str] = None) -> Tuple[ReportJob, bool]:
+        """(job, created); an idempotency key seen before returns its job (created=False)."""
+        if not self._started:
+            # no lifespan (scripts, bare tests): start on this loop
+            await self.start()
+        self._evict()
+
+        if idempotency_key:
+            job_id = self._idempotency.get((uid, idempotency_key))
+            if job_id is not None:
+                job = self._jobs[job_id]
+                if job.weeks != weeks:
+                    raise ValueError("Idempotency-Key was already used for a different request")
+                return job, False
+
+        job = ReportJob(id="job_" + uuid.uuid4().hex, uid=uid, weeks=weeks, db=db)
+        self.broker.submit(job)
+        self._jobs[job.id] = job
+        if idempotency_key:
+            self._idempotency[(uid, idempotency_key)] = job.id
+        return job, True
+
+    def get(self, job_id: str, uid: str) -> Optional[ReportJob]:
+        job = self._jobs.get(job_id)
+        # someone else's job id is as good as unknown
+        return job if job is not None and job.uid == uid else None
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"jobs": by_status, "cache_hits": self.cache.hits, "cache_misses": self.cache.misses}
+
+
+report_jobs = ReportJobs(
+    AsyncioBroker(
+        workers=int(os.getenv("REPORT_WORKERS", "2")),
+        max_pending=int(os.getenv("REPORT_QUEUE_MAX", "100")),
+        retry_after=int(os.getenv("REPORT_RETRY_AFTER", "2")),
+    ),
+    ttl_s=float(os.getenv("REPORT_JOB_TTL_S", "3600")),
+)
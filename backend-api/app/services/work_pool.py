@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when a pool already has max_pending jobs; the API turns it into a 503."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} pool is saturated")
+        self.retry_after = retry_after
+
+
+class BoundedPool:
+    """
+    A dedicated thread pool for heavy sync work (NumPy scoring, disk I/O)
+    called from async routes, so it never eats Starlette's default threadpool.
+
+    - max_workers: threads doing the work
+    - max_pending: queued + running jobs; past that run() raises PoolSaturated
+    - identical concurrent calls (same key) share one computation
+
+    I only touch the bookkeeping from the event loop (run() and the done
+    callbacks both run there), so it needs no lock.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_pending: int = 64, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.retry_after = int(retry_after)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.pending = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # I create the threads lazily so importing the module stays cheap
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            # shield: one caller disconnecting must not cancel the others' result
+            return await asyncio.shield(fut)
+
+        if self.saturated():
+            self.rejected += 1
+            raise PoolSaturated(self.name, self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self._pool(), functools.partial(fn, *args, **kwargs))
+        self.pending += 1
+        self.submitted += 1
+        self._inflight[key] = fut
+        fut.add_done_callback(functools.partial(self._done, key))
+        return await asyncio.shield(fut)
+
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def _done(self, key: Hashable, fut: asyncio.Future) -> None:
+        self.pending -= 1
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            fut.exception()  # mark retrieved, so a failure nobody awaits isn't logged as "never retrieved"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def pool_from_env(name: str, prefix: str, workers: int = 4, pending_per_worker: int = 16) -> BoundedPool:
+    # e.g. REC_POOL_WORKERS / REC_POOL_MAX_PENDING / REC_POOL_RETRY_AFTER
+    n = int(os.getenv(f"{prefix}_WORKERS", str(workers)))
+    return BoundedPool(
+        name=name,
+        max_workers=n,
+        max_pending=int(os.getenv(f"{prefix}_MAX_PENDING", str(n * pending_per_worker))),
+        retry_after=int(os.getenv(f"{prefix}_RETRY_AFTER", "1")),
+    )
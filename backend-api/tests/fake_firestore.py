@@ -0,0 +1,138 @@
+"""
+In-memory stand-in for the parts of the Firestore client the backend uses.
+Every document a query or get() returns is counted in `reads`, the way
+Firestore bills them (an empty query still costs one read).
+"""
+from __future__ import annotations
+
+import copy
+import itertools
+import operator
+from typing import Any, Dict, List, Optional
+
+_OPS = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_ids = itertools.count()
+
+
+class Snapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], reference: "DocumentRef"):
+        self.id = doc_id
+        self._data = data
+        self.reference = reference
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class DocumentRef:
+    def __init__(self, db: "FakeFirestore", path: tuple):
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> "CollectionRef":
+        return CollectionRef(self._db, self.path + (name,))
+
+    def get(self) -> Snapshot:
+        self._db.reads += 1
+        return Snapshot(self.id, self._db.docs.get(self.path), self)
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        self._db.writes += 1
+        current = self._db.docs.get(self.path) if merge else None
+        self._db.docs[self.path] = {**(current or {}), **copy.deepcopy(data)}
+
+    def update(self, data: Dict[str, Any]) -> None:
+        if self.path not in self._db.docs:
+            raise KeyError(f"no document at {'/'.join(self.path)}")
+        self.set(data, merge=True)
+
+    def delete(self) -> None:
+        self._db.writes += 1
+        self._db.docs.pop(self.path, None)
+
+
+class Query:
+    def __init__(self, db: "FakeFirestore", path: tuple, filters=(), order=None, fields=None, limit=None):
+        self._db = db
+        self._path = path
+        self._filters = list(filters)
+        self._order = order
+        self._fields = fields
+        self._limit = limit
+
+    def _copy(self, **changes) -> "Query":
+        state = dict(filters=self._filters, order=self._order, fields=self._fields, limit=self._limit)
+        state.update(changes)
+        return Query(self._db, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "Query":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, _OPS[op_string], value)])
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "Query":
+        return self._copy(order=(field_path, direction == "DESCENDING"))
+
+    def select(self, field_paths: List[str]) -> "Query":
+        return self._copy(fields=list(field_paths))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def stream(self):
+        self._db.queries += 1
+        self._db.last_select = self._fields
+        rows = []
+        for path, data in self._db.docs.items():
+            if path[:-1] != self._path:
+                continue
+            # like Firestore: a document without the filtered / ordered field never matches
+            if any(f not in data or not op(data[f], v) for f, op, v in self._filters):
+                continue
+            if self._order and self._order[0] not in data:
+                continue
+            rows.append((path, data))
+        if self._order:
+            field, desc = self._order
+            rows.sort(key=lambda r: r[1][field], reverse=desc)
+        if self._limit is not None:
+            rows = rows[: self._limit]
+
+        self._db.reads += max(len(rows), 1)
+        for path, data in rows:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            yield Snapshot(path[-1], copy.deepcopy(data), DocumentRef(self._db, path))
+
+
+class CollectionRef(Query):
+    def __init__(self, db: "FakeFirestore", path: tuple):
+        super().__init__(db, path)
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentRef:
+        return DocumentRef(self._db, self._path + (doc_id or f"auto{next(_ids)}",))
+
+    def add(self, data: Dict[str, Any]):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs: Dict[tuple, Dict[str, Any]] = {}
+        self.reads = 0
+        self.writes = 0
+        self.queries = 0
+        self.last_select: Optional[List[str]] = None
+
+    def collection(self, name: str) -> CollectionRef:
+        return CollectionRef(self, (name,))
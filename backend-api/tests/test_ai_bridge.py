@@ -0,0 +1,78 @@
+from app.services.ai_bridge import RecommendationCache
+
+
+def test_rec_cache_is_lru_and_bounded():
+    cache = RecommendationCache(maxsize=2)
+    cache.put(("m", "v1", "u1", 10), "a")
+    cache.put(("m", "v1", "u2", 10), "b")
+    assert cache.get(("m", "v1", "u1", 10)) == "a"  # u1 is now most recent
+
+    cache.put(("m", "v1", "u3", 10), "c")
+    assert cache.get(("m", "v1", "u2", 10)) is None
+    assert cache.get(("m", "v1", "u1", 10)) == "a"
+    assert cache.stats()["size"] == 2
+
+
+def test_rec_cache_keys_include_model_version():
+    cache = RecommendationCache()
+    cache.put(("m", "v1", "u1", 10), "old")
+    assert cache.get(("m", "v2", "u1", 10)) is None
+
+    cache.put(("other", "v1", "u1", 10), "keep")
+    cache.drop_model("m")
+    assert cache.get(("m", "v1", "u1", 10)) is None
+    assert cache.get(("other", "v1", "u1", 10)) == "keep"
+
+
+def test_batch_endpoint_streams_one_line_per_user():
+    import json
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # uses the small sample model shipped in ai-engine/models/recommendation/latest
+    with TestClient(app) as client:
+        r = client.post("/ai/recommend/batch", json={"user_ids": ["u1", "someone-new", "u1"], "k": 2})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["user_id"] for line in lines] == ["u1", "someone-new", "u1"]
+    assert lines[1]["results"][0]["explanation"] == "Cold start fallback."
+
+
+def test_batch_stops_scoring_when_the_client_disconnects(monkeypatch):
+    import asyncio
+
+    import inference.predict
+    from app.api.ai import recommend_batch
+    from app.models.schemas import RecommendBatchIn
+
+    pulled = []
+
+    class Row:
+        def __init__(self, uid):
+            self.uid = uid
+
+        def model_dump_json(self):
+            return '{"user_id": "%s"}' % self.uid
+
+    def fake_recommend_many(user_ids, **kwargs):
+        for uid in user_ids:
+            pulled.append(uid)
+            yield Row(uid)
+
+    class GoneAfterFirstChunk:
+        async def is_disconnected(self):
+            return True
+
+    monkeypatch.setattr(inference.predict, "recommend_many", fake_recommend_many)
+
+    async def consume():
+        payload = RecommendBatchIn(user_ids=[f"u{i}" for i in range(1000)], k=2)
+        response = await recommend_batch(payload, GoneAfterFirstChunk())
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(consume())
+    assert len(chunks) == 1
+    # only the first chunk was ever submitted to the pool
+    assert len(pulled) == chunks[0].count(b"\n") < 1000
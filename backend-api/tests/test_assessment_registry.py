@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.assessment_service import (
+    AssessmentRegistry,
+    compile_assessment,
+    score_assessment,
+    score_many,
+)
+from app.services.firebase_service import firestore_client
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    fake = FakeFirestore()
+    app.dependency_overrides[firestore_client] = lambda: fake
+    with TestClient(app) as c:
+        c.db = fake
+        yield c
+    app.dependency_overrides.pop(firestore_client, None)
+
+
+def test_registry_loads_every_definition_from_the_data_dir():
+    items = AssessmentRegistry().load()
+    assert set(items) == {"phq9", "who5", "scl90_short"}
+    phq9 = items["phq9"]
+    assert len(phq9.question_ids) == 9 and "phq9_q9" in phq9.question_set
+    assert (phq9.scale_min, phq9.scale_max) == (0, 3)
+    assert [phq9.level(t) for t in (0, 4, 5, 14, 15, 27)] == [
+        "minimal", "minimal", "mild", "moderate", "moderately_severe", "severe"]
+
+
+def test_bad_definitions_fail_at_load(tmp_path):
+    good = {"name": "phq9", "scale": {"min": 0, "max": 3}, "questions": [{"id": "q1"}, {"id": "q1"}]}
+    with pytest.raises(ValueError, match="duplicate"):
+        compile_assessment("phq9", good)
+    (tmp_path / "x.json").write_text(json.dumps({"name": "x", "scale": {"min": 3, "max": 0}, "questions": [{"id": "a"}]}))
+    with pytest.raises(ValueError, match="min 3 > max 0"):
+        AssessmentRegistry(tmp_path, {"x": "x.json"}).load()
+
+
+def test_questions_are_served_with_etag_and_revalidate_to_304(client):
+    r = client.get("/assessments/questions/phq9")
+    assert r.status_code == 200
+    assert r.json()["name"] == "phq9" and len(r.json()["questions"]) == 9
+    etag = r.headers["etag"]
+    assert "max-age=" in r.headers["cache-control"]
+
+    again = client.get("/assessments/questions/phq9", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert client.get("/assessments/questions/phq9", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+    assert client.get("/assessments/questions/phq9", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/assessments/questions/who5").headers["etag"] != etag
+    assert client.get("/assessments/questions/nope").status_code == 404
+
+
+def test_served_definition_cannot_be_mutated_by_callers():
+    from app.services.assessment_service import load_assessment
+
+    load_assessment("who5")["questions"].clear()
+    assert len(load_assessment("who5")["questions"]) == 5
+
+
+def test_scoring_accepts_extra_keys_like_before():
+    answers = {f"phq9_q{i}": 2 for i in range(1, 10)}
+    r = score_assessment("phq9", answers)
+    assert r["ok"] and r["total_score"] == 18 and r["level"] == "moderately_severe" and r["safety_flag"]
+
+    # clients that send extra keys keep getting scored (and the extras still count, as they always did)
+    r = score_assessment("phq9", {**answers, "extra": 3})
+    assert r["ok"] and r["total_score"] == 21
+    assert not score_assessment("phq9", {**answers, "extra": 9})["ok"]     # still range-checked
+    with pytest.raises(ValueError):
+        score_assessment("nope", {})
+
+
+def test_definitions_are_read_from_backend_data_dir():
+    from pathlib import Path
+
+    from app.services.assessment_service import ASSESS_DIR
+
+    backend = Path(__file__).resolve().parents[1]
+    assert ASSESS_DIR == backend / "data" / "assessment"
+    assert all((ASSESS_DIR / f).is_file() for f in ("phq9.json", "who5.json", "scl90_short.json"))
+
+
+def test_score_many_matches_single_scoring_in_order():
+    batch = [{f"who5_q{i}": v for i in range(1, 6)} for v in range(6)] + [{"who5_q1": 9}]
+    results = score_many("who5", batch)
+    assert [r.get("score_0_100") for r in results[:6]] == [0, 20, 40, 60, 80, 100]
+    assert len({r["ts"] for r in results[:6]}) == 1
+    assert results[-1]["ok"] is False
+    for answers, r in zip(batch, results):
+        single = score_assessment("who5", answers)
+        assert {k: v for k, v in single.items() if k != "ts"} == {k: v for k, v in r.items() if k != "ts"}
+
+
+def test_submit_stores_result_under_the_callers_uid(client):
+    answers = {f"scl_q{i}": 1 for i in range(1, 11)}
+    r = client.post("/assessments/submit/scl90_short", json={"answers": answers})
+    assert r.status_code == 200 and r.json()["ok"]
+    stored = [d for p, d in client.db.docs.items() if p[:3] == ("users", "dev-user", "assessments")]
+    assert len(stored) == 1 and stored[0]["result"]["avg_item_score"] == 1.0
+    assert client.post("/assessments/submit/nope", json={"answers": {}}).status_code == 404
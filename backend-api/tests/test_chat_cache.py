@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.services.chat_cache import ChatReplyCache
+
+MSGS = [{"role": "system", "content": "be kind"}, {"role": "user", "content": "I feel stressed"}]
+
+
+def _reply(text="ok"):
+    return {"assistantText": text, "metadata": {"debug": {}}}
+
+
+def test_key_normalizes_text_but_not_model_or_params():
+    key = ChatReplyCache.key("m", MSGS, temperature=0.7)
+    same = [MSGS[0], {"role": "user", "content": "  i feel   STRESSED!! "}]
+    assert ChatReplyCache.key("m", same, temperature=0.7) == key
+    assert ChatReplyCache.key("other", MSGS, temperature=0.7) != key
+    assert ChatReplyCache.key("m", MSGS, temperature=0.2) != key
+
+
+def test_ttl_and_size_bound(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.chat_cache.time.monotonic", lambda: now[0])
+    cache = ChatReplyCache(maxsize=2, ttl_s=10)
+    cache.put("a", _reply("a"), 900)
+    cache.put("b", _reply("b"), 100)
+    assert cache.get("a") == (_reply("a"), 900)     # a is now most recent
+    cache.put("c", _reply("c"), 100)
+    assert cache.get("b") is None
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 1 and cache.stats()["saved_ms"] == 900
+
+
+def test_cached_replies_are_copies():
+    cache = ChatReplyCache()
+    cache.put("k", _reply(), 5)
+    cache.get("k")[0]["metadata"]["debug"]["cache"] = "mutated"
+    assert cache.get("k")[0] == _reply()
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = ChatReplyCache()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", flaky) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 1 and cache.stats()["size"] == 0
+
+
+@pytest.mark.parametrize("history,expected", [(None, True), ([{}] * 2, True), ([{}] * 3, False)])
+def test_only_short_conversations_are_cacheable(history, expected):
+    assert ChatReplyCache(max_history=2).cacheable(history) is expected
+    assert ChatReplyCache(ttl_s=0).cacheable(None) is False
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.chat_context import MESSAGE_OVERHEAD, ContextBuilder, TokenCounter
+
+SYSTEM = "You are a supportive companion."
+JOURNAL = (
+    "Today was long. I woke up late, missed the bus and spent the whole lecture worrying about the exam "
+    "next week, then my manager called about the weekend shift and I could not say no again. "
+) * 6
+
+
+def _history(n):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Note {i}: {JOURNAL}"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def builder():
+    return ContextBuilder(TokenCounter(), history_tokens=600, summary_tokens=120)
+
+
+def test_estimator_counts_and_truncates_within_budget():
+    counter = TokenCounter()
+    assert counter.count("") == 0
+    assert 2 <= counter.count("hello world") <= 4
+    assert counter.count(JOURNAL) >= len(JOURNAL) / 4
+    cut = counter.truncate(JOURNAL, 50)
+    assert cut.endswith(" …") and counter.count(cut) <= 50
+    assert JOURNAL.startswith(cut[:-2])
+
+
+def test_short_history_is_kept_verbatim(builder):
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hey"}, {"role": "tool", "content": "x"}]
+    messages, info = builder.build(SYSTEM, history, "I feel stressed")
+    assert messages == [{"role": "system", "content": SYSTEM}, *history[:2], {"role": "user", "content": "I feel stressed"}]
+    assert info["promptTokens"] == builder.counter.messages(messages)
+    assert info["summarizedMessages"] == 0 and info["tokenizer"] == "estimate"
+
+
+def test_prompt_size_stays_flat_as_the_conversation_grows(builder):
+    ceiling = (
+        builder.counter.messages([{"content": SYSTEM}, {"content": "and today?"}])
+        + builder.history_tokens + builder.summary_tokens + MESSAGE_OVERHEAD + 10
+    )
+    sizes = []
+    for n in (4, 40, 400):
+        messages, info = builder.build(SYSTEM, _history(n), "and today?")
+        assert info["promptTokens"] <= ceiling
+        assert messages[0]["content"] == SYSTEM and messages[-1]["content"] == "and today?"
+        sizes.append(info["promptTokens"])
+    assert sizes[2] <= sizes[1] + 20
+
+    messages, info = builder.build(SYSTEM, _history(40), "and today?")
+    assert messages[1]["content"].startswith("Earlier in this conversation:\n")
+    assert "You: Note 37: Today was long." in messages[1]["content"]
+    # newest turns are the ones kept (the oldest kept one may be cut short)
+    assert messages[-2]["content"] == _history(40)[-1]["content"]
+    assert info["historyMessages"] + info["summarizedMessages"] == 40
+
+
+def test_summaries_are_cached_per_conversation_and_extended(builder):
+    fresh = ContextBuilder(TokenCounter(), history_tokens=600, summary_tokens=120)
+    builder.build(SYSTEM, _history(20), "next", conversation_id="c1", user_id="u1")
+
+    cached_msgs, info = builder.build(SYSTEM, _history(22), "next", conversation_id="c1", user_id="u1")
+    assert info["summaryCached"] is True
+    assert cached_msgs == fresh.build(SYSTEM, _history(22), "next")[0]
+
+    # another user's conversation with the same id, or an edited history, starts over
+    _, other = builder.build(SYSTEM, _history(22), "next", conversation_id="c1", user_id="u2")
+    assert other["summaryCached"] is False
+    edited = _history(24)
+    edited[0] = {"role": "user", "content": "something else entirely"}
+    _, info = builder.build(SYSTEM, edited, "next", conversation_id="c1", user_id="u1")
+    assert info["summaryCached"] is False
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import ai_service
+from app.services.chat_cache import ChatReplyCache
+from app.services.llm_client import LLMClientPool
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    connections = 0
+    requests = 0
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests += 1
+        if "FAIL" in req["messages"][-1]["content"]:
+            self.send_response(400)     # 4xx: the SDK doesn't retry
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if req.get("stream"):
+            chunks = [
+                {"id": "x", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+                 "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                for piece in ["Tell ", "me ", "more."]
+            ]
+            body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({
+                "id": "x", "object": "chat.completion", "created": 0, "model": "fake",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Tell me more."}}],
+            })
+            content_type = "application/json"
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("LLM_HTTP2", "false")
+    _FakeOpenAI.connections = _FakeOpenAI.requests = 0
+    # these tests look at the wire, so the reply cache is off unless a test turns it on
+    monkeypatch.setattr(ai_service, "chat_cache", ChatReplyCache(ttl_s=0))
+    yield server
+    server.shutdown()
+
+
+def test_chat_turns_reuse_one_connection(fake_openai, monkeypatch):
+    pool = LLMClientPool()
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+
+    async def three_turns():
+        replies = [await ai_service.generate_chat_reply("hello", user_id="u") for _ in range(3)]
+        await pool.aclose()
+        return replies
+
+    replies = asyncio.run(three_turns())
+
+    assert [r["assistantText"] for r in replies] == ["Tell me more."] * 3
+    debug = [r["metadata"]["debug"] for r in replies]
+    assert [d["connectionReused"] for d in debug] == [False, True, True]
+    assert debug[1]["connectMs"] == 0
+    assert all(d["tookMs"] == d["connectMs"] + d["modelMs"] for d in debug)
+    assert _FakeOpenAI.connections == 1
+    assert pool.stats()["calls"] == 3 and pool.stats()["connects"] == 1
+
+
+def test_no_key_means_no_client(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    pool = LLMClientPool()
+    assert pool.client() is None
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+    reply = asyncio.run(ai_service.generate_chat_reply("so stressed", user_id="u"))
+    assert reply["metadata"]["tags"] == ["stress"]
+
+
+def _collect(pool, text):
+    async def run():
+        events = [e async for e in ai_service.stream_chat_reply(text, user_id="u")]
+        await pool.aclose()
+        return events
+    return asyncio.run(run())
+
+
+def test_stream_forwards_tokens_then_done(fake_openai, monkeypatch):
+    pool = LLMClientPool()
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+
+    events = _collect(pool, "hello")
+    assert [e["text"] for e in events[:-1]] == ["Tell ", "me ", "more."]
+    done = events[-1]
+    assert done["type"] == "done" and done["assistantText"] == "Tell me more."
+    assert done["metadata"]["debug"]["provider"] == "openai"
+    assert 0 <= done["metadata"]["debug"]["firstTokenMs"] <= done["metadata"]["debug"]["tookMs"]
+
+
+def test_stream_falls_back_to_rules_when_the_provider_fails(fake_openai, monkeypatch):
+    pool = LLMClientPool()
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+
+    events = _collect(pool, "FAIL, I'm so overwhelmed")
+    assert [e["type"] for e in events] == ["token", "done"]
+    assert events[1]["metadata"]["debug"]["provider"] == "rule_based"
+    assert events[0]["text"] == events[1]["assistantText"]
+
+
+def test_chat_stream_endpoint_speaks_sse(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with TestClient(app) as client:
+        r = client.post("/chat/stream", json={"userText": "stressed about exams"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    blocks = [b.split("\n") for b in r.text.strip().split("\n\n")]
+    assert [b[0] for b in blocks] == ["event: token", "event: done"]
+    done = json.loads(blocks[1][1][len("data: "):])
+    assert done["metadata"]["tags"] == ["stress"]
+
+
+def test_short_check_ins_are_cached_and_coalesced(fake_openai, monkeypatch):
+    pool = LLMClientPool()
+    cache = ChatReplyCache(ttl_s=60, max_history=2)
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+    monkeypatch.setattr(ai_service, "chat_cache", cache)
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hey"}]
+
+    async def scenario():
+        burst = await asyncio.gather(*(ai_service.generate_chat_reply("I feel stressed", user_id=u) for u in "abcd"))
+        again = await ai_service.generate_chat_reply("i feel  STRESSED.", user_id="e", history=history)
+        longer = await ai_service.generate_chat_reply("I feel stressed", user_id="f", history=history * 2)
+        events = [e async for e in ai_service.stream_chat_reply("I feel stressed", user_id="g")]
+        await pool.aclose()
+        return burst, again, longer, events
+
+    burst, again, longer, events = asyncio.run(scenario())
+    statuses = sorted(r["metadata"]["debug"]["cache"]["status"] for r in burst)
+    assert statuses == ["coalesced", "coalesced", "coalesced", "miss"]
+    # a different (short) history is a different key; a long one isn't cached at all
+    assert again["metadata"]["debug"]["cache"]["status"] == "miss"
+    assert longer["metadata"]["debug"]["cache"] == {"status": "bypass"}
+    assert _FakeOpenAI.requests == 3
+
+    hit = events[-1]["metadata"]["debug"]["cache"]
+    assert hit["status"] == "hit" and hit["hitRate"] > 0
+    assert events[0]["text"] == "Tell me more."
+    assert cache.stats()["coalesced"] == 3
+
+
+def test_disconnect_mid_stream_closes_the_upstream_response(fake_openai, monkeypatch):
+    import openai
+    from app.api.chat import chat_stream
+    from app.models.schemas import ChatIn
+
+    pool = LLMClientPool()
+    monkeypatch.setattr(ai_service, "llm_pool", pool)
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    closed = []
+    real_close = openai.AsyncStream.close
+
+    async def close(self):
+        closed.append(self)
+        await real_close(self)
+
+    monkeypatch.setattr(openai.AsyncStream, "close", close)
+
+    async def scenario():
+        # service level: the consumer stops after the first token
+        replies = ai_service.stream_chat_reply("hello", user_id="u")
+        first = await replies.__anext__()
+        await replies.aclose()
+        after_service = len(closed)
+
+        # route level: the SSE client goes away after the first event
+        response = await chat_stream(ChatIn(userText="hello"), authorization=None)
+        body = response.body_iterator
+        first_sse = await body.__anext__()
+        await body.aclose()
+        await pool.aclose()
+        return first, after_service, first_sse
+
+    first, after_service, first_sse = asyncio.run(scenario())
+    assert first == {"type": "token", "text": "Tell "}
+    assert after_service == 1
+    assert first_sse.startswith("event: token")
+    assert len(closed) == 2
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.firebase_service import firestore_client
+from app.services.mood_rollups import (
+    catch_up, check_consistency, on_mood_written, read_days, rebuild_range, rollups_ref, summarize_days, week_key,
+)
+from app.services.mood_store import MoodReads, moods_ref, week_bounds
+from fake_firestore import FakeFirestore
+
+TZ = ZoneInfo("Europe/Istanbul")
+NOW = datetime(2026, 10, 14, 12, 0, tzinfo=timezone.utc)     # a Wednesday
+
+
+def _seed(db, uid="u1", n=300, every_h=13):
+    for i in range(n):
+        moods_ref(db, uid).document(f"m{i}").set({"timestamp": NOW - timedelta(hours=every_h * i), "moodScore": 1 + (i * 7) % 5})
+
+
+def _raw_summary(db, uid, start, end):
+    scores = {}
+    for path, d in db.docs.items():
+        if path[1:3] == (uid, "moods") and start <= d["timestamp"] < end:
+            scores.setdefault(d["timestamp"].astimezone(TZ).date().isoformat(), []).append(d["moodScore"])
+    days = {k: {"count": len(v), "sum": sum(v), "min": min(v), "max": max(v)} for k, v in scores.items()}
+    return summarize_days(days)
+
+
+@pytest.fixture
+def db():
+    fake = FakeFirestore()
+    _seed(fake)
+    return fake
+
+
+def test_rollups_match_raw_moods_and_cost_one_read_per_week(db):
+    start, end = week_bounds(TZ, 8, now=NOW)
+    rebuild_range(db, "u1", start, end, TZ)
+
+    reads = MoodReads()
+    got = summarize_days(read_days(db, "u1", start, end, TZ, reads=reads, now=NOW))
+    assert got == _raw_summary(db, "u1", start, end)
+    # 7 finished weeks from rollups + one range query for the running week
+    running = sum(1 for p, d in db.docs.items() if p[2] == "moods" and d["timestamp"] >= week_bounds(TZ, 1, now=NOW)[0])
+    assert reads.as_dict() == {"queries": 8, "documents": 7 + running, "billed": 7 + running}
+
+
+def test_days_and_weeks_are_cut_in_the_app_timezone():
+    db = FakeFirestore()
+    # Sunday 22:30 UTC is already Monday 01:30 in Istanbul: next ISO week
+    ts = datetime(2026, 10, 11, 22, 30, tzinfo=timezone.utc)
+    moods_ref(db, "u1").document("m").set({"timestamp": ts, "moodScore": 4})
+    rebuild_range(db, "u1", ts, ts + timedelta(days=1), TZ)
+
+    week = rollups_ref(db, "u1").document("week-2026-W42").get().to_dict()
+    assert week["days"] == {"2026-10-12": {"count": 1, "sum": 4, "min": 4, "max": 4, "avg": 4.0}}
+    assert week["tz"] == "Europe/Istanbul"
+    assert rollups_ref(db, "u1").document("day-2026-10-12").get().to_dict()["week"] == "2026-W42"
+    assert not rollups_ref(db, "u1").document("week-2026-W41").get().exists
+
+
+def test_checker_finds_and_repairs_backfilled_and_deleted_entries(db):
+    start, end = week_bounds(TZ, 8, now=NOW)
+    rebuild_range(db, "u1", start, end, TZ)
+    assert check_consistency(db, "u1", start, end, TZ) == []
+
+    # the app backfills a mood five weeks back and deletes every mood of another day
+    late = NOW - timedelta(weeks=5)
+    moods_ref(db, "u1").document("late").set({"timestamp": late, "moodScore": 5})
+    gone_day = (NOW - timedelta(weeks=3)).astimezone(TZ).date()
+    for path in [p for p, d in db.docs.items() if p[2] == "moods" and d["timestamp"].astimezone(TZ).date() == gone_day]:
+        del db.docs[path]
+
+    bad = check_consistency(db, "u1", start, end, TZ)
+    assert f"week-{week_key(late.astimezone(TZ).date())}" in bad
+    assert f"day-{late.astimezone(TZ).date().isoformat()}" in bad
+    assert f"week-{week_key(gone_day)}" in bad
+
+    assert check_consistency(db, "u1", start, end, TZ, repair=True) == bad
+    assert check_consistency(db, "u1", start, end, TZ) == []
+    assert not rollups_ref(db, "u1").document(f"day-{gone_day.isoformat()}").get().exists
+    assert summarize_days(read_days(db, "u1", start, end, TZ, now=NOW)) == _raw_summary(db, "u1", start, end)
+
+
+def test_catch_up_rebuilds_only_recent_weeks(db):
+    weeks = catch_up(db, "u1", TZ, days=10, now=NOW)
+    assert weeks == ["2026-W40", "2026-W41", "2026-W42"]
+    assert {p[-1] for p in db.docs if p[2] == "moodRollups" and p[-1].startswith("week-")} == {f"week-{w}" for w in weeks}
+
+
+def test_post_mood_updates_the_rollup_right_away(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    db = FakeFirestore()
+    app.dependency_overrides[firestore_client] = lambda: db
+    try:
+        with TestClient(app) as client:
+            r = client.post("/mood", json={"moodScore": 2, "note": "meh"})
+            assert r.status_code == 200 and r.json()["saved"] is True
+            client.post("/mood", json={"moodScore": 4})
+            weekly = client.get("/mood/weekly").json()
+    finally:
+        app.dependency_overrides.pop(firestore_client, None)
+
+    week = rollups_ref(db, "dev-user").document(f"week-{r.json()['week']}").get().to_dict()
+    assert (week["count"], week["sum"], week["min"], week["max"]) == (2, 6, 2, 4)
+    assert weekly["mood"]["count"] == 2 and weekly["mood"]["avg"] == 3.0
+
+
+def test_rollup_built_mid_week_picks_up_later_direct_writes_once_the_week_is_over():
+    db = FakeFirestore()
+    tuesday = datetime(2026, 10, 6, 9, 0, tzinfo=timezone.utc)
+    moods_ref(db, "u1").document("api").set({"timestamp": tuesday, "moodScore": 5})
+    on_mood_written(db, "u1", tuesday, TZ, now=tuesday)      # what POST /mood does
+    # later that week the app writes straight to Firestore; nothing rebuilds
+    moods_ref(db, "u1").document("fri").set({"timestamp": tuesday + timedelta(days=3), "moodScore": 1})
+    moods_ref(db, "u1").document("sat").set({"timestamp": tuesday + timedelta(days=4), "moodScore": 1})
+
+    start, end = week_bounds(TZ, 2, now=NOW)
+    got = summarize_days(read_days(db, "u1", start, end, TZ, now=NOW))
+    assert (got["count"], got["avg"]) == (3, 2.33)
+
+    # rebuilt after the week ended, so the next read is a single rollup doc again
+    week = rollups_ref(db, "u1").document("week-2026-W41").get().to_dict()
+    assert week["count"] == 3 and week["builtAt"] == NOW
+    reads = MoodReads()
+    read_days(db, "u1", start, start + timedelta(days=7), TZ, reads=reads, now=NOW)
+    assert reads.as_dict() == {"queries": 1, "documents": 1, "billed": 1}
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.firebase_service import firestore_client
+from app.services.mood_rollups import rebuild_range
+from app.services.mood_store import week_bounds
+from fake_firestore import FakeFirestore
+
+TZ = ZoneInfo("Europe/Istanbul")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    monkeypatch.setenv("APP_TIMEZONE", "Europe/Istanbul")
+    fake = FakeFirestore()
+    now = datetime.now(timezone.utc)
+    # two years of history, one mood every ~17 hours, plus someone else's moods
+    for i in range(1000):
+        ts = now - timedelta(hours=17 * i)
+        fake.collection("users").document("dev-user").collection("moods").document(f"m{i}").set(
+            {"timestamp": ts, "moodScore": 1 + i % 5, "note": "x" * 200}
+        )
+        fake.collection("users").document("other").collection("moods").document(f"m{i}").set(
+            {"timestamp": ts, "moodScore": 5}
+        )
+    fake.reads = 0
+    app.dependency_overrides[firestore_client] = lambda: fake
+    yield fake
+    app.dependency_overrides.pop(firestore_client, None)
+
+
+def _expected(db, weeks):
+    start, end = week_bounds(TZ, weeks)
+    rows = [
+        d for path, d in db.docs.items()
+        if path[1:3] == ("dev-user", "moods") and start <= d["timestamp"] < end
+    ]
+    return sorted((d["timestamp"], d["moodScore"]) for d in rows)
+
+
+@pytest.mark.parametrize("weeks", [1, 4])
+def test_weekly_reads_only_the_requested_range(db, weeks):
+    start, end = week_bounds(TZ, weeks)
+    rebuild_range(db, "dev-user", start, end, TZ)
+    db.reads = 0
+    with TestClient(app) as client:
+        r = client.get("/mood/weekly", params={"weeks": weeks})
+    assert r.status_code == 200
+    body = r.json()
+
+    expected = _expected(db, weeks)
+    scores = [s for _, s in expected]
+    assert body["mood"]["count"] == len(expected)
+    assert body["mood"]["avg"] == round(sum(scores) / len(scores), 2)
+    assert (body["mood"]["min"], body["mood"]["max"]) == (min(scores), max(scores))
+    days = [p["date"] for p in body["mood"]["points"]]
+    assert days == sorted({ts.astimezone(TZ).date().isoformat() for ts, _ in expected})
+
+    # one rollup doc per finished week + the running week's raw moods:
+    # not 1000 (let alone the other user's 1000)
+    running = len(_expected(db, 1))
+    billed = (weeks - 1) + max(running, 1)
+    assert body["reads"] == {"queries": weeks, "documents": (weeks - 1) + running, "billed": billed}
+    assert db.reads == billed
+
+
+def test_empty_range_still_costs_one_read(db):
+    db.docs.clear()
+    with TestClient(app) as client:
+        body = client.get("/mood/weekly").json()
+    assert body["mood"]["count"] == 0
+    assert body["reads"] == {"queries": 1, "documents": 0, "billed": 1}
+
+
+def test_query_is_projected_and_ordered(db):
+    from app.services.mood_store import fetch_mood_points
+
+    start, end = week_bounds(TZ, 2)
+    points = fetch_mood_points(db, "dev-user", start, end)
+    assert points == sorted(points) and len(points) == len(_expected(db, 2))
+    assert db.last_select == ["timestamp", "moodScore"]     # the 200-char notes never leave Firestore
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.firebase_service import env_timezone, firestore_client
+from app.services.mood_rollups import on_mood_written, rollups_ref, week_key
+from app.services.mood_store import moods_ref, week_bounds
+from app.services.report_jobs import (
+    AsyncioBroker, ReportBroker, ReportCache, ReportJob, build_report, data_version, report_jobs,
+)
+from app.services.work_pool import PoolSaturated
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    fake = FakeFirestore()
+    now = datetime.now(timezone.utc)
+    for i in range(40):
+        moods_ref(fake, "dev-user").document(f"m{i}").set({"timestamp": now - timedelta(hours=20 * i), "moodScore": 1 + i % 5})
+    app.dependency_overrides[firestore_client] = lambda: fake
+    yield fake
+    app.dependency_overrides.pop(firestore_client, None)
+
+
+def _wait(client, job_id):
+    for _ in range(200):
+        body = client.get(f"/report/{job_id}").json()
+        if body["status"] in ("done", "failed"):
+            return body
+        time.sleep(0.01)
+    raise AssertionError("report job never finished")
+
+
+def _reports(db):
+    return [d for p, d in db.docs.items() if p[2] == "reports"]
+
+
+def test_report_is_built_in_the_background_and_reused(db):
+    with TestClient(app) as client:
+        r = client.post("/report", params={"weeks": 2})
+        assert r.status_code == 202 and r.json()["status"] in ("queued", "running", "done")
+        assert r.headers["location"] == f"/report/{r.json()['jobId']}"
+        first = _wait(client, r.json()["jobId"])
+        assert first["status"] == "done" and first["result"]["cached"] is False
+        assert "(2 week(s))" in first["result"]["content"]
+
+        # same user, weeks and data: the stored report comes back, nothing is rebuilt
+        again = _wait(client, client.post("/report", params={"weeks": 2}).json()["jobId"])
+        assert again["result"]["cached"] is True
+        assert again["result"]["reportId"] == first["result"]["reportId"]
+        assert len(_reports(db)) == 1
+
+        # new data (or another range) is a new report
+        client.post("/mood", json={"moodScore": 5})
+        fresh = _wait(client, client.post("/report", params={"weeks": 2}).json()["jobId"])
+        other = _wait(client, client.post("/report", params={"weeks": 1}).json()["jobId"])
+    assert fresh["result"]["cached"] is False and fresh["result"]["dataVersion"] != first["result"]["dataVersion"]
+    assert other["result"]["cached"] is False
+    assert len(_reports(db)) == 3
+    assert {d["weeks"] for d in _reports(db)} == {1, 2}
+
+
+def test_late_direct_writes_change_the_data_version(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "true")
+    db = FakeFirestore()
+    tz = ZoneInfo(env_timezone())
+    start, end = week_bounds(tz, 2)
+    tuesday = start + timedelta(days=1, hours=9)      # last week
+    moods_ref(db, "u1").document("api").set({"timestamp": tuesday, "moodScore": 5})
+    rollup = on_mood_written(db, "u1", tuesday, tz, now=tuesday)
+    # a report built from that mid-week rollup is in the cache ...
+    cache = ReportCache()
+    stale = {"reportId": "rep_stale", "content": "Entries: 1", "packed": "", "dataVersion": "x"}
+    cache.put(("u1", 2, start.isoformat(), end.isoformat(), data_version(rollup["days"], env_timezone())), stale)
+    # ... then the app wrote two more moods that week straight to Firestore
+    moods_ref(db, "u1").document("fri").set({"timestamp": tuesday + timedelta(days=3), "moodScore": 1})
+    moods_ref(db, "u1").document("sat").set({"timestamp": tuesday + timedelta(days=4), "moodScore": 1})
+
+    report = build_report(db, "u1", 2, cache)
+    assert report["cached"] is False and report["reportId"] != "rep_stale"
+    assert "- Entries: 3" in report["content"]
+    assert rollups_ref(db, "u1").document(f"week-{week_key(tuesday.astimezone(tz).date())}").get().to_dict()["count"] == 3
+    assert build_report(db, "u1", 2, cache)["cached"] is True
+
+
+def test_idempotency_key_returns_the_same_job(db):
+    with TestClient(app) as client:
+        headers = {"Idempotency-Key": "abc-123"}
+        a = client.post("/report", params={"weeks": 3}, headers=headers)
+        b = client.post("/report", params={"weeks": 3}, headers=headers)
+        assert (a.status_code, b.status_code) == (202, 200)
+        assert a.json()["jobId"] == b.json()["jobId"]
+        assert client.post("/report", params={"weeks": 4}, headers=headers).status_code == 409
+        _wait(client, a.json()["jobId"])
+        assert client.get("/report/job_nope").status_code == 404
+    assert report_jobs.get(a.json()["jobId"], "someone-else") is None
+
+
+def test_full_queue_is_rejected_not_blocked():
+    broker = AsyncioBroker(workers=1, max_pending=1, retry_after=7)
+    release = asyncio.Event()
+
+    async def handler(job):
+        await release.wait()
+
+    async def scenario():
+        await broker.start(handler)
+        broker.submit(ReportJob(id="1", uid="u", weeks=1))
+        await asyncio.sleep(0)              # the worker picks up job 1
+        broker.submit(ReportJob(id="2", uid="u", weeks=1))
+        with pytest.raises(PoolSaturated) as e:
+            broker.submit(ReportJob(id="3", uid="u", weeks=1))
+        release.set()
+        await broker.stop()
+        return e.value.retry_after
+
+    assert asyncio.run(scenario()) == 7
+
+
+def test_broker_interface_cannot_be_used_half_implemented():
+    class NoStop(ReportBroker):
+        async def start(self, handler):
+            pass
+
+        def submit(self, job):
+            pass
+
+    with pytest.raises(TypeError):
+        NoStop()
+
+
+def test_same_data_in_another_window_is_another_report(monkeypatch):
+    from app.services import report_jobs as rj
+
+    db, cache = FakeFirestore(), ReportCache()
+    first = build_report(db, "u1", 1, cache)
+    # a week later, still no moods: same data version, different window
+    later = [b + timedelta(days=7) for b in week_bounds(ZoneInfo(env_timezone()), 1)]
+    monkeypatch.setattr(rj, "week_bounds", lambda tz, weeks: tuple(later))
+    second = build_report(db, "u1", 1, cache)
+    assert second["dataVersion"] == first["dataVersion"]
+    assert second["cached"] is False and second["reportId"] != first["reportId"]
+
+
+class _IdleBroker(ReportBroker):
+    """Accepts jobs and never runs them."""
+
+    async def start(self, handler):
+        pass
+
+    def submit(self, job):
+        pass
+
+    async def stop(self):
+        pass
+
+
+def test_eviction_keeps_unfinished_jobs():
+    from app.services.report_jobs import ReportJobs
+
+    jobs = ReportJobs(_IdleBroker(), ttl_s=0, max_jobs=1)
+
+    async def scenario():
+        queued = [(await jobs.submit(None, "u", 1))[0] for _ in range(3)]
+        # over max_jobs, but nothing is finished: every job is still there to poll
+        assert all(jobs.get(j.id, "u") is j for j in queued)
+        queued[0].status, queued[0].finished = "done", time.time() - 1
+        await jobs.submit(None, "u", 1)
+        return queued
+
+    queued = asyncio.run(scenario())
+    assert jobs.get(queued[0].id, "u") is None
+    assert all(jobs.get(j.id, "u") is j for j in queued[1:])
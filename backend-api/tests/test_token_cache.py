@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from app.services import firebase_service
+from app.services.firebase_service import TokenCache, verify_firebase_bearer
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "false")
+    monkeypatch.setattr(firebase_service, "token_cache", TokenCache(maxsize=2, ttl_s=300))
+    calls = []
+
+    def fake_verify(token):
+        calls.append(token)
+        if token.startswith("bad"):
+            raise ValueError("invalid signature")
+        return {"uid": token.split("-")[0], "email": None, "exp": time.time() + 3600}
+
+    monkeypatch.setattr(firebase_service, "_verify_id_token", fake_verify)
+    return calls
+
+
+def test_repeat_tokens_skip_verification(verifier):
+    first = verify_firebase_bearer("Bearer alice-token")
+    again = verify_firebase_bearer("Bearer alice-token")
+    assert first == again and first["uid"] == "alice"
+    assert verifier == ["alice-token"]
+    stats = firebase_service.token_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    # callers can't corrupt the cached payload
+    again["uid"] = "mallory"
+    assert verify_firebase_bearer("Bearer alice-token")["uid"] == "alice"
+
+
+def test_invalid_tokens_are_never_cached(verifier):
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            verify_firebase_bearer("Bearer bad-token")
+    assert verifier == ["bad-token", "bad-token"]
+    assert firebase_service.token_cache.stats()["size"] == 0
+
+
+def test_entries_expire_with_the_token_and_are_bounded(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(firebase_service.time, "time", lambda: now[0])
+    cache = TokenCache(maxsize=2, ttl_s=300)
+
+    cache.put("short", {"uid": "a"}, exp=now[0] + 10)    # token expires before the TTL
+    cache.put("long", {"uid": "b"}, exp=now[0] + 3600)
+    cache.put("gone", {"uid": "c"}, exp=now[0] - 1)      # already expired: not stored
+    assert cache.stats()["size"] == 2
+    assert "short" not in str(cache._data) and cache.key("short") in cache._data
+
+    now[0] += 11
+    assert cache.get("short") is None and cache.get("long") == {"uid": "b"}
+    now[0] += 300
+    assert cache.get("long") is None
+    assert cache.stats()["expired"] == 2
+
+    for i in range(5):
+        cache.put(f"t{i}", {"uid": i}, exp=None)
+    assert cache.stats()["size"] == 2 and cache.get("t4") == {"uid": 4}
+
+
+def test_health_reports_cache_counters():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        body = client.get("/health").json()
+    assert set(body["authCache"]) >= {"hits", "misses", "hit_rate", "size"}
+
+
+class _Verifier:
+    def __init__(self, status=200):
+        self.status, self.urls = status, []
+
+    def request(self, url):
+        self.urls.append(url)
+        return type("Resp", (), {"status": self.status})()
+
+
+@pytest.fixture
+def firebase_env(monkeypatch):
+    import firebase_admin
+
+    monkeypatch.setenv("DEV_AUTH_BYPASS", "false")
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "nuvio-test")
+    monkeypatch.setattr(firebase_admin, "get_app", lambda: "app")
+    verifier = _Verifier()
+    client = type("Client", (), {"_token_verifier": verifier})()
+    auth = type("Auth", (), {"_get_client": staticmethod(lambda app: client)})()
+    monkeypatch.setattr(firebase_service, "_firebase_auth", lambda: auth)
+    return verifier
+
+
+def test_prefetch_warms_the_verifier_cert_cache(firebase_env):
+    from firebase_admin import _token_gen
+
+    assert firebase_service.prefetch_signing_certs() is True
+    assert firebase_env.urls == [_token_gen.ID_TOKEN_CERT_URI]
+
+
+def test_prefetch_failures_are_logged_not_swallowed(firebase_env, monkeypatch, caplog):
+    import firebase_admin
+
+    # internals moved in an upgrade
+    monkeypatch.setattr(firebase_service, "_firebase_auth", lambda: object())
+    with caplog.at_level("WARNING", logger=firebase_service.__name__):
+        assert firebase_service.prefetch_signing_certs() is False
+    assert "prefetch failed" in caplog.text and "AttributeError" in caplog.text
+
+    # a major version the internals were never checked against is not even tried
+    caplog.clear()
+    monkeypatch.setattr(firebase_admin, "__version__", "99.0.0")
+    with caplog.at_level("WARNING", logger=firebase_service.__name__):
+        assert firebase_service.prefetch_signing_certs() is False
+    assert "99.0.0" in caplog.text
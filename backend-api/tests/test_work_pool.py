@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.work_pool import BoundedPool, PoolSaturated
+
+
+def test_identical_concurrent_calls_are_coalesced():
+    pool = BoundedPool("t", max_workers=2, max_pending=8)
+    release = threading.Event()
+    calls = []
+
+    def work(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run(("same",), work, 21)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [42] * 5
+    assert calls == [21]
+    assert pool.stats()["coalesced"] == 4
+    assert pool.pending == 0
+    pool.shutdown()
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    pool = BoundedPool("t", max_workers=1, max_pending=2, retry_after=3)
+    release = threading.Event()
+
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run(i, release.wait, 5)) for i in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturated) as exc:
+            await pool.run("one-too-many", release.wait, 5)
+        release.set()
+        await asyncio.gather(*tasks)
+        return exc.value
+
+    err = asyncio.run(scenario())
+    assert err.retry_after == 3
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()